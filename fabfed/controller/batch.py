@@ -0,0 +1,286 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Union
+
+from fabfed.controller.provider_factory import ProviderFactory
+from fabfed.controller.workflow import apply_workflow, destroy_workflow
+from fabfed.exceptions import ParseConfigException
+from fabfed.util import utils
+from fabfed.util import state as sutil
+
+BatchSession = namedtuple("BatchSession", "session config_dir var_dict")
+BatchResult = namedtuple("BatchResult", "session rc duration")
+
+_current_session = contextvars.ContextVar("fabfed_batch_session", default=None)
+
+
+class _SessionFilter(logging.Filter):
+    def __init__(self, session: str):
+        super().__init__()
+        self.session = session
+
+    def filter(self, record):
+        return _current_session.get() == self.session
+
+
+def load_manifest(manifest_file: str) -> Dict:
+    """
+    Loads a batch manifest. Sessions with a count expand to session-1 ... session-N and
+    every variable listed in index_vars is offset by the index, e.g. vlan: 3100 becomes 3101, 3102 ...
+    """
+    import yaml
+
+    manifest_file = utils.absolute_path(manifest_file)
+
+    with open(manifest_file, 'r') as stream:
+        manifest = yaml.load(stream, Loader=yaml.SafeLoader) or {}
+
+    if not isinstance(manifest.get('sessions'), list) or not manifest['sessions']:
+        raise ParseConfigException(f"batch manifest {manifest_file} must have a non empty list of sessions")
+
+    base_dir = os.path.dirname(manifest_file)
+    sessions: List[BatchSession] = []
+
+    for entry in manifest['sessions']:
+        if 'session' not in entry or 'config_dir' not in entry:
+            raise ParseConfigException(f"batch manifest entry {entry} must have a session and a config_dir")
+
+        config_dir = utils.absolute_path(os.path.join(base_dir, os.path.expanduser(entry['config_dir'])))
+        var_dict = {}
+
+        if entry.get('var_file'):
+            var_dict.update(utils.load_vars(os.path.join(base_dir, os.path.expanduser(entry['var_file']))))
+
+        var_dict.update(entry.get('vars', {}))
+        count = entry.get('count')
+
+        if count is None:
+            sessions.append(BatchSession(session=entry['session'], config_dir=config_dir, var_dict=var_dict))
+            continue
+
+        for i in range(1, int(count) + 1):
+            temp = dict(var_dict)
+
+            for var in entry.get('index_vars', []):
+                if var not in temp:
+                    raise ParseConfigException(f"index var {var} for session {entry['session']} has no value")
+
+                temp[var] = int(temp[var]) + i
+
+            sessions.append(BatchSession(session=f"{entry['session']}-{i}", config_dir=config_dir, var_dict=temp))
+
+    names = [s.session for s in sessions]
+
+    if len(names) != len(set(names)):
+        raise ParseConfigException(f"batch manifest {manifest_file} has duplicate session names")
+
+    manifest['sessions'] = sessions
+    manifest['results_dir'] = utils.absolute_path(os.path.join(base_dir,
+                                                               os.path.expanduser(manifest.get('results_dir', '.'))))
+    return manifest
+
+
+def fabric_config_key(batch_session: BatchSession) -> Union[frozenset, None]:
+    """
+    Returns the FABRIC settings of a session, after merging the credential file profile, or None if the session
+    has no FABRIC provider. FABRIC is configured through os.environ and fablib module globals, so sessions with
+    different keys cannot run at the same time.
+    """
+    from fabfed.provider.fabric.fabric_constants import FABRIC_CM_HOST, FABRIC_OC_HOST, FABRIC_PROJECT_ID, \
+        FABRIC_BASTION_HOST, FAB_CONF_ATTRS
+    from fabfed.util.config import WorkflowConfig
+    from fabfed.util.constants import Constants
+
+    config = WorkflowConfig.parse(dir_path=batch_session.config_dir, var_dict=batch_session.var_dict)
+    keys = set()
+
+    for provider_config in config.get_provider_configs():
+        if provider_config.type != 'fabric':
+            continue
+
+        attributes = dict(provider_config.attributes)
+        credential_file = attributes.get(Constants.CREDENTIAL_FILE)
+
+        if credential_file:
+            attributes.update(utils.load_credentials(credential_file).get(attributes.get(Constants.PROFILE), {}))
+
+        attrs = [FABRIC_CM_HOST, FABRIC_OC_HOST, FABRIC_PROJECT_ID, FABRIC_BASTION_HOST] + FAB_CONF_ATTRS
+        keys.add(tuple(str(attributes.get(attr)) for attr in attrs))
+
+    return frozenset(keys) if keys else None
+
+
+class _FabricGate:
+    """
+    Lets any number of sessions with the same FABRIC settings run together and holds back sessions with
+    different settings until they are done.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._key = None
+        self._count = 0
+
+    def acquire(self, key):
+        with self._condition:
+            self._condition.wait_for(lambda: self._key is None or self._key == key)
+            self._key = key
+            self._count += 1
+
+    def release(self):
+        with self._condition:
+            self._count -= 1
+
+            if self._count == 0:
+                self._key = None
+                self._condition.notify_all()
+
+
+class BatchRunner:
+    """
+    Runs the sessions of a batch manifest in one process. The stitching policy and credential files are loaded
+    once and the provider SDK clients are shared. Each session has its own provider factory and state, and
+    its log, stats and show output go to <results_dir>/<session>, the layout used by perf/fabfed_stats.py.
+    FABRIC settings are process wide, so sessions whose FABRIC settings differ run one at a time.
+    """
+
+    def __init__(self, *, manifest: Dict, concurrency: Union[int, None] = None,
+                 logger: Union[logging.Logger, None] = None):
+        self.manifest = manifest
+        self.sessions: List[BatchSession] = manifest['sessions']
+        self.results_dir = manifest['results_dir']
+        self.concurrency = concurrency or manifest.get('concurrency') or len(self.sessions)
+        self.use_remote_policy = manifest.get('use_remote_policy', False)
+        self.logger = logger or utils.get_logger()
+        self.policy = None
+        self.fabric_gate = _FabricGate()
+
+    def load_policy(self):
+        if self.policy is not None:
+            return self.policy
+
+        if self.use_remote_policy and not self.manifest.get('policy_file'):
+            from fabfed.policy.policy_helper import load_remote_policy
+
+            attrs = {'credential_file': self.manifest.get('credential_file', '~/.fabfed/fabfed_credentials.yml'),
+                     'profile': self.manifest.get('profile', 'fabric')}
+            ProviderFactory().init_provider(type='fabric', label='no_label', name='no_name',
+                                            attributes=attrs, logger=self.logger)
+            self.policy = load_remote_policy()
+        else:
+            from fabfed.policy.policy_helper import load_policy
+
+            policy_file = self.manifest.get('policy_file')
+            self.policy = load_policy(policy_file=policy_file, load_details=False) if policy_file else load_policy()
+
+        return self.policy
+
+    def _run_session(self, batch_session: BatchSession, action: str) -> BatchResult:
+        session = batch_session.session
+        session_dir = os.path.join(self.results_dir, session)
+        os.makedirs(session_dir, exist_ok=True)
+        _current_session.set(session)
+
+        handler = logging.FileHandler(os.path.join(session_dir, f"fabfed-{action}.log"), mode='w')
+        handler.setFormatter(utils.get_formatter())
+        handler.addFilter(_SessionFilter(session))
+        self.logger.addHandler(handler)
+        start = time.time()
+        fabric_key = None
+
+        try:
+            fabric_key = fabric_config_key(batch_session)
+
+            if fabric_key:
+                self.fabric_gate.acquire(fabric_key)
+                start = time.time()
+
+            workflow = apply_workflow if action == 'apply' else destroy_workflow
+            rc = workflow(session=session,
+                          config_dir=batch_session.config_dir,
+                          var_dict=batch_session.var_dict,
+                          policy=self.policy,
+                          use_remote_policy=self.use_remote_policy,
+                          provider_factory=ProviderFactory(),
+                          logger=self.logger)
+        except Exception as e:
+            self.logger.error(f"Exception while running {action} for session {session} ... {e}", exc_info=True)
+            rc = 1
+        finally:
+            if fabric_key:
+                self.fabric_gate.release()
+
+            self.logger.removeHandler(handler)
+            handler.close()
+
+        duration = time.time() - start
+
+        # A workflow that failed before saving its stats still gets a stats file so each session has one per action.
+        with open(os.path.join(session_dir, f"stats-{action}.yml"), 'w') as stream:
+            sutil.dump_stats(sutil.load_stats(session) or dict(stats=None), False, stream=stream)
+
+        with open(os.path.join(session_dir, f"show-{action}.yml"), 'w') as stream:
+            states = (lambda: sutil.iter_states(session)) if session in sutil.load_sessions() else []
+            sutil.dump_states(states, False, stream=stream)
+
+        return BatchResult(session=session, rc=rc, duration=duration)
+
+    def run(self, action: str) -> List[BatchResult]:
+        self.load_policy()
+        os.makedirs(self.results_dir, exist_ok=True)
+        self.logger.info(f"Running {action} for {len(self.sessions)} session(s) using concurrency={self.concurrency}")
+        start = time.time()
+
+        with utils.ContextThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self._run_session, s, action)
+                       for s in self.sessions]
+            results = [f.result() for f in futures]
+
+        self.save_summary(action, results, time.time() - start)
+        return results
+
+    def save_summary(self, action: str, results: List[BatchResult], duration: float):
+        import statistics
+        import yaml
+
+        provider_durations: Dict[str, List[float]] = {}
+        workflow_durations = []
+        sessions = []
+
+        for result in results:
+            stats = sutil.load_stats(result.session)
+            entry = dict(session=result.session, rc=result.rc, duration=result.duration)
+
+            if stats:
+                stats = stats['stats']
+                entry['has_failures'] = stats['has_failures']
+                workflow_durations.append(stats['workflow_duration']['duration'])
+
+                for provider_stats in stats['provider_stats']:
+                    provider_durations.setdefault(provider_stats['provider'], []).append(
+                        provider_stats['provider_duration']['duration'])
+
+            sessions.append(entry)
+
+        def to_summary(numbers):
+            return dict(min=min(numbers), max=max(numbers),
+                        median=statistics.median(numbers), mean=statistics.mean(numbers))
+
+        summary = dict(comment="all durations are in seconds",
+                       action=action,
+                       concurrency=self.concurrency,
+                       batch_duration=duration,
+                       failed=len([r for r in results if r.rc != 0]),
+                       sessions=sessions)
+
+        if workflow_durations:
+            summary['workflow_duration'] = to_summary(workflow_durations)
+
+        summary['provider_durations'] = {k: to_summary(v) for k, v in provider_durations.items()}
+
+        with open(os.path.join(self.results_dir, f"batch-{action}.yml"), 'w') as stream:
+            yaml.dump(summary, stream, Dumper=yaml.SafeDumper, default_flow_style=False, sort_keys=False)
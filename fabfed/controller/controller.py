@@ -2,14 +2,14 @@ import logging
 from typing import List, Union, Dict
 
 from fabfed.exceptions import ControllerException
-from fabfed.model.state import ResourceState, ProviderState
+from fabfed.model.state import ProviderState, StateIndex
 from fabfed.util.config import WorkflowConfig
 from .helper import ControllerResourceListener, partition_layer3_config
 from fabfed.policy.policy_helper import ProviderPolicy
 from .provider_factory import ProviderFactory
 from ..util.constants import Constants
 from ..util.config_models import ResourceConfig
-from ..util.stats import ProviderStats, Duration, Stages
+from ..util.stats import ProviderStats, Duration, Stages, ResourceStats
 from fabfed.util.utils import get_logger
 
 
@@ -17,15 +17,14 @@ class Controller:
     def __init__(self, *, config: WorkflowConfig, logger: Union[logging.Logger, None] = None,
                  policy: Union[Dict[str, ProviderPolicy], None] = None,
                  use_local_policy=True):
-        import copy
-
-        self.config = copy.deepcopy(config)
+        self.config = config.overlay()
         self.logger = logger or get_logger()
         self.provider_factory: Union[ProviderFactory, None] = None
         self.resources: List[ResourceConfig] = []
         self.policy = policy
         self.use_local_policy = use_local_policy
         self.resource_listener = ControllerResourceListener()
+        self.state_index: Union[StateIndex, None] = None
 
     def init(self, *, session: str, provider_factory: ProviderFactory, provider_states: List[ProviderState]):
         init_provider_map: Dict[str, bool] = dict()
@@ -142,11 +141,8 @@ class Controller:
                 peering_list = [peering_list]
 
             for peering in peering_list:
-                if Constants.LABELS not in peering.attributes:
-                    peering.attributes[Constants.LABELS] = []
-
-                peering.attributes[Constants.LABELS].append(network.label)
-                peering.attributes[Constants.LABELS] = sorted(peering.attributes["labels"])
+                labels = peering.attributes.get(Constants.LABELS, [])
+                peering.attributes[Constants.LABELS] = sorted(labels + [network.label])
 
                 if Constants.RES_SECURITY not in peering.attributes:
                     from fabfed.util.utils import generate_bgp_key_if_needed
@@ -188,7 +184,7 @@ class Controller:
 
     def plan(self, provider_states: List[ProviderState]):
         resources = self.resources
-        resource_state_map = Controller._build_state_map(provider_states)
+        resource_state_map = self.get_state_index(provider_states)
         self.logger.info(f"Starting PLAN_PHASE for {len(resources)} resource(s)")
         pf = self.provider_factory
         resources_labels = [r.label for r in resources]
@@ -218,8 +214,7 @@ class Controller:
         for state_label, states in resource_state_map.items():
             if state_label not in resources_labels:
                 state = states[0]
-                resource_dict = state.attributes.copy()
-                provider_state = resource_dict.pop(Constants.PROVIDER_STATE)
+                provider_state = resource_state_map.provider_state_of(state)
                 provider = pf.get_provider(label=provider_state.label)
 
                 import copy
@@ -275,7 +270,7 @@ class Controller:
             raise ControllerException(exceptions)
 
         exceptions = []
-        resource_state_map = Controller._build_state_map(provider_states)
+        resource_state_map = self.get_state_index(provider_states)
         for resource in resources:
             label = resource.provider.label
             provider = self.provider_factory.get_provider(label=label)
@@ -295,7 +290,7 @@ class Controller:
     def apply(self, provider_states: List[ProviderState]):
         resources = self.resources
         self.logger.info(f"Starting APPLY_PHASE for {len(resources)} resource(s)")
-        resource_state_map = Controller._build_state_map(provider_states)
+        resource_state_map = self.get_state_index(provider_states)
         exceptions = []
 
         create_and_wait_resource_labels = set()
@@ -397,26 +392,15 @@ class Controller:
         if exceptions:
             raise ControllerException(exceptions)
 
-    @staticmethod
-    def _build_state_map(provider_states: List[ProviderState]) -> Dict[str, List[ResourceState]]:
-        resource_state_map = dict()
-
-        for provider_state in provider_states:
-            temp_list = provider_state.states()
-
-            for state in temp_list:
-                state.attributes[Constants.PROVIDER_STATE] = provider_state
-
-                if state.label in resource_state_map:
-                    resource_state_map[state.label].append(state)
-                else:
-                    resource_state_map[state.label] = [state]
+    def get_state_index(self, provider_states: List[ProviderState]) -> StateIndex:
+        if self.state_index is None or self.state_index.provider_states is not provider_states:
+            self.state_index = StateIndex(provider_states)
 
-        return resource_state_map
+        return self.state_index
 
     def destroy(self, *, provider_states: List[ProviderState]):
         exceptions = []
-        resource_state_map = Controller._build_state_map(provider_states)
+        resource_state_map = self.get_state_index(provider_states)
         provider_resource_map = dict()
         failed_resources = []
 
@@ -441,6 +425,7 @@ class Controller:
                 resource.attributes[Constants.SAVED_STATES] = resource_state_map[resource.label]
 
         remaining_resources = list()
+        deferred_resources = list()
         skip_resources = set()
 
         for resource in temp:
@@ -459,12 +444,26 @@ class Controller:
 
             try:
                 provider.delete_resource(resource=resource.attributes)
+
+                if resource.label in provider.deferred_deletes:
+                    deferred_resources.append(resource)
+                else:
+                    resource_state_map.remove(resource.label)
             except Exception as e:
                 self.logger.warning(f"Exception occurred while deleting resource: {e} using {provider_label}", exc_info=True)
                 remaining_resources.append(resource)
                 skip_resources.update([external_state.label for external_state in external_states])
                 exceptions.append(e)
 
+        for resource in deferred_resources:
+            provider = self.provider_factory.get_provider(label=resource.provider.label)
+
+            if resource.label in provider.deferred_deletes:
+                self.logger.warning(f"Resource {resource} was not deleted using {resource.provider.label}")
+                remaining_resources.append(resource)
+            else:
+                resource_state_map.remove(resource.label)
+
         if not remaining_resources:
             provider_states.clear()
             return
@@ -517,7 +516,12 @@ class Controller:
                                  provider_duration=total_duration,
                                  has_failures=len(provider.failed) > 0,
                                  has_pending=len(provider.pending) > 0,
-                                 stages=stages)
+                                 stages=stages,
+                                 resource_stats=[ResourceStats(label=label,
+                                                               duration=stats['duration'],
+                                                               invocations=stats['invocations'],
+                                                               failure=provider.failed.get(label))
+                                                 for label, stats in provider.resource_stats.items()])
             provider_stats.append(temp)
 
         return provider_stats
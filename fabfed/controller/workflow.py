@@ -0,0 +1,204 @@
+import logging
+import time
+from typing import Dict, Union
+
+from fabfed.controller.controller import Controller
+from fabfed.controller.provider_factory import ProviderFactory, default_provider_factory
+from fabfed.exceptions import ControllerException
+from fabfed.util import utils
+from fabfed.util import state as sutil
+from fabfed.util.config import WorkflowConfig
+from fabfed.util.stats import FabfedStats, Duration
+from fabfed.util.constants import Constants
+
+
+def apply_workflow(*, session: str, config_dir: str, var_dict: Dict, policy=None, use_remote_policy=False,
+                   provider_factory: Union[ProviderFactory, None] = None,
+                   logger: Union[logging.Logger, None] = None) -> int:
+    logger = logger or utils.get_logger()
+    provider_factory = provider_factory or default_provider_factory
+    sutil.save_meta_data(dict(config_dir=config_dir), session)
+    sutil.delete_stats(session)
+
+    start = time.time()
+    config = WorkflowConfig.parse(dir_path=config_dir, var_dict=var_dict)
+    parse_and_validate_config_duration = time.time() - start
+    controller_duration_start = time.time()
+
+    try:
+        controller = Controller(config=config,
+                                logger=logger,
+                                policy=policy,
+                                use_local_policy=not use_remote_policy)
+    except Exception as e:
+        logger.error(f"Exceptions while initializing controller .... {e}", exc_info=True)
+        return 1
+
+    states = sutil.load_states(session)
+
+    try:
+        controller.init(session=session, provider_factory=provider_factory, provider_states=states)
+    except Exception as e:
+        logger.error(f"Exceptions while initializing providers  .... {e}", exc_info=True)
+        return 1
+
+    try:
+        controller.plan(provider_states=states)
+    except Exception as e:
+        logger.error(f"Exception while planning ... {e}")
+        return 1
+    except KeyboardInterrupt as kie:
+        logger.error(f"Keyboard Interrupt while planning ... {kie}")
+        return 1
+
+    try:
+        controller.add(provider_states=states)
+    except Exception as e:
+        logger.error(f"Exception while adding ... {e}")
+        return 1
+    except KeyboardInterrupt as kie:
+        logger.error(f"Keyboard Interrupt while adding  resources ... {kie}")
+        return 1
+
+    workflow_failed = False
+
+    try:
+        controller.apply(provider_states=states)
+    except KeyboardInterrupt as kie:
+        logger.error(f"Keyboard Interrupt while creating resources ... {kie}")
+        workflow_failed = True
+    except ControllerException as ce:
+        logger.error(f"Exceptions while creating resources ... {ce}")
+        workflow_failed = True
+    except Exception as e:
+        logger.error(f"Unknown error while creating resources ... {e}")
+        workflow_failed = True
+
+    controller_duration = time.time() - controller_duration_start
+    providers_duration = 0
+
+    for stats in controller.get_stats():
+        logger.debug(f"STATS:provider={stats.provider}, provider_duration={stats.provider_duration}")
+        controller_duration -= stats.provider_duration.duration
+        providers_duration += stats.provider_duration.duration
+
+    states = controller.get_states()
+    nodes, networks, services, pending, failed = utils.get_counters(states=states)
+    workflow_failed = workflow_failed or pending or failed
+
+    if Constants.RECONCILE_STATES:
+        states = sutil.reconcile_states(states, session, controller.state_index.saved_states_map())
+
+    sutil.save_states(states, session)
+    provider_stats = controller.get_stats()
+    workflow_duration = time.time() - start
+    workflow_duration = Duration(duration=workflow_duration,
+                                 comment="total time spent in creating workflow")
+    controller_duration = Duration(duration=controller_duration,
+                                   comment="time spent in controller. It does not include time spent in providers")
+    providers_duration = Duration(duration=providers_duration,
+                                  comment="time spent in all providers")
+    validate_config_duration = Duration(duration=parse_and_validate_config_duration,
+                                        comment="time spent in parsing and validating config")
+
+    fabfed_stats = FabfedStats(action="apply",
+                               has_failures=workflow_failed,
+                               workflow_duration=workflow_duration,
+                               workflow_config=validate_config_duration,
+                               controller=controller_duration,
+                               providers=providers_duration,
+                               provider_stats=provider_stats)
+    logger.info(f"STATS:duration_in_seconds={workflow_duration}")
+    logger.info(f"nodes={nodes}, networks={networks}, services={services}, pending={pending}, failed={failed}")
+    sutil.save_stats(dict(comment="all durations are in seconds", stats=fabfed_stats), session)
+    _record_run(session=session, fabfed_stats=fabfed_stats, logger=logger)
+    return 1 if workflow_failed else 0
+
+
+def destroy_workflow(*, session: str, config_dir: str, var_dict: Dict, policy=None, use_remote_policy=False,
+                     provider_factory: Union[ProviderFactory, None] = None,
+                     logger: Union[logging.Logger, None] = None) -> int:
+    logger = logger or utils.get_logger()
+    provider_factory = provider_factory or default_provider_factory
+    sutil.delete_stats(session)
+
+    if session not in sutil.load_sessions():
+        return 0
+
+    states = sutil.load_states(session)
+
+    if not states:
+        sutil.destroy_session(session)
+        return 0
+
+    start = time.time()
+    config = WorkflowConfig.parse(dir_path=config_dir, var_dict=var_dict)
+    parse_and_validate_config_duration = time.time() - start
+    controller_duration_start = time.time()
+
+    try:
+        controller = Controller(config=config,
+                                logger=logger,
+                                policy=policy,
+                                use_local_policy=not use_remote_policy)
+        controller.init(session=session, provider_factory=provider_factory, provider_states=states)
+    except Exception as e:
+        logger.error(f"Exceptions while initializing controller .... {e}")
+        return 1
+
+    destroy_failed = False
+
+    try:
+        controller.destroy(provider_states=states)
+    except ControllerException as e:
+        logger.error(f"Exceptions while deleting resources ...{e}")
+        destroy_failed = True
+    except KeyboardInterrupt as kie:
+        logger.error(f"Keyboard Interrupt while deleting resources ... {kie}")
+        return 1
+
+    controller_duration = time.time() - controller_duration_start
+    providers_duration = 0
+
+    for stats in controller.get_stats():
+        logger.info(f"STATS:provider={stats.provider}, provider_duration={stats.provider_duration}")
+        controller_duration -= stats.provider_duration.duration
+        providers_duration += stats.provider_duration.duration
+
+    if not states:
+        logger.info(f"Destroying session {session} ...")
+        sutil.destroy_session(session)
+    else:
+        sutil.save_states(states, session)
+
+    end = time.time()
+    workflow_duration = end - start
+    workflow_duration = Duration(duration=workflow_duration,
+                                 comment="total time spent in destroying workflow")
+    controller_duration = Duration(duration=controller_duration,
+                                   comment="time spent in controller. It does not include time spent in providers")
+    providers_duration = Duration(duration=providers_duration, comment="time spent in all providers")
+    validate_config_duration = Duration(duration=parse_and_validate_config_duration,
+                                        comment="time spent in parsing and validating config")
+
+    provider_stats = controller.get_stats()
+    fabfed_stats = FabfedStats(action="destroy",
+                               has_failures=len(states) > 0,
+                               workflow_duration=workflow_duration,
+                               workflow_config=validate_config_duration,
+                               controller=controller_duration,
+                               providers=providers_duration,
+                               provider_stats=provider_stats)
+    logger.info(f"STATS:duration_in_seconds={workflow_duration}")
+    sutil.save_stats(dict(comment="all durations are in seconds", stats=fabfed_stats), session)
+    _record_run(session=session, fabfed_stats=fabfed_stats, logger=logger)
+    return 1 if destroy_failed else 0
+
+
+def _record_run(*, session: str, fabfed_stats: FabfedStats, logger: logging.Logger):
+    from fabfed.util.history import record_run
+
+    try:
+        record_run(session, fabfed_stats)
+    except Exception as e:
+        logger.warning(f"Could not record the run history of session {session}: {e}")
@@ -38,13 +38,7 @@ class FabfedManager:
         self.sessions: List[Any] = list()
 
     def _load_sessions(self):
-        import os
-        from pathlib import Path
-
-        base_dir = os.path.join(str(Path.home()), '.fabfed', 'sessions')
-        os.makedirs(base_dir, exist_ok=True)
-        sessions = os.listdir(base_dir)
-        self.sessions = [dict(session=s, config_dir=sutil.load_meta_data(s, 'config_dir')) for s in sessions]
+        self.sessions = list(sutil.load_catalog().values())
 
     def _delete_session_if_empty(self, *, session):
         self.provider_states = sutil.load_states(session)
@@ -69,11 +63,11 @@ class FabfedManager:
         config = WorkflowConfig.parse(dir_path=self.config_dir, var_dict=self.var_dict)
         return config
 
-    def plan(self, *, session: str, to_json: bool = False, summary: bool = True):
+    def plan(self, *, session: str, to_json: bool = False, summary: bool = True, ndjson: bool = False):
         self._init_controller(session=session)
         self.controller.plan(provider_states=self.provider_states)
         resources = self.controller.resources
-        cr, dl = sutil.dump_plan(resources=resources, to_json=to_json, summary=summary)
+        cr, dl = sutil.dump_plan(resources=resources, to_json=to_json, summary=summary, ndjson=ndjson)
 
         logger.warning(f"Applying this plan would create {cr} resource(s) and destroy {dl} resource(s)")
         self._delete_session_if_empty(session=session)
@@ -102,16 +96,17 @@ class FabfedManager:
         self.provider_states = self.controller.get_states()
         nodes, networks, services, pending, failed = utils.get_counters(states=self.provider_states)
         workflow_failed = workflow_failed or pending or failed
-        self.provider_states = sutil.reconcile_states(self.provider_states, session)
+        saved_states_map = self.controller.state_index.saved_states_map()
+        self.provider_states = sutil.reconcile_states(self.provider_states, session, saved_states_map)
         sutil.save_states(self.provider_states, session)
         logger.info(f"nodes={nodes}, networks={networks}, services={services}, pending={pending}, failed={failed}")
         return 1 if workflow_failed else 0
 
-    def show(self, *, session: str, to_json: bool = False, summary: bool = True):
+    def show(self, *, session: str, to_json: bool = False, summary: bool = True, ndjson: bool = False):
         self._load_sessions()
         session_names = [session_meta['session'] for session_meta in self.sessions]
         self.provider_states = sutil.load_states(session) if session in session_names else []
-        sutil.dump_states(self.provider_states, to_json, summary)
+        sutil.dump_states(self.provider_states, to_json, summary, ndjson=ndjson)
         self._delete_session_if_empty(session=session)
 
     def stitch_info(self, session: str, to_json: bool = False, summary: bool = True):
@@ -199,8 +194,8 @@ class FabfedManager:
 
         return 1 if destroy_failed else 0
 
-    def show_sessions(self, *, to_json: bool = False):
-        self.sessions = utils.dump_sessions(to_json)
+    def show_sessions(self, *, to_json: bool = False, config_dir: str = None, failed: bool = False):
+        self.sessions = utils.dump_sessions(to_json, config_dir=config_dir, failed=failed)
 
     def show_available_stitch_ports(self, *, from_provider, to_provider):
         from fabfed.policy.policy_helper import load_policy
@@ -65,47 +65,51 @@ class ProviderState(BaseState):
         self.pending_internal = pending_internal
         self.failed = failed
         self.creation_details = creation_details
+        self._index = set()
+        self._index_key = None
 
-    def add_if_not_found(self, resource_state: ResourceState):
-        from typing import cast
-        assert resource_state.type in [Constants.RES_TYPE_NODE,
-                                       Constants.RES_TYPE_NETWORK,
-                                       Constants.RES_TYPE_SERVICE]
+    def _keys(self) -> set:
+        # The state lists are public and get mutated (e.g. cleared) or reassigned directly, so the index is keyed
+        # on the lists themselves and their sizes and rebuilt whenever one of them no longer matches.
+        lists = (self.network_states, self.node_states, self.service_states)
+        key = self._index_key
 
-        def exists(state, states: list):
-            temp = next(filter(lambda s: s.label == state.label and s.name == state.name, states), None)
+        if key is None or any(a is not b or len(a) != n for a, (b, n) in zip(lists, key)):
+            self._index = {(s.label, s.name) for s in self.states()}
+            self._index_key = [(a, len(a)) for a in lists]
 
-            return temp is not None
+        return self._index
 
-        if exists(resource_state, self.states()):
-            return
+    def _append(self, resource_state: ResourceState):
+        keys = self._keys()
 
         if resource_state.is_node_state:
-            self.node_states.append(cast(NodeState, resource_state))
+            states = self.node_states
         elif resource_state.is_network_state:
-            self.network_states.append(cast(NetworkState, resource_state))
-        elif resource_state.is_service_state:
-            self.service_states.append(cast(ServiceState, resource_state))
+            states = self.network_states
+        else:
+            states = self.service_states
 
-    def add(self, resource_state: ResourceState):
-        from typing import cast
+        states.append(resource_state)
+        keys.add((resource_state.label, resource_state.name))
+        self._index_key = [(a, len(a)) for a in (self.network_states, self.node_states, self.service_states)]
+
+    def add_if_not_found(self, resource_state: ResourceState):
         assert resource_state.type in [Constants.RES_TYPE_NODE,
                                        Constants.RES_TYPE_NETWORK,
                                        Constants.RES_TYPE_SERVICE]
 
-        def exists(state, states: list):
-            temp = next(filter(lambda s: s.label == state.label and s.name == state.name, states), None)
-
-            return temp is not None
+        if (resource_state.label, resource_state.name) in self._keys():
+            return
 
-        assert not exists(resource_state, self.states())
+        self._append(resource_state)
 
-        if resource_state.is_node_state:
-            self.node_states.append(cast(NodeState, resource_state))
-        elif resource_state.is_network_state:
-            self.network_states.append(cast(NetworkState, resource_state))
-        elif resource_state.is_service_state:
-            self.service_states.append(cast(ServiceState, resource_state))
+    def add(self, resource_state: ResourceState):
+        assert resource_state.type in [Constants.RES_TYPE_NODE,
+                                       Constants.RES_TYPE_NETWORK,
+                                       Constants.RES_TYPE_SERVICE]
+        assert (resource_state.label, resource_state.name) not in self._keys()
+        self._append(resource_state)
 
     def add_all(self, resource_states: List[ResourceState]):
         for resource_state in resource_states:
@@ -143,6 +147,46 @@ class ProviderState(BaseState):
         return count
 
 
+class StateIndex:
+    """
+    The saved resource states of a session indexed by resource label. It is built once per run and shared by the
+    controller phases and reconcile_states, and updated as resources are deleted. States of resources created
+    during the run are not added since they are not saved states yet.
+    """
+
+    def __init__(self, provider_states: List[ProviderState]):
+        self.provider_states = provider_states
+        self._states: Dict[str, List[ResourceState]] = {}
+        self._provider_states: Dict[tuple, ProviderState] = {}
+
+        for provider_state in provider_states:
+            for state in provider_state.states():
+                self._add(provider_state, state)
+
+    def _add(self, provider_state: ProviderState, state: ResourceState):
+        self._states.setdefault(state.label, []).append(state)
+        self._provider_states[(state.label, state.name)] = provider_state
+
+    def remove(self, label: str):
+        for state in self._states.pop(label, []):
+            self._provider_states.pop((state.label, state.name), None)
+
+    def provider_state_of(self, state: ResourceState) -> ProviderState:
+        return self._provider_states[(state.label, state.name)]
+
+    def saved_states_map(self) -> Dict[str, ProviderState]:
+        return {provider_state.label: provider_state for provider_state in self.provider_states}
+
+    def items(self):
+        return self._states.items()
+
+    def __contains__(self, label: str):
+        return label in self._states
+
+    def __getitem__(self, label: str) -> List[ResourceState]:
+        return self._states[label]
+
+
 def provider_constructor(loader: yaml.SafeLoader, node: yaml.nodes.MappingNode) -> ProviderState:
     return ProviderState(**loader.construct_mapping(node))
 
@@ -243,50 +287,165 @@ def service_representer(dumper: yaml.SafeDumper, service_state: ServiceState) ->
     })
 
 
+def named_tuple_mapping(data) -> Dict:
+    if isinstance(data, DependencyInfo):
+        return dict(dependency_info=dict(resource=str(data.resource),
+                                         attribute=data.attribute))
+    elif isinstance(data, Dependency):
+        return dict(dependency=dict(resource=str(data.resource),
+                                    key=data.key,
+                                    is_external=data.is_external,
+                                    attribute=data.attribute))
+    elif isinstance(data, ResolvedDependency):
+        return dict(resolved_dependency=dict(resource_label=data.resource_label,
+                                             attribute=data.attr,
+                                             value=str(data.value)))
+
+    # StitchInfo, the stats tuples and any other namedtuple are written field by field.
+    return data._asdict()
+
+
 def named_tuple(self, data):
     if hasattr(data, '_asdict'):
-        if isinstance(data, DependencyInfo):
-            data = dict(dependency_info=dict(resource=str(data.resource),
-                                             attribute=data.attribute))
-        elif isinstance(data, Dependency):
-            data = dict(dependency=dict(resource=str(data.resource),
-                                        key=data.key,
-                                        is_external=data.is_external,
-                                        attribute=data.attribute))
-        elif isinstance(data, ResolvedDependency):
-            data = dict(resolved_dependency=dict(resource_label=data.resource_label,
-                                                 attribute=data.attr,
-                                                 value=str(data.value)))
-        else:
-            data = data._asdict()
-
-        return self.represent_dict(data)
+        return self.represent_dict(named_tuple_mapping(data))
 
     return self.represent_list(data)
 
 
-def get_loader():
-    loader = yaml.SafeLoader
-    loader.add_constructor("!NetworkState", network_constructor)
-    loader.add_constructor("!ProviderState", provider_constructor)
-    loader.add_constructor("!NodeState", node_constructor)
-    loader.add_constructor("!ServiceState", service_constructor)
-    loader.add_constructor("!ResourceConfig", resource_config_constructor)
-    loader.add_constructor("!ProviderConfig", provider_config_constructor)
-    loader.add_constructor("!BaseConfig", base_config_constructor)
-    loader.add_constructor("!Config", config_constructor)
+def json_default(obj):
+    """
+    Serializes what the json encoders do not handle natively. The states are written with their public fields only.
+    Namedtuples stay arrays as they always were in json, see json_values.
+    """
+    if isinstance(obj, ProviderState):
+        return {
+            "type": obj.type,
+            "label": obj.label,
+            "attributes": obj.attributes,
+            "network_states": obj.network_states,
+            "node_states": obj.node_states,
+            "service_states": obj.service_states,
+            "pending": obj.pending,
+            "pending_internal": obj.pending_internal,
+            "failed": obj.failed,
+            "creation_details": obj.creation_details
+        }
+
+    if isinstance(obj, ResourceState):
+        return {"type": obj.type, "label": obj.label, "attributes": obj.attributes}
+
+    if hasattr(obj, '_asdict'):
+        return json_values(obj)
+
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+
+    return obj.__dict__
+
+
+def json_values(data) -> List:
+    """
+    The values of a namedtuple as a json array. The resource a dependency refers to is written by name, as in yaml,
+    instead of the whole resource config.
+    """
+    if isinstance(data, (Dependency, DependencyInfo)):
+        return [str(v) if field == 'resource' else v for field, v in zip(data._fields, data)]
+
+    return list(data)
+
+
+def json_ready(obj):
+    """
+    Replaces the namedtuples nested in obj by their json_values. The stdlib json encoder writes tuples as arrays
+    without ever handing them to json_default.
+    """
+    if isinstance(obj, tuple):
+        if hasattr(obj, '_asdict'):
+            return json_ready(json_values(obj))
+
+        return [json_ready(o) for o in obj]
+
+    if isinstance(obj, dict):
+        return {k: json_ready(v) for k, v in obj.items()}
+
+    if isinstance(obj, list):
+        return [json_ready(o) for o in obj]
+
+    return obj
+
+
+_CONSTRUCTORS = {
+    "!NetworkState": network_constructor,
+    "!ProviderState": provider_constructor,
+    "!NodeState": node_constructor,
+    "!ServiceState": service_constructor,
+    "!ResourceConfig": resource_config_constructor,
+    "!ProviderConfig": provider_config_constructor,
+    "!BaseConfig": base_config_constructor,
+    "!Config": config_constructor
+}
+
+_REPRESENTERS = {
+    NetworkState: network_representer,
+    ProviderState: provider_representer,
+    NodeState: node_representer,
+    ServiceState: service_representer,
+    ResourceConfig: resource_config_representer,
+    ProviderConfig: provider_config_representer,
+    Config: config_representer,
+    BaseConfig: base_config_representer
+}
+
+
+def _register_constructors(loader):
+    for tag, constructor in _CONSTRUCTORS.items():
+        loader.add_constructor(tag, constructor)
+
     return loader
 
 
+def _register_representers(dumper):
+    for data_type, representer in _REPRESENTERS.items():
+        dumper.add_representer(data_type, representer)
+
+    dumper.add_multi_representer(tuple, named_tuple)
+    return dumper
+
+
+@_register_constructors
+class StateLoader(yaml.SafeLoader):
+    """
+    A SafeLoader with the fabfed tags registered. yaml.SafeLoader itself is left untouched.
+    """
+    pass
+
+
+@_register_representers
+class StateDumper(yaml.SafeDumper):
+    pass
+
+
+if yaml.__with_libyaml__:
+    @_register_constructors
+    class CStateLoader(yaml.CSafeLoader):
+        pass
+
+    @_register_representers
+    class CStateDumper(yaml.CSafeDumper):
+        def __init__(self, stream, width=None, **kwargs):
+            # libyaml only takes an int width. Its largest value matches width=inf of the pure python emitter.
+            if width == float("inf"):
+                width = 2 ** 31 - 1
+
+            super().__init__(stream, width=width, **kwargs)
+else:
+    CStateLoader = StateLoader
+    CStateDumper = StateDumper
+
+
+def get_loader():
+    return CStateLoader
+
+
 def get_dumper():
-    safe_dumper = yaml.SafeDumper
-    safe_dumper.add_representer(NetworkState, network_representer)
-    safe_dumper.add_representer(ProviderState, provider_representer)
-    safe_dumper.add_representer(NodeState, node_representer)
-    safe_dumper.add_representer(ServiceState, service_representer)
-    safe_dumper.add_representer(ResourceConfig, resource_config_representer)
-    safe_dumper.add_representer(ProviderConfig, provider_config_representer)
-    safe_dumper.add_representer(Config, config_representer)
-    safe_dumper.add_representer(BaseConfig, base_config_representer)
-    safe_dumper.yaml_multi_representers[tuple] = named_tuple
-    return safe_dumper
+    return CStateDumper
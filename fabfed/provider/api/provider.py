@@ -28,11 +28,15 @@ class Provider(ABC):
         self.creation_details = {}
         self._added = []
         self.pending_internal = []
+        self._deferred_deletes = set()
 
         self.add_duration = self.create_duration = self.delete_duration = self.init_duration = 0
+        self.resource_stats: Dict[str, Dict] = {}
         self._saved_state: ProviderState = Union[ProviderState, None]
         self._existing_map: Dict[str, List[str]] = {}
         self._added_map: Union[Dict[str, List[str]], None] = None
+        self._resource_index_key = None
+        self._resource_index_cache = None
 
     @property
     def existing_map(self) -> Dict[str, List[str]]:
@@ -42,15 +46,50 @@ class Provider(ABC):
     def added_map(self) -> Dict[str, List[str]]:
         return self._added_map
 
+    def invalidate_resource_index(self):
+        # Needed after any change to nodes, networks or services other than an append or replace_resource.
+        self._resource_index_key = None
+
+    def replace_resource(self, resource: Resource, replacement: Resource):
+        for resources in (self._nodes, self._networks, self._services):
+            for idx, r in enumerate(resources):
+                if r is resource:
+                    resources[idx] = replacement
+                    self.invalidate_resource_index()
+                    return
+
+        raise ValueError(f"resource {resource.label} not found in provider {self.label}")
+
+    def _resource_index(self):
+        # Subclasses append to the resource lists directly, so the index is keyed on the lists themselves and
+        # their sizes and rebuilt only when one of them changed. An entry replaced or removed in place keeps
+        # the size the same, so that must go through replace_resource or invalidate_resource_index.
+        lists = (self._nodes, self._networks, self._services)
+        key = self._resource_index_key
+
+        if key is None or any(a is not b or len(a) != n for a, (b, n) in zip(lists, key)):
+            resources = [*self._nodes, *self._networks, *self._services]
+            by_label = {}
+
+            for r in resources:
+                by_label.setdefault(r.label, []).append(r)
+
+            self._resource_index_cache = (resources, by_label)
+            self._resource_index_key = [(a, len(a)) for a in lists]
+
+        return self._resource_index_cache
+
     @property
     def resources(self) -> List[Resource]:
-        resources = [n for n in self._nodes]
-        resources.extend([n for n in self._networks])
-        resources.extend([n for n in self._services])
-        return resources
+        return list(self._resource_index()[0])
+
+    def resources_with_label(self, label: str) -> List[Resource]:
+        return list(self._resource_index()[1].get(label, []))
 
     @property
     def nodes(self) -> List[Node]:
+        # nodes, networks and services may be appended to directly. Use replace_resource to swap an entry and
+        # call invalidate_resource_index after any other change, or resources will not see it.
         return self._nodes
 
     @property
@@ -62,10 +101,12 @@ class Provider(ABC):
 
     @property
     def networks(self) -> List[Network]:
+        # See nodes on how this list may be changed.
         return self._networks
 
     @property
     def services(self) -> List[Service]:
+        # See nodes on how this list may be changed.
         return self._services
 
     @property
@@ -80,6 +121,12 @@ class Provider(ABC):
     def failed(self) -> Dict:
         return self._failed
 
+    @property
+    def deferred_deletes(self) -> set:
+        # Labels whose delete was accepted but is carried out by a later delete. The controller keeps their
+        # states until the label is no longer deferred.
+        return self._deferred_deletes
+
     def set_resource_listener(self, resource_listener):
         self.resource_listener = resource_listener
 
@@ -127,8 +174,8 @@ class Provider(ABC):
                     self.no_longer_pending.append(pending_resource)
                     self.logger.info(f"Removing {label} from pending using {self.label}")
 
-            for r in self.resources:
-                if r.label in resource.get_externally_depends_on():
+            for label in dict.fromkeys(resource.get_externally_depends_on()):
+                for r in self.resources_with_label(label):
                     self.do_handle_externally_depends_on(resource=r, dependee=resource)
 
     def init(self):
@@ -146,7 +193,7 @@ class Provider(ABC):
                     f"{self.label}: must name a section in the credential file using keyword {Constants.PROFILE}")
 
             profile = self.config[Constants.PROFILE]
-            config = utils.load_yaml_from_file(credential_file)
+            config = utils.load_credentials(credential_file)
 
             if profile not in config:
                 raise ProviderException(
@@ -240,6 +287,7 @@ class Provider(ABC):
         finally:
             end = time.time()
             self.add_duration += (end - start)
+            self._track_resource(label, end - start)
 
     def add_resource(self, *, resource: dict):
         import time
@@ -292,6 +340,7 @@ class Provider(ABC):
         finally:
             end = time.time()
             self.add_duration += (end - start)
+            self._track_resource(label, end - start)
 
     def create_resource(self, *, resource: dict):
         import time
@@ -350,6 +399,7 @@ class Provider(ABC):
                 self.creation_details[label]['created_count'] = len(self.creation_details[label]['resources'])
                 end = time.time()
                 self.create_duration += (end - start)
+                self._track_resource(label, end - start)
 
     def wait_for_create_resource(self, *, resource: dict):
         import time
@@ -370,6 +420,7 @@ class Provider(ABC):
                 self.creation_details[label]['created_count'] = len(self.creation_details[label]['resources'])
                 end = time.time()
                 self.create_duration += (end - start)
+                self._track_resource(label, end - start)
 
     def delete_resource(self, *, resource: dict):
         import time
@@ -386,6 +437,12 @@ class Provider(ABC):
         finally:
             end = time.time()
             self.delete_duration += (end - start)
+            self._track_resource(resource.get(Constants.LABEL), end - start)
+
+    def _track_resource(self, label: str, duration: float):
+        stats = self.resource_stats.setdefault(label, dict(duration=0, invocations=0))
+        stats['duration'] += duration
+        stats['invocations'] += 1
 
     def get_state(self) -> ProviderState:
         from fabfed.model.state import NetworkState, NodeState, ServiceState
@@ -397,11 +454,12 @@ class Provider(ABC):
             attributes = {k: v for k, v in attributes.items() if not k.startswith('_')}
             return attributes
 
-        networks = [n for n in self.networks if n.name in self.creation_details[n.label]["resources"]]
+        created = {label: set(details["resources"]) for label, details in self.creation_details.items()}
+        networks = [n for n in self.networks if n.name in created[n.label]]
         net_states = [NetworkState(label=n.label, attributes=cleanup_attrs(vars(n))) for n in networks]
-        nodes = [n for n in self.nodes if n.name in self.creation_details[n.label]["resources"]]
+        nodes = [n for n in self.nodes if n.name in created[n.label]]
         node_states = [NodeState(label=n.label, attributes=cleanup_attrs(vars(n))) for n in nodes]
-        services = [s for s in self.services if s.name in self.creation_details[s.label]["resources"]]
+        services = [s for s in self.services if s.name in created[s.label]]
         service_states = [ServiceState(label=s.label, attributes=cleanup_attrs(vars(s))) for s in services]
         pending = [res['label'] for res in self.pending]
         pending_internal = [res['label'] for res in self.pending_internal]
@@ -7,6 +7,10 @@ class ResourceListener(ABC):
     def on_added(self, *, source, provider: Provider, resource: object):
         pass
 
+    def on_added_all(self, *, source, provider: Provider, resources: list):
+        for resource in resources:
+            self.on_added(source=source, provider=provider, resource=resource)
+
     @abstractmethod
     def on_created(self, *, source, provider: Provider, resource: object):
         pass
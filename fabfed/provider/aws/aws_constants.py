@@ -1,6 +1,12 @@
 ACCESS_KEY = "ACCESS_KEY"
 SECRET_KEY = "SECRET_KEY"
 RETRY = 60
+CLIENT_MAX_POOL_CONNECTIONS = 20
+CLIENT_MAX_ATTEMPTS = 10
+POLL_MIN_INTERVAL = 5
+POLL_MAX_INTERVAL = 30
+POLL_BACKOFF = 1.5
+POLL_TIMEOUT = RETRY * 20
 
 VLAN = 'vlan'
 AMAZON_SIDE_ASN = 'amazonSideAsn'
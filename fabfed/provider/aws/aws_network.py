@@ -18,6 +18,7 @@ class AwsNetwork(Network):
         self.vpn_id = None
         self.vif_details = {}
         self.route_table_details = {}
+        self.step_durations = {}
         self._state = state
 
     @property
@@ -43,61 +44,84 @@ class AwsNetwork(Network):
 
         logger.info(f'{self.name} using region {region}')
 
-        ec2_client = aws_utils.create_ec2_client(region=region,
-                                                 access_key=self._provider.access_key,
-                                                 secret_key=self._provider.secret_key)
+        ec2_client = self._provider.client_pool.ec2_client(region)
+        direct_connect_client = self._provider.client_pool.direct_connect_client(region)
         self.vpc_id = self.peering.attributes.get(Constants.RES_CLOUD_VPC)
 
         if not self.vpc_id:
             raise AwsException(f"must supply vpc id using peering attribute: {Constants.RES_CLOUD_VPC}")
 
-        if not aws_utils.is_vpc_available(ec2_client=ec2_client, vpc_id=self.vpc_id):
-            raise AwsException(f"Vpc is not available:{self.vpc_id}")
-
-        logger.info(f'Vpc {self.vpc_id} is available')
-
-        direct_connect_client = aws_utils.create_direct_connect_client(
-            region=region,
-            access_key=self._provider.access_key,
-            secret_key=self._provider.secret_key)
-
-        connection_id, vlan = aws_utils.find_available_dx_connection(
-            direct_connect_client=direct_connect_client,
-            name=self.connection_name)
-
-        logger.info(f'connection {self.connection_name} is available:connection_id={connection_id}')
-
         amazon_asn = self.peering.attributes.get(Constants.RES_REMOTE_ASN)
 
         if isinstance(amazon_asn, str):
            amazon_asn = int(amazon_asn)
 
-        self.vpn_id = aws_utils.find_vpn_gateway(ec2_client=ec2_client, name=self.vpn_gateway_name)
-
-        if not self.vpn_id:
-            logger.info(f'Creating vpn gateway: name={self.vpn_gateway_name}:vpc={self.vpc_id}')
-            self.vpn_id = aws_utils.create_vpn_gateway(
-                ec2_client=ec2_client,
-                name=self.vpn_gateway_name,
-                amazon_asn=amazon_asn)
-            logger.info(f'Created vpn gateway: name={self.vpn_gateway_name}')
-        else:
-            logger.info(f'Found vpn gateway: name={self.vpn_gateway_name}')
-
-        aws_utils.attach_vpn_gateway_if_needed(ec2_client=ec2_client, vpn_id=self.vpn_id, vpc_id=self.vpc_id)
-
-        self.route_table_details = aws_utils.create_route_table_if_needed(ec2_client=ec2_client,
-                                                                    cidr=self.layer3.attributes['subnet'],
-                                                                    vpc_id=self.vpc_id,
-                                                                    vpn_id=self.vpn_id)
-
-        self.vif_details = aws_utils.create_private_virtual_interface(
-            direct_connect_client=direct_connect_client,
-            vpn_gateway_id=self.vpn_id,
-            connection_id=connection_id,
-            vlan=vlan,
-            peering=self.peering,
-            vif_name=f"{self.vif_name}")
+        def check_vpc():
+            if not aws_utils.is_vpc_available(ec2_client=ec2_client, vpc_id=self.vpc_id):
+                raise AwsException(f"Vpc is not available:{self.vpc_id}")
+
+            logger.info(f'Vpc {self.vpc_id} is available')
+
+        def find_connection():
+            connection_id, vlan = aws_utils.find_available_dx_connection(
+                direct_connect_client=direct_connect_client,
+                name=self.connection_name)
+
+            logger.info(f'connection {self.connection_name} is available:connection_id={connection_id}')
+            return connection_id, vlan
+
+        def create_vpn_gateway():
+            self.vpn_id = aws_utils.find_vpn_gateway(ec2_client=ec2_client, name=self.vpn_gateway_name)
+
+            if not self.vpn_id:
+                logger.info(f'Creating vpn gateway: name={self.vpn_gateway_name}:vpc={self.vpc_id}')
+                self.vpn_id = aws_utils.create_vpn_gateway(
+                    ec2_client=ec2_client,
+                    name=self.vpn_gateway_name,
+                    amazon_asn=amazon_asn)
+                logger.info(f'Created vpn gateway: name={self.vpn_gateway_name}')
+            else:
+                logger.info(f'Found vpn gateway: name={self.vpn_gateway_name}')
+
+        def create_subnet(check_vpc):
+            return aws_utils.create_subnet_if_needed(ec2_client=ec2_client,
+                                                     cidr=self.layer3.attributes['subnet'],
+                                                     vpc_id=self.vpc_id)
+
+        def attach_vpn_gateway(check_vpc, create_vpn_gateway):
+            aws_utils.attach_vpn_gateway_if_needed(ec2_client=ec2_client, vpn_id=self.vpn_id, vpc_id=self.vpc_id)
+
+        def create_route_table(create_subnet, attach_vpn_gateway):
+            self.route_table_details = aws_utils.create_route_table_if_needed(ec2_client=ec2_client,
+                                                                              subnet_id=create_subnet,
+                                                                              vpc_id=self.vpc_id,
+                                                                              vpn_id=self.vpn_id)
+
+        def create_vif(find_connection, attach_vpn_gateway):
+            connection_id, vlan = find_connection
+            self.vif_details = aws_utils.create_private_virtual_interface(
+                direct_connect_client=direct_connect_client,
+                vpn_gateway_id=self.vpn_id,
+                connection_id=connection_id,
+                vlan=vlan,
+                peering=self.peering,
+                vif_name=f"{self.vif_name}")
+
+        from fabfed.util.task_graph import TaskGraph
+
+        graph = TaskGraph(name=self.name, logger=logger)
+        graph.add('check_vpc', check_vpc)
+        graph.add('find_connection', find_connection)
+        graph.add('create_vpn_gateway', create_vpn_gateway)
+        graph.add('create_subnet', create_subnet, depends_on=['check_vpc'])
+        graph.add('attach_vpn_gateway', attach_vpn_gateway, depends_on=['check_vpc', 'create_vpn_gateway'])
+        graph.add('create_route_table', create_route_table, depends_on=['create_subnet', 'attach_vpn_gateway'])
+        graph.add('create_vif', create_vif, depends_on=['find_connection', 'attach_vpn_gateway'])
+
+        try:
+            graph.run()
+        finally:
+            self.step_durations = graph.durations
 
     def delete(self):
         region = self.peering.attributes.get(Constants.RES_CLOUD_REGION)
@@ -108,9 +132,7 @@ class AwsNetwork(Network):
         if not region:
            raise AwsException(f"Missing cloud region")
 
-        ec2_client = aws_utils.create_ec2_client(region=region,
-                                                 access_key=self._provider.access_key,
-                                                 secret_key=self._provider.secret_key)
+        ec2_client = self._provider.client_pool.ec2_client(region)
 
         vpc_id = self.peering.attributes.get(Constants.RES_CLOUD_VPC)
         if not vpc_id:
@@ -132,10 +154,7 @@ class AwsNetwork(Network):
         route_table_id = route_table_details.get('RouteTableId')
         aws_utils.delete_route_table_if_needed(ec2_client=ec2_client, vpc_id=vpc_id, route_table_id=route_table_id)
 
-        direct_connect_client = aws_utils.create_direct_connect_client(
-            region=region,
-            access_key=self._provider.access_key,
-            secret_key=self._provider.secret_key)
+        direct_connect_client = self._provider.client_pool.direct_connect_client(region)
 
         aws_utils.delete_private_virtual_interface(direct_connect_client=direct_connect_client,
                                                    vif_name=f"{self.vif_name}")
@@ -0,0 +1,245 @@
+import threading
+import time
+import weakref
+from collections import namedtuple
+
+from fabfed.util.utils import get_logger
+from .aws_constants import *
+from .aws_exceptions import AwsException
+
+logger = get_logger()
+
+# describe(client, keys) returns the objects for a set of keys in as few calls as the api allows.
+# state_of(obj, context) returns the state a waiter is interested in. context is per waiter, e.g. a vpc id.
+PollKind = namedtuple("PollKind", "name describe key_of state_of")
+
+
+def _describe_vpn_gateways(client, keys):
+    response = client.describe_vpn_gateways(Filters=[{'Name': 'vpn-gateway-id', 'Values': sorted(keys)}])
+    return response.get('VpnGateways', [])
+
+
+def _vpn_gateway_state(vpn_gateway, vpc_id):
+    if vpc_id is None:
+        return vpn_gateway['State']
+
+    attachment = next(filter(lambda at: at['VpcId'] == vpc_id, vpn_gateway['VpcAttachments']), None)
+    return attachment['State'] if attachment else 'detached'
+
+
+def _describe_route_tables(client, keys):
+    paginator = client.get_paginator('describe_route_tables')
+    route_tables = []
+
+    for response in paginator.paginate(Filters=[{'Name': 'route-table-id', 'Values': sorted(keys)}]):
+        route_tables.extend(response.get('RouteTables', []))
+
+    return route_tables
+
+
+# Direct Connect only filters on a single id. Several keys are served by a single unfiltered call.
+def _describe_virtual_interfaces(client, keys):
+    if len(keys) == 1:
+        return client.describe_virtual_interfaces(virtualInterfaceId=next(iter(keys)))['virtualInterfaces']
+
+    return client.describe_virtual_interfaces()['virtualInterfaces']
+
+
+def _describe_connections(client, keys):
+    if len(keys) == 1:
+        return client.describe_connections(connectionId=next(iter(keys)))['connections']
+
+    return client.describe_connections()['connections']
+
+
+def _describe_associations(client, keys):
+    if len(keys) == 1:
+        direct_connect_gateway_id, vpn_id = next(iter(keys))
+        response = client.describe_direct_connect_gateway_associations(
+            directConnectGatewayId=direct_connect_gateway_id,
+            virtualGatewayId=vpn_id)
+        return response.get('directConnectGatewayAssociations', [])
+
+    associations = []
+
+    for direct_connect_gateway_id in {key[0] for key in keys}:
+        response = client.describe_direct_connect_gateway_associations(
+            directConnectGatewayId=direct_connect_gateway_id)
+        associations.extend(response.get('directConnectGatewayAssociations', []))
+
+    return associations
+
+
+VPN_GATEWAYS = PollKind(name='vpn_gateway',
+                        describe=_describe_vpn_gateways,
+                        key_of=lambda gw: gw['VpnGatewayId'],
+                        state_of=_vpn_gateway_state)
+ROUTE_TABLES = PollKind(name='route_table',
+                        describe=_describe_route_tables,
+                        key_of=lambda rt: rt['RouteTableId'],
+                        state_of=lambda rt, _: 'exists')
+VIRTUAL_INTERFACES = PollKind(name='virtual_interface',
+                              describe=_describe_virtual_interfaces,
+                              key_of=lambda vif: vif[VIF_ID],
+                              state_of=lambda vif, _: vif[VIF_STATE])
+DX_CONNECTIONS = PollKind(name='dx_connection',
+                          describe=_describe_connections,
+                          key_of=lambda con: con['connectionId'],
+                          state_of=lambda con, _: con['connectionState'])
+DXGW_ASSOCIATIONS = PollKind(name='dxgw_association',
+                             describe=_describe_associations,
+                             key_of=lambda a: (a['directConnectGatewayId'], a['virtualGatewayId']),
+                             state_of=lambda a, _: a['associationState'])
+
+
+class _Waiter:
+    def __init__(self, *, key, context, until, fail, missing):
+        self.key = key
+        self.context = context
+        self.until = until
+        self.fail = fail
+        self.missing = missing
+        self.state = None
+        self.obj = None
+        self.done = threading.Event()
+
+
+class AwsPoller:
+    """
+    Waits on the state of many objects of the same kind using one describe call per tick for all of them.
+    The interval starts at POLL_MIN_INTERVAL and backs off up to POLL_MAX_INTERVAL while no state changes.
+    """
+
+    def __init__(self, *, client, kind: PollKind):
+        # The registry below is keyed weakly by client, so the poller must not keep its client alive.
+        self._client = weakref.ref(client)
+        self.kind = kind
+        self.describe_calls = 0
+        self._waiters = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._next_poll = 0
+        self._arrived = False
+
+    @property
+    def client(self):
+        return self._client()
+
+    def wait(self, key, *, until, fail=(), missing=None, context=None, timeout=POLL_TIMEOUT):
+        waiter = _Waiter(key=key, context=context, until=set(until), fail=set(fail), missing=missing)
+
+        with self._cond:
+            self._waiters.append(waiter)
+            self._arrived = True
+
+            if self._thread:
+                self._next_poll = min(self._next_poll, time.time() + POLL_MIN_INTERVAL)
+                self._cond.notify()
+            else:
+                self._next_poll = time.time() + POLL_MIN_INTERVAL
+                self._thread = threading.Thread(target=self._run, name=f"aws-{self.kind.name}-poller", daemon=True)
+                self._thread.start()
+
+        if not waiter.done.wait(timeout):
+            with self._cond:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+            raise AwsException(f"Timed out waiting on {self.kind.name} {key}: state={waiter.state}")
+
+        if waiter.state in waiter.fail:
+            raise AwsException(f"Failed waiting on {self.kind.name} {key}: state={waiter.state}")
+
+        return waiter.obj
+
+    def _poll(self, waiters) -> bool:
+        client = self.client
+
+        if client is None:
+            return False
+
+        try:
+            objs = self.kind.describe(client, {w.key for w in waiters})
+            self.describe_calls += 1
+        except Exception as e:
+            logger.warning(f"Exception while describing {self.kind.name}s: {e}")
+            return False
+
+        obj_map = {self.kind.key_of(obj): obj for obj in objs}
+        changed = False
+
+        for waiter in waiters:
+            obj = obj_map.get(waiter.key)
+            state = self.kind.state_of(obj, waiter.context) if obj is not None else waiter.missing
+
+            if state != waiter.state:
+                logger.info(f"{self.kind.name} {waiter.key}: state={state}")
+                changed = True
+
+            waiter.state = state
+            waiter.obj = obj
+
+            if state in waiter.until or state in waiter.fail:
+                with self._cond:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+
+                waiter.done.set()
+
+        return changed
+
+    def _run(self):
+        interval = POLL_MIN_INTERVAL
+
+        while True:
+            with self._cond:
+                while self._waiters and time.time() < self._next_poll:
+                    self._cond.wait(self._next_poll - time.time())
+
+                if not self._waiters:
+                    self._thread = None
+                    return
+
+                waiters = list(self._waiters)
+                self._arrived = False
+
+            changed = self._poll(waiters)
+
+            with self._cond:
+                if changed or self._arrived:
+                    interval = POLL_MIN_INTERVAL
+                else:
+                    interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+
+                self._next_poll = time.time() + interval
+
+
+# Pollers go away along with their client once the client is no longer used.
+_pollers = weakref.WeakKeyDictionary()
+_pollers_lock = threading.Lock()
+
+
+def get_poller(client, kind: PollKind) -> AwsPoller:
+    with _pollers_lock:
+        pollers = _pollers.setdefault(client, {})
+
+        if kind.name not in pollers:
+            pollers[kind.name] = AwsPoller(client=client, kind=kind)
+
+        return pollers[kind.name]
+
+
+def wait_for(client, kind: PollKind, key, **kwargs):
+    return get_poller(client, kind).wait(key, **kwargs)
+
+
+def wait_with_waiter(client, waiter_name: str, label: str, **kwargs):
+    from botocore.exceptions import WaiterError
+
+    waiter = client.get_waiter(waiter_name)
+
+    try:
+        waiter.wait(WaiterConfig={'Delay': POLL_MIN_INTERVAL, 'MaxAttempts': POLL_TIMEOUT // POLL_MIN_INTERVAL},
+                    **kwargs)
+    except WaiterError as e:
+        raise AwsException(f"Timed out waiting on {label}: {e}")
@@ -11,6 +11,7 @@ class AwsProvider(Provider):
     def __init__(self, *, type, label, name, config: dict):
         super().__init__(type=type, label=label, name=name, logger=logger, config=config)
         self.supported_resources = [Constants.RES_TYPE_NETWORK.lower()]
+        self._client_pool = None
 
     @property
     def access_key(self):
@@ -20,12 +21,21 @@ class AwsProvider(Provider):
     def secret_key(self):
         return self.config.get(aws_constants.SECRET_KEY)
 
+    @property
+    def client_pool(self):
+        if self._client_pool is None:
+            from .aws_utils import get_client_pool
+
+            self._client_pool = get_client_pool(access_key=self.access_key, secret_key=self.secret_key)
+
+        return self._client_pool
+
     def setup_environment(self):
         from fabfed.util import utils
 
         credential_file = self.config.get(Constants.CREDENTIAL_FILE)
         profile = self.config.get(Constants.PROFILE)
-        config = utils.load_yaml_from_file(credential_file)
+        config = utils.load_credentials(credential_file)
 
         if profile not in config:
             from fabfed.exceptions import ProviderException
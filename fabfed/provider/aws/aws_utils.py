@@ -1,4 +1,4 @@
-import time
+import threading
 
 import boto3
 
@@ -6,19 +6,59 @@ from fabfed.util.utils import get_logger
 from fabfed.util.constants import Constants
 from .aws_constants import *
 from .aws_exceptions import AwsException
+from . import aws_poller
 
 logger = get_logger()
 
 
-def create_ec2_client(*, region: str, access_key: str, secret_key: str):
-    ec2_client = boto3.client(
-        'ec2',
-        region_name=region,
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key
-    )
+class AwsClientPool:
+    """
+    Caches boto3 clients by service and region for a set of credentials. Clients share one boto3 session,
+    so credentials and endpoints are resolved once, and each client keeps its http connection pool.
+    """
+
+    def __init__(self, *, access_key: str, secret_key: str):
+        self._session = boto3.session.Session(aws_access_key_id=access_key, aws_secret_access_key=secret_key)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, service: str, region: str):
+        key = (service, region)
+
+        # boto3 clients are thread safe but the session creating them is not.
+        with self._lock:
+            if key not in self._clients:
+                from botocore.config import Config
+
+                config = Config(max_pool_connections=CLIENT_MAX_POOL_CONNECTIONS,
+                                retries={'max_attempts': CLIENT_MAX_ATTEMPTS, 'mode': 'adaptive'})
+                self._clients[key] = self._session.client(service, region_name=region, config=config)
+
+            return self._clients[key]
+
+    def ec2_client(self, region: str):
+        return self.client('ec2', region)
+
+    def direct_connect_client(self, region: str):
+        return self.client('directconnect', region)
+
+
+_client_pools = {}
+_client_pools_lock = threading.Lock()
 
-    return ec2_client
+
+def get_client_pool(*, access_key: str, secret_key: str) -> AwsClientPool:
+    key = (access_key, secret_key)
+
+    with _client_pools_lock:
+        if key not in _client_pools:
+            _client_pools[key] = AwsClientPool(access_key=access_key, secret_key=secret_key)
+
+        return _client_pools[key]
+
+
+def _filters(**kwargs):
+    return [{'Name': k.replace('_', '-'), 'Values': [v]} for k, v in kwargs.items()]
 
 
 def is_vpc_available(*, ec2_client, vpc_id: str):
@@ -41,23 +81,18 @@ def is_vpc_available(*, ec2_client, vpc_id: str):
 
 
 def find_route_tables(*, ec2_client, vpc_id):
-    response = ec2_client.describe_route_tables()
+    paginator = ec2_client.get_paginator('describe_route_tables')
     route_tables = []
 
-    if response and isinstance(response, dict) and 'RouteTables' in response:
-        for route_table in response['RouteTables']:
-            if route_table['VpcId'] == vpc_id:
-                route_tables.append(route_table)
+    for response in paginator.paginate(Filters=_filters(vpc_id=vpc_id)):
+        route_tables.extend(response.get('RouteTables', []))
 
     return route_tables
 
 
 def create_subnet_if_needed(*, ec2_client, cidr, vpc_id):
-    response = ec2_client.describe_subnets()
-    subnet = next(
-        filter(lambda sub: sub['CidrBlock'] == cidr and sub['VpcId'] == vpc_id, response['Subnets']),
-        None
-    )
+    response = ec2_client.describe_subnets(Filters=_filters(vpc_id=vpc_id, cidr_block=cidr))
+    subnet = next(iter(response['Subnets']), None)
 
     if not subnet:
         logger.info(f'Creating subnet {cidr}')
@@ -77,18 +112,9 @@ def create_subnet_if_needed(*, ec2_client, cidr, vpc_id):
     if state == 'available':
         return subnet_id
 
-    for i in range(RETRY):
-        response = ec2_client.describe_subnets(SubnetIds=[subnet_id])
-        subnet = next(filter(lambda sub: sub['CidrBlock'] == cidr and sub['VpcId'] == vpc_id, response['Subnets']))
-        state = subnet['State']
-        logger.info(f'Waiting on subnet {subnet_id}: state={state}')
-
-        if state == 'available':
-            return subnet_id
-
-        time.sleep(20)
-
-    raise AwsException(f'Timed out. subnet {subnet_id}:state={state}')
+    logger.info(f'Waiting on subnet {subnet_id}: state={state}')
+    aws_poller.wait_with_waiter(ec2_client, 'subnet_available', f'subnet {subnet_id}', SubnetIds=[subnet_id])
+    return subnet_id
 
 
 # https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2/client/enable_vgw_route_propagation.html
@@ -113,8 +139,7 @@ def print_route_tables(ec2_client, vpc_id):
     print()
 
 
-def create_route_table_if_needed(*, ec2_client, cidr, vpc_id, vpn_id):
-    subnet_id = create_subnet_if_needed(ec2_client=ec2_client, cidr=cidr, vpc_id=vpc_id)
+def create_route_table_if_needed(*, ec2_client, subnet_id, vpc_id, vpn_id):
     route_tables = find_route_tables(ec2_client=ec2_client, vpc_id=vpc_id)
 
     for route_table in route_tables:
@@ -167,20 +192,17 @@ def delete_route_table_if_needed(*, ec2_client, vpc_id, route_table_id):
     response = ec2_client.delete_route_table(RouteTableId=route_table_id)
     logger.info(f'deleted route_table:{route_table_id}:response={response}')
 
-    for i in range(RETRY):
-        route_tables = find_route_tables(ec2_client=ec2_client, vpc_id=vpc_id)
-        route_table = next(filter(lambda rt: rt['RouteTableId'] == route_table_id, route_tables), None)
-
-        if not route_table:
-            break
-        logger.info(f'waiting on deleting route_table:{route_table_id}:response={response}')
-        time.sleep(20)
+    try:
+        aws_poller.wait_for(ec2_client, aws_poller.ROUTE_TABLES, route_table_id, until=['deleted'], missing='deleted')
+    except AwsException as e:
+        logger.warning(f'{e}')
 
     logger.info(f'done deleting route_table:{route_table_id}:response={response}')
     print_route_tables(ec2_client=ec2_client, vpc_id=vpc_id)
 
 
 def find_available_dx_connection(*, direct_connect_client, name: str):
+    # Direct Connect has no server side filters by name. Polling below uses the connection id.
     response = direct_connect_client.describe_connections()
 
     if not isinstance(response, dict) and 'connections' not in response:
@@ -209,41 +231,35 @@ def find_available_dx_connection(*, direct_connect_client, name: str):
             response = direct_connect_client.confirm_connection(connectionId=connection_id)
             logger.info(f'response from confirm dx connection {response}')
     
-        for i in range(RETRY):
-            response = direct_connect_client.describe_connections(connectionId=connection_id)
-            connection = next(filter(lambda con: con['connectionName'] == name, response['connections']))
-            state = connection['connectionState']
-            logger.info(f'state={state}. dx connection {connection}')
-    
-            if state == 'available':
-                return connection_id, vlan
-    
-            time.sleep(20)
+        try:
+            connection = aws_poller.wait_for(direct_connect_client, aws_poller.DX_CONNECTIONS, connection_id,
+                                             until=['available'],
+                                             fail=['down', 'deleting', 'deleted', 'rejected', 'unknown'])
+            logger.info(f'dx connection {connection}')
+            return connection_id, vlan
+        except AwsException as e:
+            logger.warning(f'{e}')
 
     raise AwsException(f'Timed out. dx connection {name}:state={state}')
 
 
 def find_vpn_gateway(*, ec2_client, name: str):
-    response = ec2_client.describe_vpn_gateways()
+    response = ec2_client.describe_vpn_gateways(Filters=[{'Name': 'tag:Name', 'Values': [name]}])
 
     if isinstance(response, dict) and 'VpnGateways' in response:
         for gw in response['VpnGateways']:
-            if 'Tags' in gw and gw['Tags']:
-                name_tag = next(filter(lambda t: t['Key'] == 'Name' and t['Value'] == name, gw['Tags']), None)
-
-                if name_tag:
-                    return gw['VpnGatewayId']
+            return gw['VpnGatewayId']
 
     return None
 
 
 def _find_vpn_gateway_by_id(*, ec2_client, vpn_id: str):
-    response = ec2_client.describe_vpn_gateways()
+    # A filter rather than VpnGatewayIds so that a missing gateway is not an error.
+    response = ec2_client.describe_vpn_gateways(Filters=_filters(vpn_gateway_id=vpn_id))
 
     if response and isinstance(response, dict) and 'VpnGateways' in response:
         for gw in response['VpnGateways']:
-            if gw['VpnGatewayId'] == vpn_id:
-                return gw
+            return gw
 
     return None
 
@@ -267,20 +283,9 @@ def attach_vpn_gateway_if_needed(*, ec2_client, vpn_id: str, vpc_id: str):
         logger.info(f"VPN {vpn_id}:state={state}")
         return
 
-    for i in range(RETRY):
-        vpn_gateway = _find_vpn_gateway_by_id(ec2_client=ec2_client, vpn_id=vpn_id)
-        attachments = vpn_gateway['VpcAttachments']
-        attachment = next(filter(lambda at: at['VpcId'] == vpc_id, attachments))
-        state = attachment['State']
-
-        if state == 'attached':
-            logger.info(f"VPN {vpn_id}:state={state}")
-            return
-
-        logger.info(f"Waiting on attaching VPN {vpn_id}:state={state}")
-        time.sleep(20)
-
-    raise AwsException(f"Timed out on attaching vpn_gateway: state={state}")
+    logger.info(f"Waiting on attaching VPN {vpn_id}:state={state}")
+    aws_poller.wait_for(ec2_client, aws_poller.VPN_GATEWAYS, vpn_id, context=vpc_id, until=['attached'])
+    logger.info(f"VPN {vpn_id}:state=attached")
 
 
 def detach_vpn_gateway_if_needed(*, ec2_client, vpn_id: str, vpc_id: str):
@@ -304,25 +309,9 @@ def detach_vpn_gateway_if_needed(*, ec2_client, vpn_id: str, vpc_id: str):
     except Exception as e:
         logger.warning(f"failed to detach vpn: {e}")
 
-    state = None
-
-    for i in range(RETRY):
-        vpn_gateway = _find_vpn_gateway_by_id(ec2_client=ec2_client, vpn_id=vpn_id)
-        attachments = vpn_gateway['VpcAttachments']
-        state = None
-
-        for attachment in attachments:
-            if attachment['VpcId'] == vpc_id:
-                state = attachment['State']
-                break
-
-        if not state or state == 'detached':
-            return
-
-        logger.info(f"Waiting on detached vpn state={state}")
-        time.sleep(20)
-
-    raise AwsException(f"Timed out on detaching vpn_gateway: state={state}")
+    logger.info(f"Waiting on detached vpn {vpn_id}")
+    aws_poller.wait_for(ec2_client, aws_poller.VPN_GATEWAYS, vpn_id, context=vpc_id,
+                        until=['detached'], missing='detached')
 
 
 def create_vpn_gateway(*, ec2_client, name: str, amazon_asn: int):
@@ -350,19 +339,9 @@ def create_vpn_gateway(*, ec2_client, name: str, amazon_asn: int):
         logger.info(f"Returning VPN {name}:state={state}")
         return vpn_id
 
-    for i in range(RETRY):
-        vpn_gateway = _find_vpn_gateway_by_id(ec2_client=ec2_client, vpn_id=vpn_id)
-
-        if vpn_gateway:
-            state = vpn_gateway['State']
-
-            if state == 'available':
-                return vpn_id
-
-        logger.info(f"Waiting on VPN {name}:state={state}")
-        time.sleep(20)
-
-    raise AwsException(f"Timed out on creating vpn_gateway: state={state}")
+    logger.info(f"Waiting on VPN {name}:state={state}")
+    aws_poller.wait_for(ec2_client, aws_poller.VPN_GATEWAYS, vpn_id, until=['available'])
+    return vpn_id
 
 
 def delete_vpn_gateway(*, ec2_client, name: str):
@@ -372,31 +351,8 @@ def delete_vpn_gateway(*, ec2_client, name: str):
         return
 
     ec2_client.delete_vpn_gateway(VpnGatewayId=vpn_id)
-    state = None
-
-    for i in range(RETRY):
-        vpn_gateway = _find_vpn_gateway_by_id(ec2_client=ec2_client, vpn_id=vpn_id)
-
-        if vpn_gateway:
-            state = vpn_gateway['State']
-
-        if not state or state == 'deleted':
-            return vpn_id
-
-        time.sleep(20)
-
-    raise AwsException(f"Timed out on creating vpn_gateway: state={state}")
-
-
-def create_direct_connect_client(*, region: str, access_key: str, secret_key: str):
-    direct_connect_client = boto3.client(
-        'directconnect',
-        region_name=region,
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key
-    )
-
-    return direct_connect_client
+    aws_poller.wait_for(ec2_client, aws_poller.VPN_GATEWAYS, vpn_id, until=['deleted'], missing='deleted')
+    return vpn_id
 
 
 def find_direct_connect_gateway_by_name(*, direct_connect_client, gateway_name: str):
@@ -451,7 +407,7 @@ def create_private_virtual_interface(*,
                                      vlan,
                                      peering,
                                      vif_name: str):
-    response = direct_connect_client.describe_virtual_interfaces()
+    response = direct_connect_client.describe_virtual_interfaces(connectionId=connection_id)
     details = {}
 
     if isinstance(response, dict) and 'virtualInterfaces' in response:
@@ -495,23 +451,12 @@ def create_private_virtual_interface(*,
         logger.info(f"Private virtual interface {vif_name} is {details[VIF_STATE]}")
         return details
 
-    for i in range(RETRY):
-        logger.warning(f"Waiting on private virtual interface {vif_name}:state={details[VIF_STATE]}:attempt={i + 1}")
-        time.sleep(20)
-
-        response = direct_connect_client.describe_virtual_interfaces()
-        vif = next(filter(lambda v: v[VIF_ID] == details[VIF_ID], response['virtualInterfaces']))
-
-        for k in VIF_DETAILS:
-            details[k] = vif[k]
-
-        state = details[VIF_STATE]
-
-        if state == 'available':
-            break
+    logger.warning(f"Waiting on private virtual interface {vif_name}:state={details[VIF_STATE]}")
+    vif = aws_poller.wait_for(direct_connect_client, aws_poller.VIRTUAL_INTERFACES, details[VIF_ID],
+                              until=['available'], fail=['deleting', 'deleted', 'rejected'])
 
-    if details[VIF_STATE] != 'available':
-        raise AwsException(f"Virtual interface {vif_name}:state={details[VIF_STATE]}")
+    for k in VIF_DETAILS:
+        details[k] = vif[k]
 
     logger.info(f"Private virtual interface {vif_name} is {details[VIF_STATE]}")
     return details
@@ -545,24 +490,10 @@ def delete_private_virtual_interface(*,
         virtualInterfaceId=details[VIF_ID]
     )
 
-    for i in range(RETRY):
-        logger.warning(f"Waiting on private virtual interface {vif_name}:state={details[VIF_STATE]}:attempt={i + 1}")
-        time.sleep(20)
-
-        response = direct_connect_client.describe_virtual_interfaces()
-        vif = next(filter(lambda v: v[VIF_ID] == details[VIF_ID], response['virtualInterfaces']))
-
-        for k in VIF_DETAILS:
-            details[k] = vif[k]
-
-        state = details[VIF_STATE]
-
-        if state == 'deleted':
-            break
-
-    if details[VIF_STATE] != 'deleted':
-        raise AwsException(f"Virtual interface {vif_name}:state={details[VIF_STATE]}")
-
+    logger.warning(f"Waiting on private virtual interface {vif_name}:state={details[VIF_STATE]}")
+    aws_poller.wait_for(direct_connect_client, aws_poller.VIRTUAL_INTERFACES, details[VIF_ID],
+                        until=['deleted'], missing='deleted')
+    details[VIF_STATE] = 'deleted'
     logger.info(f"Private virtual interface {vif_name} is {details[VIF_STATE]}")
     return details
 
@@ -619,23 +550,12 @@ def associate_dxgw_vpn(direct_connect_client, direct_connect_gateway_id, vpn_id:
         logger.info(f'association is associated:{association}')
         return association['associationId']
 
-    for i in range(RETRY):
-        logger.warning(f'Waiting on association. state={state}: association:{association}')
-        time.sleep(20)
-
-        association = find_association_dxgw_vpn(
-            direct_connect_client=direct_connect_client,
-            direct_connect_gateway_id=direct_connect_gateway_id,
-            vpn_id=vpn_id
-        )
-
-        state = association['associationState']
-
-        if state == 'associated':
-            logger.info(f'association is associated:{association}')
-            return association['associationId']
-
-    raise AwsException(f"Timed out on creating direct_connect_gateway_association: state={state}")
+    logger.warning(f'Waiting on association. state={state}: association:{association}')
+    association = aws_poller.wait_for(direct_connect_client, aws_poller.DXGW_ASSOCIATIONS,
+                                      (direct_connect_gateway_id, vpn_id),
+                                      until=['associated'], fail=['disassociated'])
+    logger.info(f'association is associated:{association}')
+    return association['associationId']
 
 
 def dissociate_dxgw_vpn(*, direct_connect_client, association_id: str):
@@ -656,22 +576,6 @@ def dissociate_dxgw_vpn(*, direct_connect_client, association_id: str):
     direct_connect_gateway_id = association['directConnectGatewayId']
     vpn_id = association['virtualGatewayId']
 
-    for i in range(RETRY):
-        association = find_association_dxgw_vpn(
-            direct_connect_client=direct_connect_client,
-            direct_connect_gateway_id=direct_connect_gateway_id,
-            vpn_id=vpn_id
-        )
-
-        if not association or not isinstance(association, dict) or 'associationState' not in association:
-            return
-
-        logger.info(f'checking if association state is disassociated: {association}')
-        state = association['associationState']
-
-        if state == 'disassociated':
-            return
-
-        time.sleep(20)
-
-    raise AwsException(f"Timed out on deleting direct_connect_gateway_association:id={association_id}:state={state}")
+    logger.info(f'Waiting on disassociating association:id={association_id}')
+    aws_poller.wait_for(direct_connect_client, aws_poller.DXGW_ASSOCIATIONS, (direct_connect_gateway_id, vpn_id),
+                        until=['disassociated'], missing='disassociated')
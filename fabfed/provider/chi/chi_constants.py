@@ -13,6 +13,9 @@ CHI_KEY_PAIR = "key_pair"
 CHI_SLICE_PRIVATE_KEY_LOCATION = "slice-private-key-location"
 CHI_SLICE_PUBLIC_KEY_LOCATION = "slice-public-key-location"
 
+# Node resource attribute. When true the nodes of the resource share a single lease with count=N.
+CHI_GROUP_LEASE = "group_lease"
+
 CHI_CONF_ATTRS = [CHI_USER,
                   CHI_PASSWORD,
                   CHI_KEY_PAIR,
@@ -25,6 +28,7 @@ DEFAULT_NETWORK = "sharednet1"
 DEFAULT_NETWORKS = [DEFAULT_NETWORK, "sharedwan1", "containernet1"]
 DEFAULT_IMAGE = "CC-Ubuntu20.04"
 DEFAULT_FLAVOR = "m1.medium"
+DEFAULT_NODE_TYPE = "compute_cascadelake_r"
 
 DEFAULT_AUTH_URLS = dict(
     tacc='https://chi.tacc.chameleoncloud.org:5000/v3',
@@ -49,4 +53,7 @@ DEFAULT_PROJECT_IDS = dict(
 
 DEFAULT_DISCOVERY_URL = "https://auth.chameleoncloud.org/auth/realms/chameleon/.well-known/openid-configuration"
 
+CHI_POLL_INTERVAL = 10
+CHI_WAIT_TIMEOUT = 60 * 40
+
 INCLUDE_ROUTER = True 
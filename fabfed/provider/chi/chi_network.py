@@ -2,12 +2,8 @@ import json
 import logging
 import time
 
-import chi
-import chi.network
-import chi.server
-
 from fabfed.model import Network
-from .chi_util import LeaseHelper
+from .chi_util import ChiSite, LeaseHelper
 from ...util.config_models import Config
 from ...util.constants import Constants
 from .chi_constants import INCLUDE_ROUTER
@@ -20,9 +16,10 @@ logger: logging.Logger = get_logger()
 
 class ChiNetwork(Network):
     def __init__(self, *, label, name: str, site: str, project_name: str, layer3: Config,
-                 stitch_info, vlan: int):
+                 stitch_info, vlan: int, chi_site: ChiSite):
         super().__init__(label=label, name=name, site=site)
         self.project_name = project_name
+        self._chi_site = chi_site
         self.layer3 = layer3
         self.subnet = layer3.attributes.get(Constants.RES_SUBNET)
         self.ip_start = layer3.attributes.get(Constants.RES_LAYER3_DHCP_START)
@@ -60,7 +57,7 @@ class ChiNetwork(Network):
         self.vlans = list()
         self.interface = list()
         self.logger = logger
-        self._lease_helper = LeaseHelper(lease_name=self.lease_name, logger=self.logger)
+        self._lease_helper = LeaseHelper(lease_name=self.lease_name, chi_site=chi_site, logger=self.logger)
 
     def get_reservation_id(self):
         return self._lease_helper.get_reservation_id()
@@ -71,9 +68,6 @@ class ChiNetwork(Network):
     def create(self):
         import json
 
-        chi.set('project_name', self.project_name)
-        chi.set('project_domain_name', 'default')
-        chi.use_site(self.site)
         self._lease_helper.create_lease_if_needed(reservations=self.reservations, retry=self._retry)
         self.logger.debug(f"Using active lease {self.lease_name}:lease={json.dumps(self._lease_helper.lease, indent=3)}")
 
@@ -85,7 +79,7 @@ class ChiNetwork(Network):
 
         for attempt in range(self._retry):
             try:
-                chameleon_network = chi.network.get_network(self.name)
+                chameleon_network = self._chi_site.get_network(self.name)
                 chameleon_network_id = chameleon_network['id']
 
                 if 'provider:segmentation_id' in chameleon_network:
@@ -116,25 +110,25 @@ class ChiNetwork(Network):
             self.interface.append(temp)
 
         try:
-            chameleon_subnet = chi.network.get_subnet(self.subnet_name)
+            chameleon_subnet = self._chi_site.get_subnet(self.subnet_name)
             self.logger.info(f'Subnet already created: {self.subnet_name}')
         except Exception as e:
             self.logger.warning(f'Error while creating subnet: {self.subnet_name} {e}')
             chameleon_subnet = None
 
         if not chameleon_subnet:
-            chameleon_subnet = chi.network.create_subnet(self.subnet_name, chameleon_network_id,
-                                                         cidr=self.subnet,
-                                                         allocation_pool_start=self.ip_start,
-                                                         allocation_pool_end=self.ip_end,
-                                                         gateway_ip=self.gateway)
+            chameleon_subnet = self._chi_site.create_subnet(self.subnet_name, chameleon_network_id,
+                                                            cidr=self.subnet,
+                                                            allocation_pool_start=self.ip_start,
+                                                            allocation_pool_end=self.ip_end,
+                                                            gateway_ip=self.gateway)
             self.logger.info(f'Created subnet {self.subnet_name}')
 
         self.logger.debug(f'Subnet: {chameleon_subnet}')
         chameleon_router = None
 
         # we do not use get as it throws an exception if not found. So we list them
-        for router in chi.network.list_routers():
+        for router in self._chi_site.list_routers():
             if router['name'] == self.router_name:
                 chameleon_router = router
                 break
@@ -146,14 +140,14 @@ class ChiNetwork(Network):
             self.logger.info(f'Router already created: {self.router_name}')
             self.logger.debug(f'Router: {chameleon_router}')
         else:
-            chameleon_router = chi.network.create_router(self.router_name, gw_network_name='public')
+            chameleon_router = self._chi_site.create_router(self.router_name, gw_network_name='public')
             self.logger.info(f'Router created: {self.router_name}')
-            chi.network.add_subnet_to_router_by_name(self.router_name, self.subnet_name)
+            self._chi_site.add_subnet_to_router_by_name(self.router_name, self.subnet_name)
             self.logger.info(f'Attached subnet {self.subnet_name} to router  {self.router_name}')
             self.logger.debug(f'Router: {chameleon_router}')
 
     def update_route(self, *, subnet: str, gateway_ip: str):
-        chameleon_subnet = chi.network.get_subnet(self.subnet_name)
+        chameleon_subnet = self._chi_site.get_subnet(self.subnet_name)
         body = {
             "subnet": {
                 "host_routes": [
@@ -165,20 +159,16 @@ class ChiNetwork(Network):
             }
         }
 
-        chi.neutron().update_subnet(subnet=chameleon_subnet['id'], body=body)
+        self._chi_site.update_subnet(chameleon_subnet['id'], body)
 
     def _delete(self):
-        chi.set('project_name', self.project_name)
-        chi.set('project_domain_name', 'default')
-        chi.use_site(self.site)
-
         from neutronclient.common.exceptions import NotFound
 
         try:
             self.logger.debug(f"Removing subnet {self.subnet_name} from router {self.router_name}")
-            subnet_id = chi.network.get_subnet_id(self.subnet_name)
-            router_id = chi.network.get_router_id(self.router_name)
-            chi.network.remove_subnet_from_router(router_id, subnet_id)
+            subnet_id = self._chi_site.get_subnet_id(self.subnet_name)
+            router_id = self._chi_site.get_router_id(self.router_name)
+            self._chi_site.remove_subnet_from_router(router_id, subnet_id)
             self.logger.info(f"Removed subnet {self.subnet_name} from router {self.router_name}")
         except NotFound:
             pass
@@ -188,8 +178,8 @@ class ChiNetwork(Network):
 
         if INCLUDE_ROUTER:
             try:
-                router_id = chi.network.get_router_id(self.router_name)
-                chi.network.delete_router(router_id)
+                router_id = self._chi_site.get_router_id(self.router_name)
+                self._chi_site.delete_router(router_id)
                 self.logger.info(f"Deleted router  {self.router_name} net_id={router_id}")
             except NotFound:
                 pass
@@ -198,8 +188,8 @@ class ChiNetwork(Network):
                     raise re
 
         try:
-            subnet_id = chi.network.get_subnet_id(self.subnet_name)
-            chi.network.delete_subnet(subnet_id)
+            subnet_id = self._chi_site.get_subnet_id(self.subnet_name)
+            self._chi_site.delete_subnet(subnet_id)
             self.logger.info(f"Deleted subnet  {self.subnet_name} net_id={subnet_id}")
         except NotFound:
             pass
@@ -208,8 +198,8 @@ class ChiNetwork(Network):
                 raise re
 
         try:
-            net_id = chi.server.get_network_id(self.name)
-            chi.network.delete_network(net_id)
+            net_id = self._chi_site.get_network_id(self.name)
+            self._chi_site.delete_network(net_id)
             self.logger.info(f"Deleted network {self.name} net_id={net_id}")
         except NotFound:
             pass
@@ -23,18 +23,16 @@
 #
 # Author Komal Thareja (kthare10@renci.org)
 import logging
-import os
 import time
 
 import chi
+import chi.lease
 import chi.server
-import chi.clients
-import chi.network
 
 from fabfed.model import Node
 import fabfed.provider.chi.chi_util as util
 from fabfed.util.constants import Constants
-from .chi_constants import INCLUDE_ROUTER
+from .chi_constants import INCLUDE_ROUTER, DEFAULT_NODE_TYPE
 
 from fabfed.util.utils import get_logger
 
@@ -43,22 +41,28 @@ logger: logging.Logger = get_logger()
 
 class ChiNode(Node):
     def __init__(self, *, label, name: str, image: str, site: str, flavor: str, project_name: str,
-                 key_pair: str, network: str):
+                 key_pair: str, network: str, chi_site: util.ChiSite, keyfile: str,
+                 lease_helper: util.LeaseHelper = None):
         super().__init__(label=label, name=name, image=image, site=site, flavor=flavor)
         self.project_name = project_name
         self.key_pair = key_pair
         self.network = network
         self.logger = logger
-        self.keyfile = os.environ['OS_SLICE_PRIVATE_KEY_FILE']
+        self.keyfile = keyfile
+        self._chi_site = chi_site
         self._retry = 10
         self.username = "cc"
         self.user = self.username
         self.state = None
-        self.lease_name = f'{self.name}-lease'
+        self.lease_name = lease_helper.lease_name if lease_helper else f'{self.name}-lease'
         self.addresses = []
         self.reservations = []
-        chi.lease.add_node_reservation(self.reservations, count=1, node_type="compute_cascadelake_r")
-        self._lease_helper = util.LeaseHelper(lease_name=self.lease_name, logger=self.logger)
+        chi.lease.add_node_reservation(self.reservations, count=1, node_type=DEFAULT_NODE_TYPE)
+
+        # A lease helper passed in is shared by a group of nodes. The provider creates and deletes that lease.
+        self._owns_lease = lease_helper is None
+        self._lease_helper = lease_helper or util.LeaseHelper(lease_name=self.lease_name, chi_site=chi_site,
+                                                              logger=self.logger)
         self.id = ''
         self.dataplane_ipv4 = None
 
@@ -85,26 +89,22 @@ class ChiNode(Node):
         self.id = self.get_reservation_id()
 
     def __create_kvm(self):
-        return chi.server.create_server(server_name=self.name, image_name=self.image,
-                                        network_name=self.network, key_name=self.key_pair,
-                                        flavor_name=self.flavor)
+        return self._chi_site.create_server(server_name=self.name, image_name=self.image,
+                                            network_name=self.network, key_name=self.key_pair,
+                                            flavor_name=self.flavor)
 
     def __create_baremetal(self):
-        return chi.server.create_server(server_name=self.name, image_name=self.image,
-                                        network_name=self.network, key_name=self.key_pair,
-                                        reservation_id=self._lease_helper.get_reservation_id())
+        return self._chi_site.create_server(server_name=self.name, image_name=self.image,
+                                            network_name=self.network, key_name=self.key_pair,
+                                            reservation_id=self._lease_helper.get_reservation_id())
 
     def create(self):
-        chi.set('project_name', self.project_name)
-        chi.set('project_domain_name', 'default')
-
-        if self.site != "KVM@TACC":
-            chi.use_site(self.site)
+        if self.site != "KVM@TACC" and self._owns_lease:
             self._lease_helper.create_lease_if_needed(reservations=self.reservations, retry=self._retry)
 
         try:
             self.logger.info(f"Checking if node {self.name} exists")
-            node_id = chi.server.get_server_id(self.name)
+            node_id = self._chi_site.get_server_id(self.name)
         except ValueError as e:
             self.logger.warning(f"Error occurred for {self.name} {e}. Will attempt to create ")
             node = self.__create_kvm() if self.site == "KVM@TACC" else self.__create_baremetal()
@@ -113,16 +113,12 @@ class ChiNode(Node):
         self.logger.info(f"Got node {self.name} with {node_id}")
 
     def wait_for_active(self):
-        chi.set('project_name', self.project_name)
-        chi.set('project_domain_name', 'default')
-
-        if self.site != "KVM@TACC":
-            chi.use_site(self.site)
-
         self.logger.info(f"Waiting for node {self.name} to be Active!")
-        node_id = chi.server.get_server_id(self.name)
-        chi.server.wait_for_active(node_id, timeout=(60 * 40))
-        node = chi.server.get_server(node_id)
+        node_id = self._chi_site.get_server_id(self.name)
+        node = self._chi_site.wait_for_active(node_id, timeout=(60 * 40))
+        self.handle_active(node)
+
+    def handle_active(self, node):
         self.__populate_state(node.to_dict())
 
         if not INCLUDE_ROUTER:
@@ -131,7 +127,7 @@ class ChiNode(Node):
         if not self.mgmt_ip:
             self.logger.info(f"Associating the Floating IP to {self.name}!")
             # We do not use chi.server.associate_floating_ip(server_id=node.id) as it stopped working
-            _neutron = chi.clients.neutron()
+            _neutron = self._chi_site.neutron()
             ips = _neutron.list_floatingips()['floatingips']
             unbound = (ip for ip in ips if ip['port_id'] is None)
 
@@ -142,12 +138,12 @@ class ChiNode(Node):
                 self.logger.info(f"Creating Floating IP for {self.name}")
                 fip = _neutron.create_floatingip({
                     "floatingip": {
-                        "floating_network_id": chi.network.get_network_id(chi.network.PUBLIC_NETWORK),
+                        "floating_network_id": self._chi_site.get_network_id("public"),
                     }
                 })["floatingip"]
                 self.logger.info(f"Created Floating IP for {self.name}:{fip}")
 
-            ports = chi.network.list_ports()
+            ports = self._chi_site.list_ports()
             port_id = None
 
             for port in ports:
@@ -180,16 +176,10 @@ class ChiNode(Node):
         chi.server.wait_for_tcp(self.mgmt_ip, 22, timeout=(60 * 40))
 
     def delete(self):
-        chi.set('project_name', self.project_name)
-        chi.set('project_domain_name', 'default')
-
-        if self.site != "KVM@TACC":
-            chi.use_site(self.site)
-
         try:
             self.logger.info(f"Disassociating floating ip if any. node: {self.name}")
-            node_id = chi.server.get_server_id(f"{self.name}")
-            node = chi.server.get_server(node_id)
+            node_id = self._chi_site.get_server_id(f"{self.name}")
+            node = self._chi_site.get_server(node_id)
             node_info = node.to_dict()
             addresses = node_info['addresses']
             network = list(addresses.keys())[0]
@@ -198,22 +188,23 @@ class ChiNode(Node):
             mgmt_ip = addresses[0] if addresses else None
 
             if mgmt_ip:
-                chi.server.detach_floating_ip(node_id, mgmt_ip)
+                self._chi_site.detach_floating_ip(mgmt_ip)
                 self.logger.info(f"Disassociated floating ip. node {self.name}")
         except Exception as e:
             self.logger.warning(f"Error occured while disassociating floating ip. node={self.name}:{e}")
 
         try:
-            node_id = chi.server.get_server_id(f"{self.name}")
+            node_id = self._chi_site.get_server_id(f"{self.name}")
 
             if node_id is not None:
                 self.logger.debug(f"Deleting node {self.name}")
-                chi.server.delete_server(server_id=node_id)
+                self._chi_site.delete_server(node_id)
                 self.logger.info(f"Deleted node {self.name}")
         except ValueError as ve:
             self.logger.warning(f"Error deleting node {self.name}: {ve}")
 
-        self._lease_helper.delete_lease()
+        if self._owns_lease:
+            self._lease_helper.delete_lease()
 
     def upload_file(self, local_file_path, remote_file_path, retry=3, retry_interval=10):
         self.logger.debug(f"upload node: {self.name}, local_file_path: {local_file_path}")
@@ -1,5 +1,4 @@
 import logging
-import os
 from typing import List
 
 import fabfed.provider.api.dependency_util as util
@@ -17,9 +16,9 @@ class ChiProvider(Provider):
     def __init__(self, *, type, label, name, config: dict[str, str]):
         super().__init__(type=type, label=label, name=name, logger=logger, config=config)
         self.helper = None
+        self._group_leases = {}
 
     def setup_environment(self):
-        site = "CHI@UC"
         config = self.config
 
         for attr in CHI_CONF_ATTRS:
@@ -57,24 +56,6 @@ class ChiProvider(Provider):
 
         self.config[CHI_SLICE_PUBLIC_KEY_LOCATION] = pub_key
 
-        site_id = self.__get_site_identifier(site=site)
-        os.environ['OS_AUTH_URL'] = config.get(CHI_AUTH_URL, DEFAULT_AUTH_URLS)[site_id]
-        os.environ['OS_IDENTITY_API_VERSION'] = "3"
-        os.environ['OS_INTERFACE'] = "public"
-        os.environ['OS_PROJECT_ID'] = config.get(CHI_PROJECT_ID)[site_id]
-        os.environ['OS_USERNAME'] = config.get(CHI_USER)
-        os.environ['OS_PROTOCOL'] = "openid"
-        os.environ['OS_AUTH_TYPE'] = "v3oidcpassword"
-        os.environ['OS_PASSWORD'] = config.get(CHI_PASSWORD)
-        os.environ['OS_IDENTITY_PROVIDER'] = "chameleon"
-        os.environ['OS_DISCOVERY_ENDPOINT'] = DEFAULT_DISCOVERY_URL
-        os.environ['OS_CLIENT_ID'] = config.get(CHI_CLIENT_ID, DEFAULT_CLIENT_IDS)[site_id]
-        os.environ['OS_ACCESS_TOKEN_TYPE'] = "access_token"
-        os.environ['OS_CLIENT_SECRET'] = "none"
-        os.environ['OS_REGION_NAME'] = site
-        os.environ['OS_SLICE_PRIVATE_KEY_FILE'] = config.get(CHI_SLICE_PRIVATE_KEY_LOCATION)
-        os.environ['OS_SLICE_PUBLIC_KEY_FILE'] = config.get(CHI_SLICE_PUBLIC_KEY_LOCATION)
-
     def do_validate_resource(self, *, resource: dict):
         label = resource[Constants.LABEL]
         rtype = resource.get(Constants.RES_TYPE)
@@ -95,11 +76,23 @@ class ChiProvider(Provider):
     def supports_modify(self):
         return True
 
-    def _setup_environment(self, *, site: str):
+    def get_site(self, site: str):
+        from .chi_util import get_site
+
         site_id = self.__get_site_identifier(site=site)
-        os.environ['OS_AUTH_URL'] = self.config.get(CHI_AUTH_URL, DEFAULT_AUTH_URLS)[site_id]
-        os.environ['OS_PROJECT_ID'] = self.config.get(CHI_PROJECT_ID)[site_id]
-        os.environ['OS_CLIENT_ID'] = self.config.get(CHI_CLIENT_ID, DEFAULT_CLIENT_IDS)[site_id]
+        return get_site(site=site,
+                        auth_url=self.config.get(CHI_AUTH_URL, DEFAULT_AUTH_URLS)[site_id],
+                        project_id=self.config.get(CHI_PROJECT_ID)[site_id],
+                        client_id=self.config.get(CHI_CLIENT_ID, DEFAULT_CLIENT_IDS)[site_id],
+                        user=self.config.get(CHI_USER),
+                        password=self.config.get(CHI_PASSWORD))
+
+    @property
+    def private_key_file_location(self):
+        return self.config.get(CHI_SLICE_PRIVATE_KEY_LOCATION)
+
+    def group_lease_name(self, resource: dict):
+        return f"{self.name}-{resource[Constants.RES_NAME_PREFIX]}-lease"
 
     @staticmethod
     def __get_site_identifier(*, site: str):
@@ -125,7 +118,6 @@ class ChiProvider(Provider):
         if not creation_details['in_config_file']:
             return
 
-        self._setup_environment(site=site)
         key_pair = self.config[CHI_KEY_PAIR]
         project_name = self.config[CHI_PROJECT_NAME]
 
@@ -153,7 +145,7 @@ class ChiProvider(Provider):
 
             net = ChiNetwork(label=label, name=net_name, site=site,
                              layer3=layer3, stitch_info=stitch_infos[0],
-                             project_name=project_name, vlan=vlan)
+                             project_name=project_name, vlan=vlan, chi_site=self.get_site(site))
             self._networks.append(net)
 
             if self.resource_listener:
@@ -169,6 +161,17 @@ class ChiProvider(Provider):
             node_count = resource[Constants.RES_COUNT]
             image = resource.get(Constants.RES_IMAGE, DEFAULT_IMAGE)
             flavor = resource.get(Constants.RES_FLAVOR, DEFAULT_FLAVOR)
+            lease_helper = None
+
+            if resource.get(CHI_GROUP_LEASE) and site != "KVM@TACC" and node_count > 0:
+                import chi.lease
+                from .chi_util import LeaseHelper
+
+                reservations = []
+                chi.lease.add_node_reservation(reservations, count=node_count, node_type=DEFAULT_NODE_TYPE)
+                lease_helper = LeaseHelper(lease_name=self.group_lease_name(resource), chi_site=self.get_site(site),
+                                           logger=self.logger)
+                self._group_leases[label] = (lease_helper, reservations)
 
             for n in range(0, node_count):
                 node_name = self.resource_name(resource, n)
@@ -177,7 +180,9 @@ class ChiProvider(Provider):
                 from fabfed.provider.chi.chi_node import ChiNode
 
                 node = ChiNode(label=label, name=node_name, image=image, site=site, flavor=flavor,
-                               key_pair=key_pair, network=network, project_name=project_name)
+                               key_pair=key_pair, network=network, project_name=project_name,
+                               chi_site=self.get_site(site), keyfile=self.private_key_file_location,
+                               lease_helper=lease_helper)
                 self.nodes.append(node)
 
                 if self.resource_listener:
@@ -185,7 +190,6 @@ class ChiProvider(Provider):
 
     def do_create_resource(self, *, resource: dict):
         site = resource.get(Constants.RES_SITE)
-        self._setup_environment(site=site)
         label = resource.get(Constants.LABEL)
         rtype = resource.get(Constants.RES_TYPE)
 
@@ -201,7 +205,8 @@ class ChiProvider(Provider):
                     project_name = self.config[CHI_PROJECT_NAME]
 
                     net = ChiNetwork(label=label, name=net_name, site=site,
-                                     layer3=layer3, stitch_info=None, project_name=project_name, vlan=-1)
+                                     layer3=layer3, stitch_info=None, project_name=project_name, vlan=-1,
+                                     chi_site=self.get_site(site))
                     net.delete()
 
                     self.logger.info(f"Deleted network: {net_name} at site {site}")
@@ -231,7 +236,8 @@ class ChiProvider(Provider):
                         from fabfed.provider.chi.chi_node import ChiNode
 
                         node = ChiNode(label=label, name=node_name, image='', site=site, flavor='',
-                                       key_pair=key_pair, network='', project_name=project_name)
+                                       key_pair=key_pair, network='', project_name=project_name,
+                                       chi_site=self.get_site(site), keyfile=self.private_key_file_location)
                         node.delete()
 
                         self.logger.info(f"Deleted node: {node_name} at site {site}")
@@ -239,12 +245,24 @@ class ChiProvider(Provider):
                         if self.resource_listener:
                             self.resource_listener.on_deleted(source=self, provider=self, resource=node)
 
-            for node in temp:
-                node.create()
+            if label in self._group_leases and temp:
+                lease_helper, reservations = self._group_leases[label]
+                lease_helper.create_lease_if_needed(reservations=reservations, retry=10)
+
+            if len(temp) <= 1:
+                for node in temp:
+                    node.create()
+
+                return
+
+            from fabfed.util.utils import ContextThreadPoolExecutor
+
+            with ContextThreadPoolExecutor(max_workers=len(temp)) as executor:
+                for future in [executor.submit(node.create) for node in temp]:
+                    future.result()
 
     def do_wait_for_create_resource(self, *, resource: dict):
         site = resource.get(Constants.RES_SITE)
-        self._setup_environment(site=site)
         label = resource.get(Constants.LABEL)
         rtype = resource.get(Constants.RES_TYPE)
 
@@ -253,17 +271,19 @@ class ChiProvider(Provider):
         else:
             from fabfed.provider.chi.chi_node import ChiNode
 
-            temp: List[ChiNode] = [node for node in self._nodes if node.label == label]
-
-            for node in temp:
-                node.wait_for_active()
+            from .chi_util import ChiNodeGroupWaiter
 
-            for node in temp:
-                node.wait_for_ssh()
+            temp: List[ChiNode] = [node for node in self._nodes if node.label == label]
 
+            def on_ready(node):
                 if self.resource_listener:
                     self.resource_listener.on_created(source=self, provider=self, resource=node)
 
+            self.logger.info(f"Waiting on {len(temp)} node(s) of {label} to be active and reachable over ssh")
+            waiter = ChiNodeGroupWaiter(chi_site=self.get_site(site), nodes=temp, logger=self.logger,
+                                        check_ssh=INCLUDE_ROUTER)
+            waiter.wait(on_ready)
+
     def do_handle_externally_depends_on(self, *, resource: Resource, dependee: Resource):
         self.logger.info(f"NEED TO DO SOME POST PROCESSING  {resource}: {dependee}")
         # I have the code to add the route.
@@ -271,7 +291,6 @@ class ChiProvider(Provider):
     # noinspection PyTypeChecker
     def do_delete_resource(self, *, resource: dict):
         site = resource.get(Constants.RES_SITE)
-        self._setup_environment(site=site)
         key_pair = self.config[CHI_KEY_PAIR]
         project_name = self.config[CHI_PROJECT_NAME]
         label = resource.get(Constants.LABEL)
@@ -286,7 +305,8 @@ class ChiProvider(Provider):
             layer3 = Config("", "", {})
 
             net = ChiNetwork(label=label, name=net_name, site=site,
-                             layer3=layer3, stitch_info=None, project_name=project_name, vlan=-1)
+                             layer3=layer3, stitch_info=None, project_name=project_name, vlan=-1,
+                             chi_site=self.get_site(site))
             net.delete()
             self.logger.info(f"Deleted network: {net_name} at site {site}")
 
@@ -302,9 +322,17 @@ class ChiProvider(Provider):
                 from fabfed.provider.chi.chi_node import ChiNode
 
                 node = ChiNode(label=label, name=node_name, image=None, site=site, flavor=None,
-                               key_pair=key_pair, network=None, project_name=project_name)
+                               key_pair=key_pair, network=None, project_name=project_name,
+                               chi_site=self.get_site(site), keyfile=self.private_key_file_location)
                 node.delete()
                 self.logger.info(f"Deleted node: {node_name} at site {site}")
 
                 if self.resource_listener:
                     self.resource_listener.on_deleted(source=self, provider=self, resource=node)
+
+            if site != "KVM@TACC":
+                from .chi_util import LeaseHelper
+
+                # The nodes may have shared a group lease. Deleting it is a no op if there is none.
+                LeaseHelper(lease_name=self.group_lease_name(resource), chi_site=self.get_site(site),
+                            logger=self.logger).delete_lease()
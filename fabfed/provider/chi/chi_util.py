@@ -1,13 +1,359 @@
 import logging
+import threading
+import time
 
 import chi
+import chi.clients
 import chi.lease
 import paramiko
 
+from .chi_constants import DEFAULT_DISCOVERY_URL, CHI_POLL_INTERVAL, CHI_WAIT_TIMEOUT
+
+
+class ChiSite:
+    """
+    The authenticated session and clients of a site and project. The session is created once and the clients
+    are thread safe, so several sites can be worked on in parallel without switching the global chi context.
+    The methods mirror the chi functions fabfed uses and raise the same errors.
+    """
+
+    def __init__(self, *, site: str, auth_url: str, project_id: str, client_id: str, user: str, password: str):
+        self.site = site
+        self.auth_url = auth_url
+        self.project_id = project_id
+        self.client_id = client_id
+        self.user = user
+        self.password = password
+        self._session = None
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                from keystoneauth1 import adapter, session
+                from keystoneauth1.identity.v3 import OidcPassword
+
+                auth = OidcPassword(auth_url=self.auth_url,
+                                    identity_provider="chameleon",
+                                    protocol="openid",
+                                    client_id=self.client_id,
+                                    client_secret="none",
+                                    discovery_endpoint=DEFAULT_DISCOVERY_URL,
+                                    access_token_type="access_token",
+                                    username=self.user,
+                                    password=self.password,
+                                    project_id=self.project_id)
+                self._session = adapter.Adapter(session.Session(auth=auth), interface="public",
+                                                region_name=self.site)
+
+            return self._session
+
+    def _client(self, name: str):
+        session = self.session
+
+        with self._lock:
+            if name not in self._clients:
+                self._clients[name] = getattr(chi.clients, name)(session=session)
+
+            return self._clients[name]
+
+    def nova(self):
+        return self._client('nova')
+
+    def neutron(self):
+        return self._client('neutron')
+
+    def glance(self):
+        return self._client('glance')
+
+    def blazar(self):
+        return self._client('blazar')
+
+    # Leases
+    def get_lease(self, lease_name: str) -> dict:
+        matching = [lease for lease in self.blazar().lease.list() if lease["name"] == lease_name]
+
+        if not matching:
+            raise ValueError(f"No leases found for name {lease_name}")
+        elif len(matching) > 1:
+            raise ValueError(f"Multiple leases found for name {lease_name}")
+
+        return self.blazar().lease.get(matching[0]["id"])
+
+    def create_lease(self, lease_name: str, reservations):
+        start_date, end_date = chi.lease.lease_duration(days=1)
+        return self.blazar().lease.create(name=lease_name, start=start_date, end=end_date,
+                                          reservations=reservations, events=[])
+
+    def delete_lease(self, lease_name: str):
+        self.blazar().lease.delete(self.get_lease(lease_name)["id"])
+
+    def update_lease_reservation(self, lease_id: str, reservation_id: str, **values):
+        return self.blazar().lease.update(lease_id, reservations=[dict(id=reservation_id, **values)])
+
+    def wait_for_lease_active(self, lease_name: str, interval: int = CHI_POLL_INTERVAL,
+                              timeout: int = CHI_WAIT_TIMEOUT):
+        deadline = time.time() + timeout
+
+        while True:
+            lease = self.get_lease(lease_name)
+
+            if lease["status"] == "ACTIVE":
+                return lease
+            elif lease["status"] == "ERROR":
+                raise RuntimeError("Lease went into ERROR state")
+
+            if time.time() + interval > deadline:
+                break
+
+            time.sleep(interval)
+
+        raise TimeoutError("Lease failed to start")
+
+    # Servers
+    def get_server_id(self, name: str) -> str:
+        servers = [s for s in self.nova().servers.list() if s.name == name]
+
+        if not servers:
+            raise ValueError(f'No matching servers found for name "{name}"')
+        elif len(servers) > 1:
+            raise ValueError(f'Multiple matching servers found for name "{name}"')
+
+        return servers[0].id
+
+    def get_server(self, server_id: str):
+        return self.nova().servers.get(server_id)
+
+    def get_image_id(self, name: str) -> str:
+        images = list(self.glance().images.list(filters={'name': name}))
+
+        if not images:
+            raise ValueError(f'No images found matching name "{name}"')
+        elif len(images) > 1:
+            raise ValueError(f'Multiple images found matching name "{name}"')
+
+        return images[0].id
+
+    def get_flavor_id(self, name: str) -> str:
+        flavor = next((f.id for f in self.nova().flavors.list() if f.name == name), None)
+
+        if not flavor:
+            raise ValueError(f'No flavors found matching name "{name}"')
+
+        return flavor
+
+    def create_server(self, *, server_name: str, image_name: str, network_name: str, key_name: str,
+                      flavor_name: str = None, reservation_id: str = None):
+        flavor_id = self.get_flavor_id(flavor_name) if flavor_name else self.nova().flavors.list()[0].id
+        scheduler_hints = {'reservation': reservation_id} if reservation_id else {}
+
+        return self.nova().servers.create(name=server_name,
+                                          image=self.get_image_id(image_name),
+                                          flavor=flavor_id,
+                                          scheduler_hints=scheduler_hints,
+                                          key_name=key_name,
+                                          nics=[{'net-id': self.get_network_id(network_name), 'v4-fixed-ip': ''}])
+
+    def wait_for_active(self, server_id: str, timeout: int):
+        deadline = time.time() + timeout
+
+        while time.time() < deadline:
+            server = self.get_server(server_id)
+
+            if server.status == 'ACTIVE':
+                return server
+            elif server.status == 'ERROR':
+                raise RuntimeError(f"Server {server_id} went into ERROR state")
+
+            time.sleep(10)
+
+        raise TimeoutError(f"Server {server_id} did not become active")
+
+    def delete_server(self, server_id: str):
+        return self.nova().servers.delete(server_id)
+
+    def detach_floating_ip(self, floating_ip_address: str):
+        for fip in self.neutron().list_floatingips(floating_ip_address=floating_ip_address)['floatingips']:
+            self.neutron().update_floatingip(fip['id'], body={"floatingip": {"port_id": None}})
+
+    # Networks
+    def _resolve_id(self, resource: str, name: str) -> str:
+        resources = [x for x in getattr(self.neutron(), f'list_{resource}')(name=name)[resource]
+                     if x['name'] == name]
+
+        if not resources:
+            raise RuntimeError(f'No {resource} found with name {name}')
+        elif len(resources) > 1:
+            raise RuntimeError(f'Found multiple {resource} with name {name}')
+
+        return resources[0]['id']
+
+    def _resolve_resource(self, resource: str, name: str) -> dict:
+        resource_id = self._resolve_id(f'{resource}s', name)
+        return getattr(self.neutron(), f'show_{resource}')(resource_id)[resource]
+
+    def get_network(self, name: str) -> dict:
+        return self._resolve_resource('network', name)
+
+    def get_network_id(self, name: str) -> str:
+        return self._resolve_id('networks', name)
+
+    def delete_network(self, network_id: str):
+        return self.neutron().delete_network(network_id)
+
+    def get_subnet(self, name: str) -> dict:
+        return self._resolve_resource('subnet', name)
+
+    def get_subnet_id(self, name: str) -> str:
+        return self._resolve_id('subnets', name)
+
+    def create_subnet(self, subnet_name: str, network_id: str, *, cidr, allocation_pool_start=None,
+                      allocation_pool_end=None, gateway_ip=None) -> dict:
+        subnet = {'name': subnet_name, 'cidr': cidr, 'ip_version': 4, 'network_id': network_id}
+
+        if gateway_ip:
+            subnet['gateway_ip'] = gateway_ip
+
+        if allocation_pool_start and allocation_pool_end:
+            subnet['allocation_pools'] = [{"start": allocation_pool_start, "end": allocation_pool_end}]
+
+        return self.neutron().create_subnet(body={'subnets': [subnet]})['subnets'][0]
+
+    def update_subnet(self, subnet_id: str, body: dict):
+        return self.neutron().update_subnet(subnet=subnet_id, body=body)
+
+    def delete_subnet(self, subnet_id: str):
+        return self.neutron().delete_subnet(subnet_id)
+
+    def list_ports(self):
+        return self.neutron().list_ports()["ports"]
+
+    def list_routers(self):
+        return self.neutron().list_routers()["routers"]
+
+    def get_router_id(self, name: str) -> str:
+        return self._resolve_id('routers', name)
+
+    def create_router(self, router_name: str, gw_network_name: str = None) -> dict:
+        router = {"name": router_name, "admin_state_up": True}
+
+        if gw_network_name:
+            router["external_gateway_info"] = {"network_id": self.get_network_id(gw_network_name)}
+
+        return self.neutron().create_router(body={"router": router})["router"]
+
+    def delete_router(self, router_id: str):
+        return self.neutron().delete_router(router_id)
+
+    def add_subnet_to_router_by_name(self, router_name: str, subnet_name: str):
+        return self.neutron().add_interface_router(self.get_router_id(router_name),
+                                                   {'subnet_id': self.get_subnet_id(subnet_name)})
+
+    def remove_subnet_from_router(self, router_id: str, subnet_id: str):
+        return self.neutron().remove_interface_router(router_id, {'subnet_id': subnet_id})
+
+
+_sites = {}
+_sites_lock = threading.Lock()
+
+
+def get_site(*, site: str, auth_url: str, project_id: str, client_id: str, user: str, password: str) -> ChiSite:
+    key = (site, project_id, user)
+
+    with _sites_lock:
+        if key not in _sites:
+            _sites[key] = ChiSite(site=site, auth_url=auth_url, project_id=project_id, client_id=client_id,
+                                  user=user, password=password)
+
+        return _sites[key]
+
+
+def is_port_open(host: str, port: int, timeout: float = 2) -> bool:
+    import socket
+
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+class ChiNodeGroupWaiter:
+    """
+    Waits on the nodes of a site until they are active and reachable over ssh, using one list servers call
+    per tick for all of them. on_ready is called for each node as soon as it is ready. Nodes that fail or
+    time out do not hold up the others; the first error is raised once no node is left to wait on.
+    """
+
+    def __init__(self, *, chi_site: ChiSite, nodes: list, logger: logging.Logger, check_ssh: bool = True,
+                 interval: int = CHI_POLL_INTERVAL, timeout: int = CHI_WAIT_TIMEOUT):
+        self.chi_site = chi_site
+        self.nodes = nodes
+        self.logger = logger
+        self.check_ssh = check_ssh
+        self.interval = interval
+        self.timeout = timeout
+        self.list_calls = 0
+
+    def wait(self, on_ready):
+        deadline = time.time() + self.timeout
+        waiting_active = list(self.nodes)
+        waiting_ssh = []
+        error = None
+
+        while waiting_active or waiting_ssh:
+            if waiting_active:
+                servers = {server.name: server for server in self.chi_site.nova().servers.list()}
+                self.list_calls += 1
+
+                for node in list(waiting_active):
+                    server = servers.get(node.name)
+
+                    if server is None or server.status not in ['ACTIVE', 'ERROR']:
+                        continue
+
+                    waiting_active.remove(node)
+
+                    try:
+                        if server.status == 'ERROR':
+                            raise RuntimeError(f"Server {node.name} went into ERROR state")
+
+                        node.handle_active(server)
+
+                        if self.check_ssh and not node.mgmt_ip:
+                            raise RuntimeError(f"Node {node.name} unable to test ssh connection. No management ip")
+
+                        self.logger.info(f"Node {node.name} is active: mgmt_ip={node.mgmt_ip}")
+                        waiting_ssh.append(node)
+                    except Exception as e:
+                        self.logger.error(f"Error while waiting on node {node.name}: {e}")
+                        error = error or e
+
+            for node in list(waiting_ssh):
+                if not self.check_ssh or is_port_open(node.mgmt_ip, 22):
+                    waiting_ssh.remove(node)
+                    on_ready(node)
+
+            if not waiting_active and not waiting_ssh:
+                break
+
+            if time.time() + self.interval > deadline:
+                names = [node.name for node in waiting_active + waiting_ssh]
+                error = error or TimeoutError(f"Timed out waiting on nodes {names}")
+                break
+
+            time.sleep(self.interval)
+
+        if error:
+            raise error
+
 
 class LeaseHelper:
-    def __init__(self, *, lease_name: str, logger: logging.Logger):
+    def __init__(self, *, lease_name: str, chi_site: ChiSite, logger: logging.Logger):
         self.lease_name = lease_name
+        self.chi_site = chi_site
         self.logger = logger
         self.lease = None
 
@@ -16,7 +362,7 @@ class LeaseHelper:
 
     def delete_lease(self):
         try:
-            chi.lease.delete_lease(self.lease_name)
+            self.chi_site.delete_lease(self.lease_name)
             self.logger.info(f"Deleted lease {self.lease_name}")
         except ValueError as ve:
             if "No leases found for name" not in str(ve):
@@ -24,11 +370,46 @@ class LeaseHelper:
 
         self.lease = None
 
+    @staticmethod
+    def _host_reservation(reservations):
+        hosts = [r for r in reservations if r.get("resource_type") == "physical:host"]
+        return hosts[0] if len(hosts) == 1 else None
+
+    def _check_hosts(self, reservations):
+        wanted = self._host_reservation(reservations)
+        current = self._host_reservation(self.lease["reservations"])
+
+        if wanted and current and (int(current["min"]), int(current["max"])) != (wanted["min"], wanted["max"]):
+            raise Exception(f"Lease {self.lease_name} reserves {current['max']} host(s) but {wanted['max']} are "
+                            f"needed. Destroy the nodes sharing it and apply again.")
+
+    def _resize_if_needed(self, reservations) -> bool:
+        """
+        An existing lease shared by a group of nodes is resized in place when the group's count changed,
+        since its servers are still using it. Returns True when the lease was updated.
+        """
+        wanted = self._host_reservation(reservations)
+        current = self._host_reservation(self.lease["reservations"])
+
+        if not wanted or not current or (int(current["min"]), int(current["max"])) == (wanted["min"], wanted["max"]):
+            return False
+
+        self.logger.info(f"Resizing lease {self.lease_name} from {current['max']} to {wanted['max']} host(s)")
+
+        try:
+            self.chi_site.update_lease_reservation(self.lease["id"], current["id"],
+                                                   min=wanted["min"], max=wanted["max"])
+        except Exception as e:
+            raise Exception(f"Lease {self.lease_name} reserves {current['max']} host(s) but {wanted['max']} are "
+                            f"needed and it could not be resized: {e}. Destroy the nodes sharing it and apply again.")
+
+        return True
+
     def create_lease_if_needed(self, *, reservations, retry):
         self.lease = None
 
         try:
-            self.lease = chi.lease.get_lease(self.lease_name)
+            self.lease = self.chi_site.get_lease(self.lease_name)
         except ValueError as ve:
             if "No leases found for name" not in str(ve):
                 raise ve
@@ -39,7 +420,7 @@ class LeaseHelper:
         if self.lease:
             self.logger.info(f"Found lease {self.lease_name}: {self.lease['status']}")
 
-            if self.lease["status"] == 'ACTIVE':
+            if self.lease["status"] == 'ACTIVE' and not self._resize_if_needed(reservations):
                 return
 
             if self.lease["status"] == 'ERROR' or self.lease["status"] == 'TERMINATED':
@@ -52,7 +433,7 @@ class LeaseHelper:
 
         if not self.lease:
             self.logger.info(f"Creating lease {self.lease_name}:{reservations}")
-            chi.lease.create_lease(lease_name=self.lease_name, reservations=reservations)
+            self.chi_site.create_lease(self.lease_name, reservations)
 
         assert retry > 0
 
@@ -60,10 +441,11 @@ class LeaseHelper:
 
         for i in range(retry):
             try:
-                chi.lease.wait_for_active(self.lease_name)
-                self.lease = chi.lease.get_lease(self.lease_name)
+                self.chi_site.wait_for_lease_active(self.lease_name)
+                self.lease = self.chi_site.get_lease(self.lease_name)
                 self.logger.debug(f"lease {self.lease}: status={self.lease['status']}")
                 assert self.lease["status"] == 'ACTIVE'
+                self._check_hosts(reservations)
                 return
             except ConnectFailure as cf:
                 self.logger.warning(f"Error while waiting for {self.lease_name}: tried={i + 1} {cf}")
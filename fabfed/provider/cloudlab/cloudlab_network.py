@@ -40,13 +40,11 @@ class CloudNetwork(Network):
         return params
 
     def create(self):
-        import time
         import emulab_sslxmlrpc.client.api as api
         import emulab_sslxmlrpc.xmlrpc as xmlrpc
 
-        server = self.provider.rpc_server()
         exp_params = self.provider.experiment_params(self.name)
-        exitval, response = api.experimentStatus(server, exp_params).apply()
+        exitval, response = self.provider.rpc(api.experimentStatus, exp_params)
 
         if exitval == xmlrpc.RESPONSE_SEARCHFAILED:
             logger.debug(f"Network {self.name} not found, creating...")
@@ -66,7 +64,7 @@ class CloudNetwork(Network):
             bindings['ip_start'] = str(ip_start)
             params['bindings'] = json.dumps(bindings)
             logger.info(f"Network {self.name} not found, creating... {params}")
-            exitval, response = api.startExperiment(server, params).apply()
+            exitval, response = self.provider.rpc(api.startExperiment, params)
 
             if exitval:
                 raise CloudlabException(exitval=exitval, response=response)
@@ -77,76 +75,10 @@ class CloudNetwork(Network):
             raise CloudlabException(exitval=exitval, response=response)
 
     def wait_for_create(self):
-        import time
-        import emulab_sslxmlrpc.client.api as api
-        import emulab_sslxmlrpc.xmlrpc as xmlrpc
-
-        server = self.provider.rpc_server()
-        exp_params = self.provider.experiment_params(self.name)
-        exitval, response = api.experimentStatus(server, exp_params).apply()
-
-        for attempt in range(CLOUDLAB_RETRY):
-            exitval, response = api.experimentStatus(server, exp_params).apply()
-
-            # sometimes the response is not what we expect (network glitch). We keep checking status ...
-            if response and hasattr(response, "value"):
-                if exitval:
-                    code = response.value
-
-                    if code == api.GENIRESPONSE_REFUSED or code == api.GENIRESPONSE_NETWORK_ERROR:
-                        logger.debug("Server is offline, waiting for a bit")
-                    elif code == api.GENIRESPONSE_BUSY:
-                        logger.debug("Experiment is busy, waiting for a bit")
-                    elif code == api.GENIRESPONSE_SEARCHFAILED:
-                        raise CloudlabException(message="Experiment is gone", exitval=exitval, response=response)
-                    else:
-                        raise CloudlabException(exitval=exitval, response=response)
-                else:
-                    status = json.loads(response.value)
-                    logger.info(json.dumps(status, indent=2))
-
-                    if status["status"] == "failed":
-                        raise CloudlabException(exitval=exitval, response=response,
-                                                message="Experiment failed to instantiate")
-                    elif status["status"] == "ready":
-                        if "execute_status" not in status:
-                            logger.info("No execute service to wait for!")
-                            break
-
-                        total = status["execute_status"]["total"]
-                        finished = status["execute_status"]["finished"]
-
-                        if total != finished:
-                            logger.info("Still waiting for execute service to finish")
-                            continue
-
-                        logger.info("Execute services have finished")
-                        break
-
-            if response and hasattr(response, "value"):
-                logger.info(f"Still waiting for experiment to be ready exitval={exitval}:{response.value}")
-            else:
-                logger.warning(f"Still waiting for experiment to be ready exitval={exitval}:{response}")
-
-            time.sleep(CLOUDLAB_SLEEP_TIME)
-
-        if attempt == CLOUDLAB_RETRY:
-            raise CloudlabException("Please Apply Again. Giving up on waiting for experiment ...")
-
-        exitval, response = api.experimentManifests(server, exp_params).apply()
-
-        if exitval:
-            raise CloudlabException(exitval=exitval, response=response)
-
-        status = json.loads(response.value)
-        logger.debug(json.dumps(status, indent=2))
-        logger.info(f"STATUS_KEYS={status.keys()}")
-
-        import xmltodict
-
-        data_dict = xmltodict.parse(next(iter(status.values())))
-        logger.info(f"RSPEC: {json.dumps(data_dict['rspec'], indent=2)}")
-        link = data_dict['rspec']['link']
+        state = self.provider.wait_for_experiment(self.name)
+        logger.info(f"Experiment {self.name} is ready: {json.dumps(state.status, indent=2)}")
+        logger.info(f"RSPEC: {json.dumps(state.rspec, indent=2)}")
+        link = state.rspec['link']
 
         temp = dict(id=self.label, vlan=link['@vlantag'])
         temp.update(self.stitch_info.stitch_port['peer'])
@@ -156,7 +88,7 @@ class CloudNetwork(Network):
         if not [n for n in self.provider.nodes if n.net == self]:
             return
 
-        all_nodes = data_dict['rspec']['node']
+        all_nodes = state.manifest_nodes()
         nodes = [n for n in all_nodes if 'stitch' not in ['@component_manager_id']]
         n = nodes[0]
         self.stich_node_ip = n['interface']['ip']['@address']
@@ -169,18 +101,17 @@ class CloudNetwork(Network):
         import emulab_sslxmlrpc.xmlrpc as xmlrpc
         import time
 
-        server = self.provider.rpc_server()
         exp_params = self.provider.experiment_params(self.name)
-        exitval, response = api.experimentStatus(server, exp_params).apply()
+        exitval, response = self.provider.rpc(api.experimentStatus, exp_params)
 
         if exitval == xmlrpc.RESPONSE_SEARCHFAILED:
             return
 
-        exitval, response = api.terminateExperiment(server, exp_params).apply()
+        exitval, response = self.provider.rpc(api.terminateExperiment, exp_params)
 
         if exitval == xmlrpc.RESPONSE_SUCCESS:
             while True:
-                exitval, response = api.experimentStatus(server, exp_params).apply()
+                exitval, response = self.provider.rpc(api.experimentStatus, exp_params)
 
                 if exitval == xmlrpc.RESPONSE_SEARCHFAILED:
                     break
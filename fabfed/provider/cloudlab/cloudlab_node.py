@@ -1,5 +1,3 @@
-import json
-
 from fabfed.model import Node
 from fabfed.util.utils import get_logger
 from fabfed.util.constants import Constants
@@ -29,44 +27,23 @@ class CloudlabNode(Node):
         return self._net
 
     def create(self):
-        import emulab_sslxmlrpc.client.api as api
-
-        server = self.provider.rpc_server()
-        exp_params = self.provider.experiment_params(self.net.name)
-        exitval, response = api.experimentStatus(server, exp_params).apply()
-
-        if exitval:
-            raise CloudlabException(exitval=exitval, response=response)
-
-        status = json.loads(response.value)
-        logger.info(f"STATUS: {json.dumps(status, indent=2)}")
+        state = self.provider.experiment_state(self.net.name)
+        idx = int(self.name[self.name.rindex('-') + 1:])
+        node_info = state.node_infos.get("node" + str(idx))
 
-        if status['status'] != 'ready':
-            raise CloudlabException(message=f"Found experiment with status={status['status']}")
+        if not node_info:
+            status = state.status['status'] if state.status else None
+            raise CloudlabException(message=f"Node {self.name} is not up: experiment status={status}")
 
-        node_uris = list(status[AGGREGATE_STATUS].keys())
-        node_uri = [uri for uri in  node_uris if 'stitch' not in uri][0]
-        idx = int(self.name[self.name.rindex('-') + 1:])
-        node_info = status[AGGREGATE_STATUS][node_uri][NODES]["node" + str(idx)]
         logger.info(f"NODE_INFO {self.name}: {node_info}")
-
         self.mgmt_ip = node_info[IPV4]
         self.host = node_info[IPV4]
-        exitval, response = api.experimentManifests(server, exp_params).apply()
-
-        if exitval:
-            raise CloudlabException(exitval=exitval, response=response)
-
-        status = json.loads(response.value)
-
-        logger.debug(json.dumps(status, indent=2))
+        nodes = state.manifest_nodes(self._net.cluster)
 
-        import xmltodict
+        if len(nodes) <= idx:
+            state.rspec = self.provider.experiment_manifest(self.net.name)
+            nodes = state.manifest_nodes(self._net.cluster)
 
-        data_dict = xmltodict.parse(list(status.values())[0])
-        logger.debug(f"RSPEC: {json.dumps(data_dict['rspec'], indent=2)}")
-        nodes = data_dict['rspec']['node']
-        nodes = [n for n in nodes if self._net.cluster == n['@component_manager_id']]
         n = nodes[idx]
 
         if n['interface']['ip']['@type'] == 'ipv4':
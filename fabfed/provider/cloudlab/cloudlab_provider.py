@@ -1,3 +1,4 @@
+import threading
 from typing import List
 
 from fabfed.exceptions import ResourceTypeNotSupported, ProviderException
@@ -10,6 +11,10 @@ from fabfed.policy.policy_helper import get_stitch_port_for_provider, get_vlan_f
 
 logger = get_logger()
 
+# Rpc servers and their locks are shared by the providers using the same certificate.
+_rpc_servers = {}
+_rpc_servers_lock = threading.Lock()
+
 
 class CloudlabProvider(Provider):
 
@@ -70,16 +75,108 @@ class CloudlabProvider(Provider):
         return exp_params
 
     def rpc_server(self):
-        server_config = {
-            "debug": 0,
-            "impotent": 0,
-            "verify": 0,
-            "certificate": self.cert
-        }
+        return self._rpc_server_and_lock()[0]
+
+    def _rpc_server_and_lock(self):
+        from fabfed.util.utils import absolute_path
+
+        cert = absolute_path(self.cert)
+
+        with _rpc_servers_lock:
+            if cert not in _rpc_servers:
+                server_config = {
+                    "debug": 0,
+                    "impotent": 0,
+                    "verify": 0,
+                    "certificate": self.cert
+                }
+
+                import emulab_sslxmlrpc.xmlrpc as xmlrpc
+
+                _rpc_servers[cert] = (xmlrpc.EmulabXMLRPC(server_config), threading.Lock())
+
+            return _rpc_servers[cert]
+
+    def rpc(self, method, params):
+        """
+        Calls an emulab api method, e.g. api.experimentStatus, using the rpc server shared by all providers with
+        the same certificate. Calls on a server are serialized.
+        """
+        server, lock = self._rpc_server_and_lock()
+
+        with lock:
+            return method(server, params).apply()
+
+    @property
+    def tracker(self):
+        from fabfed.util.utils import absolute_path
+        from .cloudlab_tracker import get_tracker
+
+        return get_tracker(absolute_path(self.cert))
+
+    def experiment_status(self, name):
+        """
+        Returns the parsed status of the experiment or None when the server is offline, busy or the response
+        is garbled (network glitch).
+        """
+        import json
+        import emulab_sslxmlrpc.client.api as api
+
+        exitval, response = self.rpc(api.experimentStatus, self.experiment_params(name))
+
+        if not response or not hasattr(response, "value"):
+            logger.warning(f"Unexpected status response for {name}: exitval={exitval}:{response}")
+            return None
+
+        if exitval:
+            code = response.value
+
+            if code == api.GENIRESPONSE_REFUSED or code == api.GENIRESPONSE_NETWORK_ERROR:
+                logger.debug("Server is offline, waiting for a bit")
+                return None
+            elif code == api.GENIRESPONSE_BUSY:
+                logger.debug("Experiment is busy, waiting for a bit")
+                return None
+            elif code == api.GENIRESPONSE_SEARCHFAILED:
+                raise CloudlabException(message="Experiment is gone", exitval=exitval, response=response)
+
+            raise CloudlabException(exitval=exitval, response=response)
+
+        return json.loads(response.value)
+
+    def experiment_manifest(self, name):
+        import json
+        import xmltodict
+        import emulab_sslxmlrpc.client.api as api
+
+        exitval, response = self.rpc(api.experimentManifests, self.experiment_params(name))
+
+        if exitval:
+            raise CloudlabException(exitval=exitval, response=response)
+
+        manifests = json.loads(response.value)
+        return xmltodict.parse(next(iter(manifests.values())))['rspec']
+
+    def wait_for_experiment(self, name):
+        return self.tracker.wait(self.experiment_params(name)['experiment'],
+                                 status_of=lambda: self.experiment_status(name),
+                                 manifest_of=lambda: self.experiment_manifest(name))
+
+    def experiment_state(self, name):
+        """
+        Returns what the tracker knows about the experiment, polling it once if it is not being tracked.
+        """
+        state = self.tracker.get(self.experiment_params(name)['experiment'])
+
+        if state is None:
+            from .cloudlab_tracker import ExperimentState
 
-        import emulab_sslxmlrpc.xmlrpc as xmlrpc
+            state = ExperimentState(key=self.experiment_params(name)['experiment'],
+                                    status_of=lambda: self.experiment_status(name),
+                                    manifest_of=lambda: self.experiment_manifest(name))
+            state.poll()
 
-        return xmlrpc.EmulabXMLRPC(server_config)
+        return state
 
     def do_validate_resource(self, *, resource: dict):
         label = resource.get(Constants.LABEL)
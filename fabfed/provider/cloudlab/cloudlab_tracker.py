@@ -0,0 +1,168 @@
+import threading
+
+from fabfed.util.utils import get_logger
+from .cloudlab_constants import *
+from .cloudlab_exceptions import CloudlabException
+
+logger = get_logger()
+
+
+class ExperimentState:
+    """
+    What is known about an experiment so far. status_of returns the parsed status or None when the server
+    asks us to try again later. manifest_of returns the parsed rspec. Nodes are added to node_infos as soon
+    as they have an address and the manifest is fetched again only when new nodes show up.
+    """
+
+    def __init__(self, *, key: str, status_of, manifest_of):
+        self.key = key
+        self.status_of = status_of
+        self.manifest_of = manifest_of
+        self.status = None
+        self.node_infos = {}
+        self.rspec = None
+        self.ready = False
+        self.error = None
+        self.done = threading.Event()
+
+    def manifest_nodes(self, cluster: str = None):
+        if not self.rspec:
+            return []
+
+        nodes = self.rspec['node']
+
+        if isinstance(nodes, dict):
+            nodes = [nodes]
+
+        if cluster:
+            nodes = [n for n in nodes if cluster == n['@component_manager_id']]
+
+        return nodes
+
+    def poll(self):
+        status = self.status_of()
+
+        if status is None:
+            return
+
+        self.status = status
+
+        if status["status"] == "failed":
+            raise CloudlabException(message=f"Experiment {self.key} failed to instantiate")
+
+        new_nodes = False
+
+        for uri, aggregate_status in status.get(AGGREGATE_STATUS, {}).items():
+            if 'stitch' in uri:
+                continue
+
+            for node, node_info in (aggregate_status.get(NODES) or {}).items():
+                if node_info.get(IPV4) and node not in self.node_infos:
+                    logger.info(f"Experiment {self.key}: {node} is up: {node_info}")
+                    self.node_infos[node] = node_info
+                    new_nodes = True
+
+        ready = False
+
+        if status["status"] == "ready":
+            execute_status = status.get("execute_status")
+            ready = not execute_status or execute_status["total"] == execute_status["finished"]
+
+            if not ready:
+                logger.info(f"Experiment {self.key}: still waiting for execute service to finish")
+
+        if new_nodes or (ready and self.rspec is None):
+            try:
+                self.rspec = self.manifest_of()
+            except Exception as e:
+                if ready:
+                    raise e
+
+                logger.debug(f"Experiment {self.key}: manifest is not available yet: {e}")
+
+        self.ready = ready
+
+        if not ready:
+            logger.info(f"Experiment {self.key}: still waiting for experiment to be ready: status={status['status']}")
+
+
+class ExperimentTracker:
+    """
+    Polls the status of all the experiments being waited on once per cycle on a single thread.
+    """
+
+    def __init__(self, *, interval: float = CLOUDLAB_SLEEP_TIME):
+        self.interval = interval
+        self.status_calls = 0
+        self._states = {}
+        self._waiting = []
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def get(self, key: str):
+        return self._states.get(key)
+
+    def wait(self, key: str, *, status_of, manifest_of,
+             timeout: float = CLOUDLAB_RETRY * CLOUDLAB_SLEEP_TIME) -> ExperimentState:
+        state = ExperimentState(key=key, status_of=status_of, manifest_of=manifest_of)
+
+        with self._cond:
+            self._states[key] = state
+            self._waiting.append(state)
+
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, name="cloudlab-tracker", daemon=True)
+                self._thread.start()
+
+            self._cond.notify()
+
+        if not state.done.wait(timeout):
+            with self._cond:
+                if state in self._waiting:
+                    self._waiting.remove(state)
+
+            raise CloudlabException(message=f"Please Apply Again. Giving up on waiting for experiment {key}")
+
+        if state.error:
+            raise state.error
+
+        return state
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._waiting:
+                    self._thread = None
+                    return
+
+                waiting = list(self._waiting)
+
+            for state in waiting:
+                try:
+                    self.status_calls += 1
+                    state.poll()
+                except Exception as e:
+                    state.error = e
+
+                if state.ready or state.error:
+                    with self._cond:
+                        if state in self._waiting:
+                            self._waiting.remove(state)
+
+                    state.done.set()
+
+            with self._cond:
+                if self._waiting:
+                    self._cond.wait(self.interval)
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(key) -> ExperimentTracker:
+    with _trackers_lock:
+        if key not in _trackers:
+            _trackers[key] = ExperimentTracker()
+
+        return _trackers[key]
@@ -49,6 +49,15 @@ INCLUDE_FABNET_V6 = False
 
 FABRIC_SLEEP_AFTER_SUBMIT_OK = 120  # In seconds
 
+# When set in the provider config, networks are reported as created as soon as their slivers are active
+FABRIC_STREAM_CREATE = "stream-create"
+FABRIC_WAIT_TIMEOUT = 24 * 60  # In seconds
+FABRIC_POLL_INTERVAL = 10  # In seconds
+FABRIC_SLIVER_ACTIVE = "Active"
+FABRIC_SLIVER_FAILED = ["Failed", "Closed", "CloseWait"]
+FABRIC_MAX_WORKERS = 16
+FABRIC_SLICE_STABLE = ["StableOK", "StableError", "ModifyOK", "ModifyError"]
+
 PATCH_FOR_TOKENS = True
 
 SITES = "sites"
@@ -23,6 +23,7 @@ class FabricNetwork(Network):
         self._delegate = delegate
         self.site = delegate.get_site()
         self.slice_name = self._delegate.get_slice().get_name()
+        self.slice_id = self._delegate.get_slice().get_slice_id()
         self.type = str(delegate.get_type())
 
         self.layer3 = layer3
@@ -1,3 +1,6 @@
+from collections import namedtuple
+from typing import Dict
+
 from fabrictestbed_extensions.fablib.node import Node as Delegate
 from fabrictestbed_extensions.fablib.slice import Slice
 
@@ -9,81 +12,127 @@ from .fabric_constants import *
 logger = get_logger()
 
 
+NodeSnapshot = namedtuple("NodeSnapshot", "name site image cores ram disk mgmt_ip state reservation_id components")
+BastionInfo = namedtuple("BastionInfo", "user host keyfile")
+
+
+def _fim_property(fim_node, pname):
+    try:
+        return fim_node.get_property(pname=pname)
+    except Exception:
+        return None
+
+
+def take_node_snapshot(fim_node) -> NodeSnapshot:
+    capacities = _fim_property(fim_node, 'capacity_allocations') or _fim_property(fim_node, 'capacities')
+    reservation_info = _fim_property(fim_node, 'reservation_info')
+    mgmt_ip = _fim_property(fim_node, 'management_ip')
+
+    return NodeSnapshot(name=fim_node.name,
+                        site=fim_node.site,
+                        image=fim_node.image_ref,
+                        cores=capacities.core if capacities else 0,
+                        ram=capacities.ram if capacities else 0,
+                        disk=capacities.disk if capacities else 0,
+                        mgmt_ip=str(mgmt_ip) if mgmt_ip else None,
+                        state=reservation_info.reservation_state if reservation_info else None,
+                        reservation_id=reservation_info.reservation_id if reservation_info else None,
+                        components=tuple(sorted(fim_node.components.keys())))
+
+
+def take_node_snapshots(slice_object: Slice) -> Dict[str, NodeSnapshot]:
+    return {name: take_node_snapshot(fim_node) for name, fim_node in slice_object.get_fim_topology().nodes.items()}
+
+
+def get_bastion_info(delegate: Delegate) -> BastionInfo:
+    manager = delegate.get_fablib_manager()
+    return BastionInfo(user=manager.get_bastion_username(),
+                       host=manager.get_bastion_host(),
+                       keyfile=manager.get_bastion_key_location())
+
+
 class FabricNode(Node):
-    def __init__(self, *, label, delegate: Delegate, nic_model: str, network_label: str):
-        flavor = {'cores': delegate.get_cores(), 'ram': delegate.get_ram(), 'disk': delegate.get_disk()}
-        super().__init__(label=label, name=delegate.get_name(), image=delegate.get_image(), site=delegate.get_site(),
+    def __init__(self, *, label, delegate: Delegate, nic_model: str, network_label: str,
+                 snapshot: NodeSnapshot = None, bastion: BastionInfo = None):
+        snapshot = snapshot or take_node_snapshot(delegate.get_fim_node())
+        flavor = {'cores': snapshot.cores, 'ram': snapshot.ram, 'disk': snapshot.disk}
+        super().__init__(label=label, name=snapshot.name, image=snapshot.image, site=snapshot.site,
                          flavor=str(flavor))
         logger.info(f" Node {self.name} construtor called ... ")
-        self._delegate = delegate
         self.nic_model = nic_model
-        self._slice_object = delegate.get_slice()
-        self.slice_name = self._slice_object.get_name()
-        self.mgmt_ip = delegate.get_management_ip()
-        self.mgmt_ip = str(self.mgmt_ip) if self.mgmt_ip else None
         self.network_label = network_label
         self.username = delegate.get_username()
         self.user = self.username
-        self.state = delegate.get_reservation_state()
-        self.state = self.state.lower() if self.state else None
-        self.host = self.mgmt_ip
-        self.keyfile = self._delegate.get_private_key_file()
-        self.jump_user = self._delegate.get_fablib_manager().get_bastion_username()
-        self.jump_host = self._delegate.get_fablib_manager().get_bastion_host()
-        self.jump_keyfile = self._delegate.get_fablib_manager().get_bastion_key_location()
+        self.keyfile = delegate.get_private_key_file()
+        bastion = bastion or get_bastion_info(delegate)
+        self.jump_user = bastion.user
+        self.jump_host = bastion.host
+        self.jump_keyfile = bastion.keyfile
         self._used_dataplane_ipv4 = None
         self.dataplane_ipv4 = None
         self.dataplane_ipv6 = None
-        self.id = delegate.get_reservation_id()
-        self.components = [dict(name=c.get_name(), model=c.get_model()) for c in delegate.get_components()]
         self.addr_list = {}
+        self._snapshot = None
+        self.refresh(delegate=delegate, snapshot=snapshot)
+
+    def refresh(self, *, delegate: Delegate, snapshot: NodeSnapshot):
+        """
+        Points this node at a delegate of a reloaded slice and updates only the fields that changed.
+        """
+        self._delegate = delegate
+        self._slice_object = delegate.get_slice()
+        self.slice_name = self._slice_object.get_name()
+        self.slice_id = self._slice_object.get_slice_id()
+
+        if snapshot == self._snapshot:
+            return
+
+        self.mgmt_ip = snapshot.mgmt_ip
+        self.host = self.mgmt_ip
+        self.state = snapshot.state.lower() if snapshot.state else None
+        self.id = snapshot.reservation_id
 
-    def handle_networking(self):
-        slice_object = self._slice_object
+        if self._snapshot is None or snapshot.components != self._snapshot.components:
+            self.components = [dict(name=c.get_name(), model=c.get_model()) for c in delegate.get_components()]
 
+        self._snapshot = snapshot
+
+    def handle_networking(self, index=None):
         if not self.mgmt_ip:
             logger.warning(f" Node {self.name} has no management ip ")
             return
 
+        index = index or InterfaceIndex(self._slice_object, [self.name])
         v6_dev = v4_dev = stitch_dev = None
 
         try:
             # XXX Finding interfaces on stitched networks is currently not working on fablib==1.4.0
             # Search for interface directly...
-            stitch_iface = slice_object.get_interface(name=f"{self.name}-{FABRIC_STITCH_NET_IFACE_NAME}-p1")
-            stitch_dev = stitch_iface.get_device_name()
+            stitch_dev = index.get_device(f"{self.name}-{FABRIC_STITCH_NET_IFACE_NAME}-p1")
             logger.info(f" Node {self.name} has stitch device={stitch_dev}")
         except Exception as e:
             logger.warning(f" Node {self.name} checking for stitch network/device: {e}")
 
         try:
             if stitch_dev is None and INCLUDE_FABNET_V4:
-                for itf in slice_object.get_interfaces():
-                    if self.v4net_name in itf.get_name():
-                        v4_dev = itf.get_device_name()
-                        logger.info(f" Node {self.name} has v4 device={v4_dev}")
-                        break
+                v4_dev = index.find_device(self.name, self.v4net_name)
+                logger.info(f" Node {self.name} has v4 device={v4_dev}")
         except Exception as e:
             logger.warning(f"Node {self.name} checking for ipv4/ipv6: {e}")
 
         try:
             if stitch_dev is None and INCLUDE_FABNET_V6:
-                for itf in slice_object.get_interfaces():
-                    if self.v6net_name in itf.get_name():
-                        v6_dev = itf.get_device_name()
-                        logger.info(f" Node {self.name} has v6 device={v6_dev}")
-                        break
+                v6_dev = index.find_device(self.name, self.v6net_name)
+                logger.info(f" Node {self.name} has v6 device={v6_dev}")
         except Exception as e:
             logger.warning(f"Node {self.name} checking for ipv4/ipv6: {e}")
 
         try:
             if stitch_dev and INCLUDE_FABNETS:
-                v4_net = slice_object.get_network(name=self.v4net_name)
-                v4_dev = v4_net.get_interfaces()[0].get_device_name() if v4_net and v4_net.get_interfaces() else None
+                v4_dev = index.get_network_device(self.v4net_name)
                 logger.info(f" Node {self.name} has v4 device={v4_dev}")
 
-                v6_net = slice_object.get_network(name=self.v6net_name)
-                v6_dev = v6_net.get_interfaces()[0].get_device_name() if v6_net and v6_net.get_interfaces() else None
+                v6_dev = index.get_network_device(self.v6net_name)
                 logger.info(f" Node {self.name} has v6 device={v6_dev}")
         except Exception as e:
             logger.warning(f"Node {self.name} checking for ipv4/ipv6: {e}")
@@ -180,6 +229,58 @@ class FabricNode(Node):
         return self._delegate.get_reservation_state()
 
 
+class InterfaceIndex:
+    """
+    The interfaces of a slice materialized once and indexed by name and by node name, so that resolving
+    the devices of every node does not go through fablib for each node. Networks are looked up lazily.
+    """
+
+    def __init__(self, slice_object: Slice, node_names=None):
+        self._slice_object = slice_object
+        self._interfaces = {}
+        self._node_interfaces = {}
+        self._networks = {}
+
+        node_names = node_names or [n.get_name() for n in slice_object.get_nodes()]
+
+        for itf in slice_object.get_interfaces():
+            self._interfaces[itf.get_name()] = itf
+
+        # Interface names are prefixed with the name of their node: <node>-<component>-p1
+        for name in node_names:
+            prefix = f"{name}-"
+            self._node_interfaces[name] = [itf for itf_name, itf in self._interfaces.items()
+                                           if itf_name.startswith(prefix)]
+
+    def get_device(self, name: str):
+        itf = self._interfaces.get(name)
+
+        if itf is None:
+            raise Exception(f"interface {name} not found")
+
+        return itf.get_device_name()
+
+    def find_device(self, node_name: str, name_fragment: str):
+        interfaces = self._node_interfaces.get(node_name) or self._interfaces.values()
+
+        for itf in interfaces:
+            if name_fragment in itf.get_name():
+                return itf.get_device_name()
+
+        return None
+
+    def get_network(self, name: str):
+        if name not in self._networks:
+            self._networks[name] = self._slice_object.get_network(name=name)
+
+        return self._networks[name]
+
+    def get_network_device(self, name: str):
+        net = self.get_network(name)
+        interfaces = net.get_interfaces() if net else None
+        return interfaces[0].get_device_name() if interfaces else None
+
+
 class NodeBuilder:
     def __init__(self, label, slice_object: Slice, name: str,  resource: dict):
         from .fabric_constants import FABRIC_RANDOM
@@ -223,5 +324,6 @@ class NodeBuilder:
     def add_component(self, model=None, name=None):
         self.node.add_component(model=model, name=name)
 
-    def build(self) -> FabricNode:
-        return FabricNode(label=self.label, delegate=self.node, nic_model=self.nic_model, network_label="")
+    def build(self, bastion: BastionInfo = None) -> FabricNode:
+        return FabricNode(label=self.label, delegate=self.node, nic_model=self.nic_model, network_label="",
+                          bastion=bastion)
@@ -15,6 +15,7 @@ class FabricProvider(Provider):
         self.slice = None
         self.retry = 5
         self.slice_init = False
+        self.slice_deleted = False
         # TODO Should not be needed for fablib 1.6.4
         from fabrictestbed_extensions.fablib.constants import Constants as FC
         from fabfed.util.utils import get_base_dir
@@ -145,6 +146,55 @@ class FabricProvider(Provider):
         assert self.slice.slice_object is not None
         self.slice.wait_for_create_resource(resource=resource)
 
+    def _remaining_labels(self) -> set:
+        states = self.saved_state.states() if self.saved_state else []
+        return {state.label for state in states} - self.deferred_deletes
+
+    def _on_slice_deleted(self):
+        self.slice_deleted = True
+        self.deferred_deletes.clear()
+
+    def _delete_from_saved_state(self, resource: dict) -> bool:
+        if self.slice_deleted:
+            return True
+
+        states = resource[Constants.SAVED_STATES]
+
+        if not states:
+            return False
+
+        label = resource.get(Constants.LABEL)
+        rtype = resource.get(Constants.RES_TYPE)
+
+        # Deleting the slice takes every resource with it. Wait for a network, or for the last resource of this
+        # provider, so that resources the controller skips are not deleted along with the first one it visits.
+        if rtype != Constants.RES_TYPE_NETWORK and self._remaining_labels() != {label}:
+            self.logger.info(f"Deferring delete of {label} until slice {self.name} is deleted")
+            self.deferred_deletes.add(label)
+            return True
+
+        slice_id = next((s.attributes['slice_id'] for s in states if s.attributes.get('slice_id')), None)
+
+        from . import fabric_slice_helper
+
+        try:
+            if not fabric_slice_helper.delete_slice(slice_id=slice_id, slice_name=self.name):
+                self.logger.info(f"Slice {self.name} is already gone")
+        except Exception as e:
+            self.logger.warning(f"Could not delete slice {self.name} using saved state. Will load the slice: {e}")
+            return False
+
+        self._on_slice_deleted()
+        return True
+
     def do_delete_resource(self, *, resource: dict):
+        if self._delete_from_saved_state(resource):
+            return
+
         self._init_slice(True)
         self.slice.delete_resource(resource=resource)
+
+        if self.slice.slice_object is None:
+            self._on_slice_deleted()
+        else:
+            self.deferred_deletes.add(resource.get(Constants.LABEL))
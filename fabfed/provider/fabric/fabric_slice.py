@@ -28,6 +28,12 @@ class FabricSlice:
         self.existing_nodes = []
         self.existing_networks = []
         self._resource_state_map = {}
+        self.stream_create = bool(provider.config.get(FABRIC_STREAM_CREATE, False))
+        self._notified = set()
+        self._bastion = None
+        self._attached_nodes = set()
+        self._touched_nodes = set()
+        self._affected_nodes = None
 
     def init(self, destroy_phase):
         from . import fabric_slice_helper
@@ -74,6 +80,14 @@ class FabricSlice:
     def pending(self):
         return self.provider.pending
 
+    def bastion(self, delegate):
+        from .fabric_node import get_bastion_info
+
+        if self._bastion is None:
+            self._bastion = get_bastion_info(delegate)
+
+        return self._bastion
+
     def validate_resource(self, *, resource: dict):
         rtype = resource.get(Constants.RES_TYPE)
 
@@ -130,145 +144,154 @@ class FabricSlice:
         self.slice_modified = self.slice_created
         self.resource_listener.on_added(source=self, provider=self.provider, resource=net)
 
-    def _add_node(self, resource: dict):
-        node_count = resource[Constants.RES_COUNT]
-        label = resource[Constants.LABEL]
-
-        for i in range(node_count):
-            name = self.provider.resource_name(resource, i)
+    def _saved_attribute(self, name, attribute, default=None):
+        state = self._resource_state_map.get(name)
 
-            if name in self.existing_nodes:
-                from fabrictestbed_extensions.fablib.node import Node as NodeDelegate
+        if state is None:
+            return default
 
-                delegate: NodeDelegate = self.slice_object.get_node(name)
-                assert delegate is not None, "expected to find node {name} in slice {self.name}"
-                network_label = self.provider.retrieve_attribute_from_saved_state(resource, name, 'network_label')
-                dataplane_ipv4 = self.provider.retrieve_attribute_from_saved_state(resource, name, 'dataplane_ipv4')
-                nic_model = self.provider.retrieve_attribute_from_saved_state(resource, name, 'nic_model', "NIC_Basic")
-                node = FabricNode(label=label, delegate=delegate, nic_model=nic_model, network_label=network_label)
+        ret = state.attributes.get(attribute)
+        return ret[0] if isinstance(ret, list) and len(ret) == 1 else ret
 
-                if not network_label:
-                    if util.has_resolved_internal_dependencies(resource=resource, attribute='network'):
-                        network = util.get_single_value_for_dependency(resource=resource, attribute='network')
+    def _network_attachment(self, network):
+        """
+        Resolves once for a node group where the interfaces of its nodes go: the network itself or, when the
+        network is peered, its _aux network along with the ipv4 subnet label to set on each interface.
+        """
+        from fabrictestbed_extensions.fablib.network_service import NetworkService
 
-                        if network:
-                            # TODO: Need to talk to fablib team and make sure an existing node's interface
-                            # TODO: can be added to a network after it has been created.
+        delegate: NetworkService = network.delegate
 
-                            from fabrictestbed_extensions.fablib.network_service import NetworkService
+        if not network.peering:
+            return delegate, False, None
 
-                            itf = None
+        from fim.slivers.capacities_labels import Labels, Capacities
 
-                            try:
-                                comp = node.delegate.get_component(name=FABRIC_STITCH_NET_IFACE_NAME)
-                                itf = comp.get_interfaces()[0]
-                                self.logger.info(f"Found interface {itf.get_name()} to node {node.get_name()}")
-                            except Exception as e:
-                                self.logger.warning(
-                                    f"Exception while looking for {FABRIC_STITCH_NET_IFACE_NAME} in node {node.get_name()}: {e}")
+        aux_name = delegate.get_name() + "_aux"
+        aux_net = self.slice_object.get_network(aux_name)
 
-                            if itf is None:
-                                itf = node.delegate.add_component(model=nic_model,
-                                                                  name=FABRIC_STITCH_NET_IFACE_NAME).get_interfaces()[0]
-                                self.logger.info(f"Added interface {itf.get_name()} to node {node.get_name()}")
+        if aux_net is None:
+            aux_net = self.slice_object.add_l3network(name=aux_name, interfaces=[], type='L3VPN')
+            delegate.fim_network_service.peer(aux_net.fim_network_service,
+                                              labels=Labels(bgp_key='secret', ipv4_subnet='192.168.50.1/24'),
+                                              capacities=Capacities(mtu=9000), peer_labels=Labels(local_name="FABRIC"))
 
-                                delegate: NetworkService = network.delegate
+        ipv4_gateway = network.layer3.attributes.get(Constants.RES_NET_GATEWAY)
+        ipv4_subnet = network.layer3.attributes.get(Constants.RES_SUBNET)
 
-                                if network.peering:
-                                   from fim.slivers.capacities_labels import Labels, Capacities
+        if ipv4_gateway and ipv4_subnet and '/' in ipv4_subnet:
+            ipv4_netmask = ipv4_subnet.split('/')[1]
+            ipv4_subnet = f'{ipv4_gateway}/{ipv4_netmask}'
 
-                                   aux_name = delegate.get_name() + "_aux"
-                                   aux_net = self.slice_object.get_network(delegate.get_name() + "_aux")
+        return aux_net, True, ipv4_subnet
 
-                                   if aux_net is None:
-                                      aux_net = self.slice_object.add_l3network(name=aux_name, interfaces=[], type='L3VPN')
-                                      delegate.fim_network_service.peer(aux_net.fim_network_service,
-                                         labels=Labels(bgp_key='secret', ipv4_subnet='192.168.50.1/24'),
-                                         capacities=Capacities(mtu=9000), peer_labels=Labels(local_name="FABRIC"))
+    def _attach(self, itf, attachment):
+        target, peered, ipv4_subnet = attachment
 
-                                   fim_iface1 = itf.get_fim_interface()
-                                   ipv4_gateway = network.layer3.attributes.get(Constants.RES_NET_GATEWAY)
+        if peered:
+            from fim.slivers.capacities_labels import Labels
 
-                                   if ipv4_gateway:
-                                      ipv4_subnet = network.layer3.attributes.get(Constants.RES_SUBNET)
+            fim_iface = itf.get_fim_interface()
+            fim_iface.labels = Labels.update(fim_iface.labels, ipv4_subnet=f'{ipv4_subnet}')
 
-                                      if ipv4_subnet and '/' in ipv4_subnet:
-                                         ipv4_netmask = ipv4_subnet.split('/')[1]
-                                         ipv4_subnet = f'{ipv4_gateway}/{ipv4_netmask}'
-                                   else:
-                                      ipv4_subnet = network.layer3.attributes.get(Constants.RES_SUBNET)
+        target.add_interface(itf)
+        self.logger.info(f"Added interface {itf.get_name()} to network {target.get_name()}")
 
-                                   fim_iface1.labels = Labels.update(fim_iface1.labels, ipv4_subnet=f'{ipv4_subnet}')
-                                   aux_net.add_interface(itf)
-                                   self.logger.info(f"Added interface {itf.get_name()} to network {aux_name}")
-                                else:
-                                   delegate.add_interface(itf)
-                                self.logger.info(f"Added interface {itf.get_name()} to network {delegate.get_name()}")
-                                self.slice_modified = True
-                                dataplane_ipv4 = None
+    def _add_existing_node(self, resource: dict, name: str, network, attachment):
+        from fabrictestbed_extensions.fablib.node import Node as NodeDelegate
 
-                            node.set_network_label(network.label)
+        label = resource[Constants.LABEL]
+        delegate: NodeDelegate = self.slice_object.get_node(name)
+        assert delegate is not None, "expected to find node {name} in slice {self.name}"
+        network_label = self._saved_attribute(name, 'network_label')
+        dataplane_ipv4 = self._saved_attribute(name, 'dataplane_ipv4')
+        nic_model = self._saved_attribute(name, 'nic_model', "NIC_Basic")
+        node = FabricNode(label=label, delegate=delegate, nic_model=nic_model, network_label=network_label,
+                          bastion=self.bastion(delegate))
+
+        if not network_label and network:
+            # TODO: Need to talk to fablib team and make sure an existing node's interface
+            # TODO: can be added to a network after it has been created.
+            itf = None
+
+            try:
+                comp = node.delegate.get_component(name=FABRIC_STITCH_NET_IFACE_NAME)
+                itf = comp.get_interfaces()[0]
+                self.logger.info(f"Found interface {itf.get_name()} to node {node.get_name()}")
+            except Exception as e:
+                self.logger.warning(
+                    f"Exception while looking for {FABRIC_STITCH_NET_IFACE_NAME} in node {node.get_name()}: {e}")
+
+            if itf is None:
+                itf = node.delegate.add_component(model=nic_model,
+                                                  name=FABRIC_STITCH_NET_IFACE_NAME).get_interfaces()[0]
+                self.logger.info(f"Added interface {itf.get_name()} to node {node.get_name()}")
+                self._attach(itf, attachment())
+                self.slice_modified = True
+                self._touched_nodes.add(name)
+                dataplane_ipv4 = None
 
-                if dataplane_ipv4:
-                    from ipaddress import IPv4Address
+            self._attached_nodes.add(name)
+            node.set_network_label(network.label)
 
-                    node.set_used_dataplane_ipv4(IPv4Address(dataplane_ipv4))
-            else:
-                node_builder = NodeBuilder(label, self.slice_object, name, resource)
-                node = node_builder.build()
-                self.slice_modified = True
-                network: Union[Network, None] = None
+        if dataplane_ipv4:
+            from ipaddress import IPv4Address
 
-                if util.has_resolved_internal_dependencies(resource=resource, attribute='network'):
-                    network = util.get_single_value_for_dependency(resource=resource, attribute='network')
+            node.set_used_dataplane_ipv4(IPv4Address(dataplane_ipv4))
 
-                if network:
-                    from fabrictestbed_extensions.fablib.network_service import NetworkService
+        if name not in self._touched_nodes:
+            # Keep what was discovered when the node was last configured, so that a modify
+            # of the slice need not go back to this node.
+            node.dataplane_ipv4 = dataplane_ipv4
+            node.dataplane_ipv6 = self._saved_attribute(name, 'dataplane_ipv6')
+            node.addr_list = self._saved_attribute(name, 'addr_list', {}) or {}
 
+        return node
 
-                    itf = node.delegate.add_component(model=node.nic_model,
-                                                      name=FABRIC_STITCH_NET_IFACE_NAME).get_interfaces()[0]
-                    self.logger.info(
-                        f"Added interface {itf.get_name()} to node {node.get_name()} with nic_model={node.nic_model}")
+    def _add_new_node(self, resource: dict, name: str, network, attachment):
+        node_builder = NodeBuilder(resource[Constants.LABEL], self.slice_object, name, resource)
+        node = node_builder.build(bastion=self.bastion(node_builder.node))
+        self.slice_modified = True
 
-                    delegate: NetworkService = network.delegate
+        if network:
+            itf = node.delegate.add_component(model=node.nic_model,
+                                              name=FABRIC_STITCH_NET_IFACE_NAME).get_interfaces()[0]
+            self.logger.info(
+                f"Added interface {itf.get_name()} to node {node.get_name()} with nic_model={node.nic_model}")
+            self._attach(itf, attachment())
+            self._attached_nodes.add(name)
+            node.set_network_label(network.label)
 
-                    if network.peering:
-                       from fim.slivers.capacities_labels import Labels, Capacities
+        return node
 
-                       aux_name = delegate.get_name() + "_aux"
-                       aux_net = self.slice_object.get_network(delegate.get_name() + "_aux")
+    def _add_node(self, resource: dict):
+        node_count = resource[Constants.RES_COUNT]
+        network: Union[Network, None] = None
 
-                       if aux_net is None:
-                          aux_net = self.slice_object.add_l3network(name=aux_name, interfaces=[], type='L3VPN')
-                          delegate.fim_network_service.peer(aux_net.fim_network_service,
-                                  labels=Labels(bgp_key='secret', ipv4_subnet='192.168.50.1/24'),
-                                  capacities=Capacities(mtu=9000), peer_labels=Labels(local_name="FABRIC"))
+        if util.has_resolved_internal_dependencies(resource=resource, attribute='network'):
+            network = util.get_single_value_for_dependency(resource=resource, attribute='network')
 
-                       fim_iface1 = itf.get_fim_interface()
+        resolved = []
 
-                       ipv4_gateway = network.layer3.attributes.get(Constants.RES_NET_GATEWAY)
+        def attachment():
+            # The network context is shared by the whole group and only resolved if an interface is added
+            if not resolved:
+                resolved.append(self._network_attachment(network))
 
-                       if ipv4_gateway:
-                             ipv4_subnet = network.layer3.attributes.get(Constants.RES_SUBNET)
+            return resolved[0]
 
-                             if ipv4_subnet and '/' in ipv4_subnet:
-                                ipv4_netmask = ipv4_subnet.split('/')[1]
-                                ipv4_subnet = f'{ipv4_gateway}/{ipv4_netmask}'
-                       else:
-                          ipv4_subnet = network.layer3.attributes.get(Constants.RES_SUBNET)
+        nodes = []
 
-                       fim_iface1.labels = Labels.update(fim_iface1.labels, ipv4_subnet=f'{ipv4_subnet}')
-                       aux_net.add_interface(itf)
-                       self.logger.info(f"Added interface {itf.get_name()} to network {aux_name}")
-                    else:
-                       delegate.add_interface(itf)
-                       self.logger.info(f"Added interface {itf.get_name()} to network {delegate.get_name()}")
+        for i in range(node_count):
+            name = self.provider.resource_name(resource, i)
 
-                    node.set_network_label(network.label)
+            if name in self.existing_nodes:
+                nodes.append(self._add_existing_node(resource, name, network, attachment))
+            else:
+                nodes.append(self._add_new_node(resource, name, network, attachment))
 
-            self.nodes.append(node)
-            self.resource_listener.on_added(source=self, provider=self.provider, resource=node)
+        self.nodes.extend(nodes)
+        self.resource_listener.on_added_all(source=self, provider=self.provider, resources=nodes)
 
     def add_resource(self, *, resource: dict):
         rtype = resource.get(Constants.RES_TYPE)
@@ -288,63 +311,62 @@ class FabricSlice:
         else:
             raise Exception("Unknown resource ....")
 
-    def _reload_nodes(self):
+    def _reload_nodes(self, affected_nodes):
         from fabrictestbed_extensions.fablib.fablib import fablib
+        from fabfed.util.utils import ContextThreadPoolExecutor
+        from .fabric_node import InterfaceIndex, take_node_snapshots
 
-        temp = []
         self.slice_object = fablib.get_slice(name=self.provider.name)
 
+        if not self.nodes:
+            return
+
+        snapshots = take_node_snapshots(self.slice_object)
+
         for node in self.nodes:
-            delegate = self.slice_object.get_node(node.name)
-            n = FabricNode(label=node.label, delegate=delegate,
-                           nic_model=node.nic_model, network_label=node.network_label)
-            n.set_network_label(node.network_label)
-            n.set_used_dataplane_ipv4(node.used_dataplane_ipv4())
-            temp.append(n)
-            n.handle_networking()
+            node.refresh(delegate=self.slice_object.get_node(node.name), snapshot=snapshots[node.name])
+
+        if not affected_nodes:
+            return
 
-        self.provider._nodes = temp
+        index = InterfaceIndex(self.slice_object, [n.name for n in affected_nodes])
+
+        with ContextThreadPoolExecutor(max_workers=min(len(affected_nodes), FABRIC_MAX_WORKERS)) as executor:
+            list(executor.map(lambda n: n.handle_networking(index), affected_nodes))
 
     def _reload_networks(self):
         from fabrictestbed_extensions.fablib.fablib import fablib
 
         self.slice_object = fablib.get_slice(name=self.provider.name)
 
-        temp = []
+        self.provider._networks = [self._refresh_network(net) for net in self.provider.networks]
 
-        for net in self.provider.networks:
-            delegate = self.slice_object.get_network(net.name)
-            fabric_network = FabricNetwork(label=net.label,
-                                           delegate=delegate,
-                                           layer3=net.layer3,
-                                           peering=net.peering,
-                                           peer_layer3=net.peer_layer3)
+    def _refresh_network(self, net: FabricNetwork) -> FabricNetwork:
+        delegate = self.slice_object.get_network(net.name)
+        return FabricNetwork(label=net.label, delegate=delegate, layer3=net.layer3,
+                             peering=net.peering, peer_layer3=net.peer_layer3)
 
-            temp.append(fabric_network)
-
-        self.provider._networks = temp
-
-    def _ensure_management_ips(self):
+    def _ensure_management_ips(self, nodes):
         for attempt in range(self.retry):
             mngmt_ips = []
             from fabrictestbed_extensions.fablib.fablib import fablib
 
             self.slice_object = fablib.get_slice(name=self.provider.name)
 
-            for node in self.nodes:
+            for node in nodes:
                 delegate = self.slice_object.get_node(node.name)
                 mgmt_ip = delegate.get_management_ip()
 
                 if mgmt_ip:
                     mngmt_ips.append(mgmt_ip)
 
-            if len(self.nodes) == len(mngmt_ips):
+            if len(nodes) == len(mngmt_ips):
                 self.logger.info(f"Got All management ips for slice {self.provider.label}:{mngmt_ips}")
                 break
 
             if attempt == self.retry:
                 self.logger.warning(f"Giving up on checking node management ips ...slice "
-                                    f"{self.provider.label} {self.nodes}:{mngmt_ips}:")
+                                    f"{self.provider.label} {nodes}:{mngmt_ips}:")
                 break
 
             import time
@@ -354,11 +376,12 @@ class FabricSlice:
 
             time.sleep(2)
 
-    def _do_handle_node_networking(self):
-        from fabrictestbed_extensions.fablib.fablib import fablib
+    def _do_handle_node_networking(self, affected=None):
         from . import fabric_slice_helper
 
-        self._ensure_management_ips()
+        affected_nodes = [n for n in self.nodes if affected is None or n.name in affected]
+        affected_names = {n.name for n in affected_nodes}
+        self._ensure_management_ips(affected_nodes)
 
         for network in self.networks:
             from ipaddress import IPv4Network
@@ -374,7 +397,7 @@ class FabricSlice:
                     if node.used_dataplane_ipv4() and node.used_dataplane_ipv4() in available_ips:
                         available_ips.remove(node.used_dataplane_ipv4())
 
-                for node in temp:
+                for node in [n for n in temp if n.name in affected_names]:
                     node_addr = node.used_dataplane_ipv4() if node.used_dataplane_ipv4() else available_ips.pop(0)
                     fabric_slice_helper.add_ip_address_to_network(self.slice_object,
                                                                   node, net_name, node_addr, subnet, self.retry)
@@ -388,16 +411,16 @@ class FabricSlice:
                         self.logger.info(f"Slice {self.name}:Handling subnet {subnet} for peer {peer_layer3}")
                         vpc_subnet = fabric_slice_helper.to_vpc_subnet(subnet)
 
-                        for node in self.nodes:
+                        for node in affected_nodes:
                             fabric_slice_helper.add_route(self.slice_object, node, vpc_subnet, network.gateway,
                                                           self.retry)
 
-        self._reload_nodes()
+        self._reload_nodes(affected_nodes)
         self._reload_networks()
 
-    def _handle_node_networking(self):
+    def _handle_node_networking(self, affected=None):
         try:
-            self._do_handle_node_networking()
+            self._do_handle_node_networking(affected)
         except Exception as e:
             raise Exception(
                 f"Please Apply again. Fabric slice {self.name} has exception during post networking setup: {e}")
@@ -416,70 +439,7 @@ class FabricSlice:
             return
 
         if self.slice_created:
-            aset = set(self.existing_nodes)
-            bset = {n.name for n in self.nodes}
-            diff = aset - bset
-
-            if diff:
-                network_labels = {}
-                for name, state in self._resource_state_map.items():
-                    if state.type == Constants.RES_NODES:
-                        network_labels[name] = state.attributes['network_label']
-
-                for n in diff:
-                    self.logger.info(f"removing node {n} from slice {self.name}")
-
-                    if INCLUDE_FABNETS:
-                        self.logger.info(f"removing node's fabnets: {n} from slice {self.name}")
-                        self.slice_object.get_fim_topology().remove_network_service(f"{n}-{FABRIC_IPV4_NET_NAME}")
-                        self.slice_object.get_fim_topology().remove_network_service(f"{n}-{FABRIC_IPV6_NET_NAME}")
-
-                    node = self.slice_object.get_node(name=n)
-                    temp = [net for net in self.networks if net.label == network_labels[n]]
-
-                    for network in temp:
-                        self.logger.info(f"removing node's interface: {n} from network {network.name}")
-                        from fabrictestbed_extensions.fablib.network_service import NetworkService
-
-                        delegate: NetworkService = network.delegate
-                        node_interfaces = [i for i in node.get_interfaces()]
-                        itf = node_interfaces[0]
-                        delegate.remove_interface(itf)
-
-                    self.slice_object.get_fim_topology().remove_node(name=n)
-                    self.slice_modified = True
-                    self.logger.info(f"Done removing node {n} from slice {self.name}")
-
-            aset = set(self.existing_networks)
-            bset = {n.name for n in self.networks}
-            diff = aset - bset
-
-            if diff:
-                for n in diff:
-                    self.slice_object.get_fim_topology().remove_network_service(name=n)
-                    self.slice_modified = True
-                    self.logger.info(f"Done removing network {n} from slice {self.name}")
-
-            for network in [net for net in self.networks if net.name in self.existing_networks]:
-                temp = (bset - aset)
-                node_map = {}
-
-                for node in self.nodes:
-                    node_map[node.name] = node
-
-                temp = [n for n in temp if node_map[n].network_label == network.label]
-
-                for n in temp:
-                    node = self.slice_object.get_node(name=n)
-                    itf = node.add_component(model="NIC_Basic", name=FABRIC_STITCH_NET_IFACE_NAME).get_interfaces()[0]
-                    self.logger.info(f"Added interface {itf.get_name()} to node {node.get_name()}")
-
-                    from fabrictestbed_extensions.fablib.network_service import NetworkService
-
-                    delegate: NetworkService = network.delegate
-                    self.logger.info(f"adding interface {itf.get_name()} to {delegate.get_name()}")
-                    delegate.add_interface(itf)
-                    self.slice_modified = True
+            self._apply_topology_diff()
 
         if self.slice_created and not self.slice_modified:
             return
@@ -490,15 +450,78 @@ class FabricSlice:
         self.logger.info(f"Done Submitting request for slice {self.name}:{slice_id}")
         self.submitted = True
 
+    def _apply_topology_diff(self):
+        from . import fabric_slice_helper
+        from fabrictestbed_extensions.fablib.network_service import NetworkService
+
+        live_node_network_labels = {name: state.attributes.get('network_label')
+                                    for name, state in self._resource_state_map.items()
+                                    if state.type == Constants.RES_TYPE_NODE}
+        diff = fabric_slice_helper.compute_topology_diff(live_nodes=set(self.existing_nodes),
+                                                         live_networks=set(self.existing_networks),
+                                                         nodes={n.name: n.network_label for n in self.nodes},
+                                                         networks={n.name: n.label for n in self.networks},
+                                                         live_node_network_labels=live_node_network_labels,
+                                                         attached_nodes=self._attached_nodes)
+        self.logger.info(f"Slice {self.name}: add_nodes={sorted(diff.add_nodes)}, "
+                         f"remove_nodes={list(diff.remove_nodes)}, remove_networks={diff.remove_networks}, "
+                         f"add_interfaces={diff.add_interfaces}")
+        topology = self.slice_object.get_fim_topology()
+        network_map = {net.name: net for net in self.networks}
+
+        for n, net_names in diff.remove_nodes.items():
+            self.logger.info(f"removing node {n} from slice {self.name}")
+
+            if INCLUDE_FABNETS:
+                self.logger.info(f"removing node's fabnets: {n} from slice {self.name}")
+                topology.remove_network_service(f"{n}-{FABRIC_IPV4_NET_NAME}")
+                topology.remove_network_service(f"{n}-{FABRIC_IPV6_NET_NAME}")
+
+            node = self.slice_object.get_node(name=n)
+
+            for net_name in net_names:
+                self.logger.info(f"removing node's interface: {n} from network {net_name}")
+                delegate: NetworkService = network_map[net_name].delegate
+
+                try:
+                    itf = node.get_interface(network_name=net_name)
+                except Exception:
+                    itf = None
+
+                delegate.remove_interface(itf or node.get_interfaces()[0])
+
+            topology.remove_node(name=n)
+            self.slice_modified = True
+            self.logger.info(f"Done removing node {n} from slice {self.name}")
+
+        for n in diff.remove_networks:
+            topology.remove_network_service(name=n)
+            self.slice_modified = True
+            self.logger.info(f"Done removing network {n} from slice {self.name}")
+
+        for n, net_name in diff.add_interfaces.items():
+            node = self.slice_object.get_node(name=n)
+            itf = node.add_component(model="NIC_Basic", name=FABRIC_STITCH_NET_IFACE_NAME).get_interfaces()[0]
+            self.logger.info(f"Added interface {itf.get_name()} to node {node.get_name()}")
+
+            delegate: NetworkService = network_map[net_name].delegate
+            self.logger.info(f"adding interface {itf.get_name()} to {delegate.get_name()}")
+            delegate.add_interface(itf)
+            self._attached_nodes.add(n)
+            self.slice_modified = True
+
+        # Only the nodes that were added or attached to a network need to be configured after the modify
+        self._affected_nodes = diff.add_nodes | set(diff.add_interfaces) | self._touched_nodes
+
     def wait_for_create_resource(self, *, resource: dict):
         if self.slice_created and not self.slice_modified and not self.notified_create:
             self._handle_node_networking()
 
             for node in self.nodes:
-                self.resource_listener.on_created(source=self, provider=self.provider, resource=node)
+                self._notify_created(node)
 
             for net in self.networks:
-                self.resource_listener.on_created(source=self, provider=self.provider, resource=net)
+                self._notify_created(net)
 
             self.notified_create = True
             return
@@ -507,10 +530,14 @@ class FabricSlice:
             return
 
         assert(self.submitted, "expecting slice to have been submitted")
+
+        if self.stream_create and not self._stream_slivers(label=resource[Constants.LABEL]):
+            return
+
         self.logger.info(f"Waiting for slice {self.name} to be stable")
 
         try:
-            self.slice_object.wait(timeout=24 * 60, progress=True)
+            self.slice_object.wait(timeout=FABRIC_WAIT_TIMEOUT, progress=True)
         except Exception as e:
             state = self.slice_object.get_state()
             self.logger.warning(f"Exception occurred while waiting state={state}:{e}")
@@ -553,18 +580,81 @@ class FabricSlice:
             self.existing_networks.append(net_name)
 
         if self.nodes:
-            self._handle_node_networking()
+            self._handle_node_networking(self._affected_nodes)
+            self._affected_nodes = None
         else:
             self._reload_networks()
 
         for node in self.nodes:
-            self.resource_listener.on_created(source=self, provider=self.provider, resource=node)
+            self._notify_created(node)
 
         for net in self.networks:
-            self.resource_listener.on_created(source=self, provider=self.provider, resource=net)
+            self._notify_created(net)
 
         self.notified_create = True
 
+    def _notify_created(self, resource):
+        if resource.name in self._notified:
+            return
+
+        self._notified.add(resource.name)
+        self.resource_listener.on_created(source=self, provider=self.provider, resource=resource)
+
+    def _stream_active_slivers(self):
+        for net in list(self.networks):
+            if net.name in self._notified:
+                continue
+
+            delegate = self.slice_object.get_network(net.name)
+            state = delegate.get_reservation_state() if delegate else None
+
+            if state in FABRIC_SLIVER_FAILED:
+                raise Exception(f"Network {net.name} in slice {self.name} is {state}: {delegate.get_error_message()}")
+
+            if state == FABRIC_SLIVER_ACTIVE:
+                refreshed = self._refresh_network(net)
+                self.provider.replace_resource(net, refreshed)
+                net = refreshed
+                self.logger.info(f"Network {net.name} in slice {self.name} is active")
+                self._notify_created(net)
+
+        for node in self.nodes:
+            delegate = self.slice_object.get_node(node.name)
+            state = delegate.get_reservation_state() if delegate else None
+
+            if state in FABRIC_SLIVER_FAILED:
+                raise Exception(f"Node {node.name} in slice {self.name} is {state}: {delegate.get_error_message()}")
+
+    def _stream_slivers(self, *, label: str):
+        """
+        Polls the slivers of the slice and emits on_created for each network as soon as it is active.
+        Returns True once the slice is stable. Returns False as soon as the networks for label have been
+        notified and other resources are still being provisioned; those are handled by a later wait.
+        Nodes are only reported once the slice is stable as they need post boot config and their dataplane ips.
+        """
+        import time
+
+        start = time.time()
+
+        while True:
+            self.slice_object.update()
+            self._stream_active_slivers()
+
+            if self.slice_object.get_state() in FABRIC_SLICE_STABLE:
+                return True
+
+            names = {r.name for r in self.networks + self.nodes}
+            label_names = {r.name for r in self.networks + self.nodes if r.label == label}
+
+            if label_names <= self._notified and names - self._notified:
+                self.logger.info(f"Slice {self.name}: {label} is active. Not waiting on {names - self._notified}")
+                return False
+
+            if time.time() - start > FABRIC_WAIT_TIMEOUT:
+                raise Exception(f"Timed out waiting on slice {self.name}: state={self.slice_object.get_state()}")
+
+            time.sleep(FABRIC_POLL_INTERVAL)
+
     def delete_resource(self, *, resource: dict):
         label = resource.get(Constants.LABEL)
         rtype = resource.get(Constants.RES_TYPE)
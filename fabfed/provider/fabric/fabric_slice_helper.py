@@ -1,4 +1,6 @@
 import time
+from collections import namedtuple
+from typing import Dict, Set
 
 from fabfed.util.utils import get_logger
 from .fabric_constants import *
@@ -118,6 +120,43 @@ def add_route(slice_delegate, node, vpc_subnet, gateway, retry):
     logger.warning(f"Giving up:adding route: {vpc_subnet}:gateway={gateway} after {retry} attempts")
 
 
+TopologyDiff = namedtuple("TopologyDiff", "add_nodes remove_nodes remove_networks add_interfaces")
+
+
+def compute_topology_diff(*, live_nodes: Set[str], live_networks: Set[str], nodes: Dict[str, str],
+                          networks: Dict[str, str], live_node_network_labels: Dict[str, str],
+                          attached_nodes: Set[str]) -> TopologyDiff:
+    """
+    Computes the minimal set of edits that turns the live slice into the requested one.
+    nodes and networks map the requested resource names to their (network) labels and
+    live_node_network_labels maps the live nodes to the network label they were saved with.
+    attached_nodes are the requested nodes that already have an interface on their network.
+
+    remove_nodes maps each node to remove to the names of the networks it must first be detached from.
+    add_interfaces maps each node to the name of the live network it must be attached to.
+    """
+    add_nodes = set(nodes) - live_nodes
+    remove_nodes = {}
+
+    for name in sorted(live_nodes - set(nodes)):
+        network_label = live_node_network_labels.get(name)
+        remove_nodes[name] = sorted(net for net, label in networks.items()
+                                    if network_label and label == network_label and net in live_networks)
+
+    remove_networks = sorted(live_networks - set(networks))
+    add_interfaces = {}
+
+    for name in sorted(add_nodes - attached_nodes):
+        network_label = nodes[name]
+
+        for net, label in networks.items():
+            if network_label and label == network_label and net in live_networks:
+                add_interfaces[name] = net
+
+    return TopologyDiff(add_nodes=add_nodes, remove_nodes=remove_nodes,
+                        remove_networks=remove_networks, add_interfaces=add_interfaces)
+
+
 def init_slice(name: str, destroy_phase):
     from fabrictestbed_extensions.fablib.fablib import fablib
 
@@ -161,6 +200,41 @@ def init_slice(name: str, destroy_phase):
     return slice_object
 
 
+def delete_slice(*, slice_id: str = None, slice_name: str = None) -> bool:
+    """
+    Deletes a slice through the slice manager without going through fablib, so the slice and its topology are
+    never loaded. The slice is looked up by name when the id is not known. The orchestrator closes the slice
+    in the background. Returns False if there is no live slice by that name.
+    """
+    from fabrictestbed.slice_manager import SliceManager, SliceState, Status
+    from fabric_cf.orchestrator.swagger_client import Slice as SliceModel
+
+    manager = SliceManager()
+
+    if not slice_id:
+        status, slices = manager.slices(name=slice_name, excludes=[SliceState.Dead, SliceState.Closing])
+
+        if status != Status.OK:
+            raise Exception(f"Unable to look up slice {slice_name}: {slices}")
+
+        slices = [s for s in slices if s.name == slice_name]
+
+        if not slices:
+            return False
+
+        slice_id = slices[0].slice_id
+
+    # The slice manager deletes all the slices of the user when given no slice id
+    assert slice_id, "expected a slice id"
+    status, result = manager.delete(slice_object=SliceModel(slice_id=slice_id, name=slice_name))
+
+    if status != Status.OK:
+        raise Exception(f"Unable to delete slice {slice_name}:{slice_id}: {result}")
+
+    logger.info(f"Slice {slice_name}:{slice_id} is being closed")
+    return True
+
+
 def patch_for_token():
     if not PATCH_FOR_TOKENS:
         return
@@ -1,2 +1,3 @@
 SERVICE_KEY_PATH = 'SERVICE_KEY_PATH'
 PROJECT = 'PROJECT'
+GCP_OPERATION_TIMEOUT = 600
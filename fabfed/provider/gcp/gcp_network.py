@@ -16,23 +16,7 @@ class GcpNetwork(Network):
         self.stitch_port = stitch_port
         self.interface = []
 
-    def create(self):
-        project = self._provider.project
-        service_key_path = self._provider.service_key_path
-        vpc = self.peering.attributes.get(Constants.RES_CLOUD_VPC)
-
-        if not vpc:
-            raise GcpException(f"Must supply Vpc using peering config and {Constants.RES_CLOUD_VPC}")
-
-        vpc_details = gcp_utils.find_vpc(service_key_path=service_key_path,
-                                         project=project,
-                                         vpc=vpc)
-
-        if not vpc_details:
-            raise GcpException(f"Vpc {vpc} not found")
-
-        logger.info(f"vpc_details={vpc_details}")
-
+    def _region(self):
         region = self.peering.attributes.get(Constants.RES_CLOUD_REGION)
 
         if not region:
@@ -41,89 +25,129 @@ class GcpNetwork(Network):
         if not region:
             raise GcpException(f"Missing cloud region")
 
+        return region
+
+    def create(self):
+        project = self._provider.project
+        clients = self._provider.clients
+        vpc = self.peering.attributes.get(Constants.RES_CLOUD_VPC)
+
+        if not vpc:
+            raise GcpException(f"Must supply Vpc using peering config and {Constants.RES_CLOUD_VPC}")
+
+        region = self._region()
         router_name = f'{self.name}-router'
-        router = gcp_utils.find_router(service_key_path=service_key_path,
-                                       project=project,
-                                       region=region,
-                                       router_name=router_name)
+        attachment_name = f'{self.name}-vlan-attachment'
 
-        if not router:
-            google_asn = self.peering.attributes.get(Constants.RES_REMOTE_ASN)
+        def check_vpc():
+            vpc_details = gcp_utils.find_vpc(clients=clients, project=project, vpc=vpc)
 
-            if isinstance(google_asn, str):
-                google_asn = int(google_asn)
+            if not vpc_details:
+                raise GcpException(f"Vpc {vpc} not found")
 
-            vpc = self.peering.attributes.get(Constants.RES_CLOUD_VPC)
-            gcp_utils.create_router(service_key_path=service_key_path,
-                                    project=project,
-                                    region=region,
-                                    router_name=router_name,
-                                    vpc=vpc,
-                                    bgp_asn=google_asn)
+            logger.info(f"vpc_details={vpc_details}")
 
-        attachment_name = f'{self.name}-vlan-attachment'
-        attachment = gcp_utils.find_interconnect_attachment(service_key_path=service_key_path,
-                                                            project=project,
-                                                            region=region,
-                                                            attachment_name=attachment_name)
-
-        if not attachment:
-            mtu = self.peering.attributes.get(Constants.RES_CLOUD_MTU, 1460)
-            gcp_utils.create_interconnect_attachment(service_key_path=service_key_path,
-                                                     project=project,
-                                                     region=region,
-                                                     mtu=int(mtu),
-                                                     router_name=router_name,
-                                                     attachment_name=attachment_name)
-            attachment = gcp_utils.find_interconnect_attachment(service_key_path=service_key_path,
-                                                                project=project,
-                                                                region=region,
-                                                                attachment_name=attachment_name)
+        def find_attachment():
+            return gcp_utils.find_interconnect_attachment(clients=clients,
+                                                          project=project,
+                                                          region=region,
+                                                          attachment_name=attachment_name)
 
-        # set the MD5 authentication
-        assert Constants.RES_SECURITY in self.peering.attributes
-        bgp_key = self.peering.attributes[Constants.RES_SECURITY]
+        # The router is created in the vpc, so the vpc is checked first for a clear error when it is missing.
+        def ensure_router(check_vpc):
+            router = gcp_utils.find_router(clients=clients, project=project, region=region, router_name=router_name)
+
+            if not router:
+                google_asn = self.peering.attributes.get(Constants.RES_REMOTE_ASN)
+
+                if isinstance(google_asn, str):
+                    google_asn = int(google_asn)
+
+                operation = gcp_utils.create_router(clients=clients,
+                                                    project=project,
+                                                    region=region,
+                                                    router_name=router_name,
+                                                    vpc=vpc,
+                                                    bgp_asn=google_asn)
+                gcp_utils.wait_for_operation(clients=clients, project=project, region=region,
+                                             operation=operation, description=f"create router {router_name}")
+
+        # The attachment refers to the router, so it is inserted once the router exists.
+        def ensure_attachment(find_attachment, ensure_router):
+            attachment = find_attachment
+
+            if not attachment:
+                mtu = self.peering.attributes.get(Constants.RES_CLOUD_MTU, 1460)
+                operation = gcp_utils.create_interconnect_attachment(clients=clients,
+                                                                     project=project,
+                                                                     region=region,
+                                                                     mtu=int(mtu),
+                                                                     router_name=router_name,
+                                                                     attachment_name=attachment_name)
+                gcp_utils.wait_for_operation(clients=clients, project=project, region=region, operation=operation,
+                                             description=f"create attachment {attachment_name}")
+                attachment = gcp_utils.find_interconnect_attachment(clients=clients,
+                                                                    project=project,
+                                                                    region=region,
+                                                                    attachment_name=attachment_name)
+
+            return attachment
 
-        gcp_utils.patch_router(service_key_path=service_key_path,
-                               project=project,
-                               region=region,
-                               router_name=router_name,
-                               bgp_key=bgp_key)
+        # set the MD5 authentication
+        def patch_router(ensure_attachment):
+            assert Constants.RES_SECURITY in self.peering.attributes
+            bgp_key = self.peering.attributes[Constants.RES_SECURITY]
+            operation = gcp_utils.patch_router(clients=clients,
+                                               project=project,
+                                               region=region,
+                                               router_name=router_name,
+                                               bgp_key=bgp_key)
+            gcp_utils.wait_for_operation(clients=clients, project=project, region=region,
+                                         operation=operation, description=f"patch router {router_name}")
+
+        from fabfed.util.task_graph import TaskGraph
+
+        graph = TaskGraph(name=self.name, logger=logger)
+        graph.add('check_vpc', check_vpc)
+        graph.add('find_attachment', find_attachment)
+        graph.add('ensure_router', ensure_router, depends_on=['check_vpc'])
+        graph.add('ensure_attachment', ensure_attachment, depends_on=['find_attachment', 'ensure_router'])
+        graph.add('patch_router', patch_router, depends_on=['ensure_attachment'])
+        attachment = graph.run()['ensure_attachment']
 
         logger.info(f"attachment_details={attachment}")
         self.interface.append(dict(id=attachment.pairing_key, provider=self._provider.type))
 
     def delete(self):
         project = self._provider.project
-        service_key_path = self._provider.service_key_path
-        region = self.peering.attributes.get(Constants.RES_CLOUD_REGION)
+        clients = self._provider.clients
+        region = self._region()
 
-        if not region:
-            region = self.stitch_port['peer'].get(Constants.STITCH_PORT_REGION)
+        attachment_name = f'{self.name}-vlan-attachment'
+        router_name = f'{self.name}-router'
 
-        if not region:
-            raise GcpException(f"Missing cloud region")
+        from fabfed.util.utils import ContextThreadPoolExecutor
 
-        attachment_name = f'{self.name}-vlan-attachment'
-        attachment = gcp_utils.find_interconnect_attachment(service_key_path=service_key_path,
-                                                            project=project,
-                                                            region=region,
-                                                            attachment_name=attachment_name)
+        with ContextThreadPoolExecutor(max_workers=2) as executor:
+            attachment = executor.submit(gcp_utils.find_interconnect_attachment, clients=clients, project=project,
+                                         region=region, attachment_name=attachment_name)
+            router = executor.submit(gcp_utils.find_router, clients=clients, project=project,
+                                     region=region, router_name=router_name)
+            attachment, router = attachment.result(), router.result()
 
+        # The router can not be deleted while the attachment uses it.
         if attachment:
-            gcp_utils.delete_interconnect_vlan_attachment(service_key_path=service_key_path,
-                                                          project=project,
-                                                          region=region,
-                                                          attachment_name=attachment_name)
-
-        router_name = f'{self.name}-router'
-        router = gcp_utils.find_router(service_key_path=service_key_path,
-                                       project=project,
-                                       region=region,
-                                       router_name=router_name)
+            operation = gcp_utils.delete_interconnect_vlan_attachment(clients=clients,
+                                                                      project=project,
+                                                                      region=region,
+                                                                      attachment_name=attachment_name)
+            gcp_utils.wait_for_operation(clients=clients, project=project, region=region,
+                                         operation=operation, description=f"delete attachment {attachment_name}")
+            logger.info(f"Interconnect VLAN Attachment '{attachment_name}' deleted successfully.")
 
         if router:
-            gcp_utils.delete_router(service_key_path=service_key_path,
-                                    project=project,
-                                    region=region,
-                                    router_name=router_name)
+            operation = gcp_utils.delete_router(clients=clients, project=project, region=region,
+                                                router_name=router_name)
+            gcp_utils.wait_for_operation(clients=clients, project=project, region=region,
+                                         operation=operation, description=f"delete router {router_name}")
+            logger.info(f"Router '{router_name}' deleted successfully.")
@@ -11,6 +11,7 @@ class GcpProvider(Provider):
     def __init__(self, *, type, label, name, config: dict):
         super().__init__(type=type, label=label, name=name, logger=logger, config=config)
         self.supported_resources = [Constants.RES_TYPE_NETWORK.lower()]
+        self._clients = None
 
     @property
     def project(self):
@@ -20,6 +21,15 @@ class GcpProvider(Provider):
     def service_key_path(self):
         return self.config.get(gcp_constants.SERVICE_KEY_PATH)
 
+    @property
+    def clients(self):
+        if self._clients is None:
+            from .gcp_utils import get_clients
+
+            self._clients = get_clients(service_key_path=self.service_key_path)
+
+        return self._clients
+
     def setup_environment(self):
         normalized_config = {}
 
@@ -1,3 +1,4 @@
+import threading
 import time
 
 from google.cloud import compute_v1
@@ -15,49 +16,105 @@ from google.cloud.compute_v1.types import (
 from google.oauth2 import service_account
 
 from fabfed.util.utils import get_logger
+from .gcp_constants import GCP_OPERATION_TIMEOUT
+from .gcp_exceptions import GcpException
 
 logger = get_logger()
 
 
-GCP_REQUEST_RETRY_MAX = 10 
+class GcpClients:
+    """
+    Loads the service account credentials once and caches the compute clients built from them.
+    """
 
+    def __init__(self, *, service_key_path):
+        self.service_key_path = service_key_path
+        self._credentials = None
+        self._clients = {}
+        self._lock = threading.Lock()
 
-def find_vpc(*, service_key_path, project, vpc):
-    credentials = service_account.Credentials.from_service_account_file(service_key_path)
-    network_client = compute_v1.NetworksClient(credentials=credentials)
-    request = compute_v1.GetNetworkRequest(project=project, network=vpc)
+    @property
+    def credentials(self):
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = service_account.Credentials.from_service_account_file(self.service_key_path)
 
-    from google.api_core.exceptions import NotFound
+            return self._credentials
 
-    try:
-        return network_client.get(request=request)
-    except NotFound:
-        return None
+    def _client(self, client_class):
+        credentials = self.credentials
 
+        with self._lock:
+            if client_class not in self._clients:
+                self._clients[client_class] = client_class(credentials=credentials)
 
-def check_operation_result(*, credentials, project, region, operation_name):
-    client = compute_v1.RegionOperationsClient(credentials=credentials)
-    request = compute_v1.GetRegionOperationRequest(
-        operation=operation_name,
-        project=project,
-        region=region,
-    )
+            return self._clients[client_class]
+
+    @property
+    def networks(self) -> compute_v1.NetworksClient:
+        return self._client(compute_v1.NetworksClient)
+
+    @property
+    def routers(self) -> compute_v1.RoutersClient:
+        return self._client(compute_v1.RoutersClient)
+
+    @property
+    def interconnect_attachments(self) -> compute_v1.InterconnectAttachmentsClient:
+        return self._client(compute_v1.InterconnectAttachmentsClient)
+
+    @property
+    def region_operations(self) -> compute_v1.RegionOperationsClient:
+        return self._client(compute_v1.RegionOperationsClient)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_clients(*, service_key_path) -> GcpClients:
+    with _clients_lock:
+        if service_key_path not in _clients:
+            _clients[service_key_path] = GcpClients(service_key_path=service_key_path)
+
+        return _clients[service_key_path]
 
-    for attemp in range(GCP_REQUEST_RETRY_MAX):
-        response = client.get(request=request)
+
+def wait_for_operation(*, clients: GcpClients, project, region, operation, description):
+    """
+    Waits on a regional operation using the operations wait api, which returns as soon as the operation is done
+    instead of sleeping between polls.
+    """
+    deadline = time.time() + GCP_OPERATION_TIMEOUT
+    request = compute_v1.WaitRegionOperationRequest(project=project, region=region, operation=operation.name)
+
+    while time.time() < deadline:
+        response = clients.region_operations.wait(request=request)
 
         if response.status == Operation.Status.DONE:
+            if response.error and response.error.errors:
+                errors = [e.message for e in response.error.errors]
+                raise GcpException(f"{description}: operation {operation.name} failed: {errors}")
+
+            logger.info(f"{description}: operation {operation.name} done")
             return
-        else:
-            logger.info(f"Operation {operation_name} not done: Status={response.status}. Retrying in 5 seconds...")
-            time.sleep(5)           
-    
-    raise Exception(f"Operation {operation_name} failed after maximum retries {GCP_REQUEST_RETRY_MAX}.")
 
+        logger.info(f"{description}: operation {operation.name} not done: Status={response.status}")
+
+    raise GcpException(f"{description}: operation {operation.name} timed out after {GCP_OPERATION_TIMEOUT}s")
 
-def find_router(*, service_key_path, project, region, router_name):
-    credentials = service_account.Credentials.from_service_account_file(service_key_path)
-    compute_client = compute_v1.RoutersClient(credentials=credentials)
+
+def find_vpc(*, clients: GcpClients, project, vpc):
+    request = compute_v1.GetNetworkRequest(project=project, network=vpc)
+
+    from google.api_core.exceptions import NotFound
+
+    try:
+        return clients.networks.get(request=request)
+    except NotFound:
+        return None
+
+
+def find_router(*, clients: GcpClients, project, region, router_name):
     request = compute_v1.GetRouterRequest(
                     project=project,
                     region=region,
@@ -67,14 +124,12 @@ def find_router(*, service_key_path, project, region, router_name):
     from google.api_core.exceptions import NotFound
 
     try:
-        return compute_client.get(request=request)
+        return clients.routers.get(request=request)
     except NotFound:
         return None
 
 
-def create_router(*, service_key_path, project, region, router_name, vpc, bgp_asn):
-    credentials = service_account.Credentials.from_service_account_file(service_key_path)
-    compute_client = compute_v1.RoutersClient(credentials=credentials)
+def create_router(*, clients: GcpClients, project, region, router_name, vpc, bgp_asn):
     router_resource = Router(
         name=router_name,
         network=f'projects/{project}/global/networks/{vpc}',
@@ -85,18 +140,14 @@ def create_router(*, service_key_path, project, region, router_name, vpc, bgp_as
         region=region,
         router_resource=router_resource
     )
-    response = compute_client.insert(request=request)
+    response = clients.routers.insert(request=request)
     logger.info(f'Response={response}')
-    check_operation_result(credentials=credentials, project=project, region=region, operation_name=response.name)
-    logger.info(f'Router {router_name} created successfully.')
+    return response
 
 
-def patch_router(*, service_key_path, project, region, router_name, bgp_key):
-    credentials = service_account.Credentials.from_service_account_file(service_key_path)
-    compute_client = compute_v1.RoutersClient(credentials=credentials)
-    
+def patch_router(*, clients: GcpClients, project, region, router_name, bgp_key):
     # Get the router resource
-    router = compute_client.get(project=project, region=region, router=router_name)
+    router = clients.routers.get(project=project, region=region, router=router_name)
     
     # Access the BGP peers associated with the router
     bgp_peers = router.bgp_peers
@@ -115,31 +166,22 @@ def patch_router(*, service_key_path, project, region, router_name, bgp_key):
         region=region,
         router=router_name,
         router_resource=router_resource)
-    response = compute_client.patch(request=request)
+    response = clients.routers.patch(request=request)
     logger.info(f'Response={response}')
-    check_operation_result(credentials=credentials, project=project, region=region, operation_name=response.name)
-    logger.info(f'Router {router_name} patched successfully.')
+    return response
 
 
-def delete_router(*, service_key_path, project, region, router_name):
-    credentials = service_account.Credentials.from_service_account_file(service_key_path)
-    client = compute_v1.RoutersClient(credentials=credentials)
+def delete_router(*, clients: GcpClients, project, region, router_name):
     request = compute_v1.DeleteRouterRequest(
         project=project,
         region=region,
         router=router_name,
     )
-    
-    response = client.delete(request=request)
-    check_operation_result(credentials=credentials, project=project,
-                           region=region, operation_name=response.name)
-    logger.info(f"Router '{router_name}' deleted successfully.")
 
+    return clients.routers.delete(request=request)
 
-def find_interconnect_attachment(*, service_key_path, project, region, attachment_name):
-    credentials = service_account.Credentials.from_service_account_file(service_key_path)
-    compute_client = compute_v1.InterconnectAttachmentsClient(credentials=credentials)
 
+def find_interconnect_attachment(*, clients: GcpClients, project, region, attachment_name):
     request = compute_v1.GetInterconnectAttachmentRequest(
                     project=project,
                     region=region,
@@ -149,14 +191,12 @@ def find_interconnect_attachment(*, service_key_path, project, region, attachmen
     from google.api_core.exceptions import NotFound
 
     try:
-        return compute_client.get(request=request)
+        return clients.interconnect_attachments.get(request=request)
     except NotFound:
         return None
 
 
-def create_interconnect_attachment(*, service_key_path, project, region, mtu, router_name, attachment_name):
-    credentials = service_account.Credentials.from_service_account_file(service_key_path)
-    compute_client = compute_v1.InterconnectAttachmentsClient(credentials=credentials)
+def create_interconnect_attachment(*, clients: GcpClients, project, region, mtu, router_name, attachment_name):
     interconnect_attachment_resource = InterconnectAttachment(
         name=f'{attachment_name}',
         admin_enabled=True,
@@ -171,20 +211,14 @@ def create_interconnect_attachment(*, service_key_path, project, region, mtu, ro
         region=region,
         interconnect_attachment_resource=interconnect_attachment_resource
     )
-    response = compute_client.insert(request=request)
-    check_operation_result(credentials=credentials, project=project, region=region, operation_name=response.name)
-    logger.info(f"Interconnect VLAN Attachment '{attachment_name}' created successfully.")
+    return clients.interconnect_attachments.insert(request=request)
 
 
-def delete_interconnect_vlan_attachment(*, service_key_path, project, region, attachment_name):
-    credentials = service_account.Credentials.from_service_account_file(service_key_path)
-    client = compute_v1.InterconnectAttachmentsClient(credentials=credentials)
+def delete_interconnect_vlan_attachment(*, clients: GcpClients, project, region, attachment_name):
     request = compute_v1.DeleteInterconnectAttachmentRequest(
         project=project,
         region=region,
         interconnect_attachment=attachment_name,
     )
 
-    response = client.delete(request=request)
-    check_operation_result(credentials=credentials, project=project, region=region, operation_name=response.name)
-    logger.info(f"Interconnect VLAN Attachment '{attachment_name}' deleted successfully.")
+    return clients.interconnect_attachments.delete(request=request)
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+
+from fabfed.util.utils import get_logger
+from .sense_constants import SENSE_CACHE_TTL
+
+logger = get_logger()
+
+
+def get_cache_dir():
+    from pathlib import Path
+
+    cache_dir = os.path.join(str(Path.home()), '.fabfed', 'cache', 'sense')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+class MetadataCache:
+    """
+    A process wide cache of SENSE metadata that is also kept in a json file under ~/.fabfed/cache/sense.
+    Entries older than ttl seconds are fetched again. Values must be json serializable, so api responses
+    are cached as they are received.
+    """
+
+    def __init__(self, *, name: str, ttl: int = SENSE_CACHE_TTL, cache_dir: str = None):
+        self.name = name
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self._entries = None
+        self._lock = threading.RLock()
+
+    @property
+    def cache_file(self):
+        return os.path.join(self.cache_dir or get_cache_dir(), f"{self.name}.json")
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = {}
+
+        try:
+            with open(self.cache_file, 'r') as fp:
+                self._entries = json.load(fp)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring sense cache {self.cache_file}: {e}")
+
+        return self._entries
+
+    def _save(self):
+        temp_file = f"{self.cache_file}.{os.getpid()}.{threading.get_ident()}"
+
+        try:
+            with open(temp_file, 'w') as fp:
+                json.dump(self._entries, fp)
+
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            logger.warning(f"Could not save sense cache {self.cache_file}: {e}")
+
+    def is_fresh(self, key: str) -> bool:
+        with self._lock:
+            entry = self._load().get(key)
+            return entry is not None and time.time() - entry['time'] < self.ttl
+
+    def keys(self):
+        with self._lock:
+            return list(self._load())
+
+    def get(self, key: str, fetch):
+        with self._lock:
+            entry = self._load().get(key)
+
+            if entry is not None and time.time() - entry['time'] < self.ttl:
+                return entry['value']
+
+        value = fetch()
+
+        with self._lock:
+            self._entries[key] = dict(value=value, time=time.time())
+            self._save()
+
+        return value
+
+    def invalidate(self, key: str = None):
+        with self._lock:
+            if key is None:
+                self._entries = {}
+            else:
+                self._load().pop(key, None)
+
+            self._save()
+
+
+PROFILE_UUIDS = MetadataCache(name='profile_uuids')
+PROFILES = MetadataCache(name='profiles')
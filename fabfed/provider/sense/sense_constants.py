@@ -71,6 +71,18 @@ SENSE_NODE_NAME = 'Node Name'
 SENSE_IMAGE = 'Image'
 
 SENSE_RETRY = 50
+SENSE_POLL_MIN_INTERVAL = 5
+SENSE_POLL_MAX_INTERVAL = 30
+SENSE_POLL_BACKOFF = 1.5
+SENSE_WAIT_TIMEOUT = SENSE_RETRY * 35
+
+# A status must be seen on this many consecutive polls before a wait accepts it.
+SENSE_CONFIRMATIONS = 2
+
+# Profiles and profile uuids are cached on disk under ~/.fabfed/cache/sense for this many seconds.
+SENSE_CACHE_TTL = 6 * 3600
+
+SENSE_CREATE_SETTLED = ['CREATE - COMPILED', 'CREATE - COMMITTING', 'CREATE - COMMITTED', 'CREATE - READY']
 
 class SupportedCloud(str, enum.Enum):
     """
@@ -20,28 +20,8 @@ class SenseNode(Node):
         self.dataplane_ipv6 = None
         self._provider = provider
 
-    def create(self):
-        si_uuid = sense_utils.find_instance_by_alias(alias=self.network)
-
-        if not si_uuid:
-            raise SenseException(f"Instance not found by alias={self.network}")
-
-        status = sense_utils.instance_get_status(si_uuid=si_uuid)
-
-        if status != 'CREATE - READY':
-            raise SenseException(f"Instance is not ready:status={status}")
-        
-        """ retrieve the gateway type from intents """
-        instance_dict = sense_utils.service_instance_details(si_uuid=si_uuid)
-        gateway_type = instance_dict.get("intents")[0]['json']['data']['gateways'][0]['type'].upper()
-        if "GCP" in gateway_type:
-            template_file = 'gcp-template.json'
-        elif "AWS" in gateway_type:
-            template_file = 'aws-template.json'
-        else:
-            raise SenseException(f"Was not able to get node template file {self.name}")
-
-        details = sense_utils.manifest_create(alias=self.network, template_file=template_file)
+    def create(self, manifest=None):
+        gateway_type, details = manifest or sense_utils.node_manifest(alias=self.network)
 
         for node_details in details.get("Nodes", []):
             if node_details[SenseConstants.SENSE_NODE_NAME].lower() == self.spec_name.lower():
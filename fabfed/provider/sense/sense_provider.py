@@ -30,6 +30,14 @@ class SenseProvider(Provider):
             raise ProviderException(f"{self.name}: unable to read/parse ssh key in {pkey}")
 
         self.config[SENSE_SLICE_PRIVATE_KEY_LOCATION] = pkey
+        self._init_client()
+
+        try:
+            from . import sense_utils
+
+            sense_utils.prefetch_metadata()
+        except Exception as e:
+            self.logger.warning(f"{self.name}: Could not prefetch sense metadata: {e}")
 
     @property
     def private_key_file_location(self):
@@ -172,9 +180,17 @@ class SenseProvider(Provider):
         label = resource.get(Constants.LABEL)
 
         if rtype == Constants.RES_TYPE_NODE:
+            from . import sense_utils
+
+            manifests = {}
+
             for node in [node for node in self._nodes if node.label == label]:
                 self.logger.debug(f"Creating node: {vars(node)}")
-                node.create()
+
+                if node.network not in manifests:
+                    manifests[node.network] = sense_utils.node_manifest(alias=node.network)
+
+                node.create(manifests[node.network])
 
                 if self.resource_listener:
                     self.resource_listener.on_created(source=self, provider=self, resource=node)
@@ -183,7 +199,9 @@ class SenseProvider(Provider):
 
             return
 
-        for net in [net for net in self._networks if net.label == label]:
+        nets = [net for net in self._networks if net.label == label]
+
+        def create_network(net):
             self.logger.debug(f"Creating network: {vars(net)}")
             net.create()
 
@@ -192,6 +210,17 @@ class SenseProvider(Provider):
 
             self.logger.debug(f"Created network: {vars(net)}")
 
+        if len(nets) == 1:
+            create_network(nets[0])
+            return
+
+        # Each network is its own service instance. Their status waits are independent and can run side by side.
+        from fabfed.util.utils import ContextThreadPoolExecutor
+
+        with ContextThreadPoolExecutor(max_workers=len(nets) or 1) as executor:
+            for future in [executor.submit(create_network, net) for net in nets]:
+                future.result()
+
     def do_delete_resource(self, *, resource: dict):
         self._init_client()
         rtype = resource.get(Constants.RES_TYPE)
@@ -1,4 +1,6 @@
 import json
+import threading
+import time
 from types import SimpleNamespace
 
 from sense.client.discover_api import DiscoverApi
@@ -6,6 +8,7 @@ from sense.client.profile_api import ProfileApi
 from sense.client.workflow_combined_api import WorkflowCombinedApi
 
 from .sense_client import get_client
+from . import sense_cache
 
 from .sense_constants import *
 from .sense_exceptions import SenseException
@@ -14,14 +17,24 @@ from fabfed.util.utils import get_logger
 
 logger = get_logger()
 
+_image_infos = None
+_image_infos_lock = threading.Lock()
+
 
 def get_image_info(image_spec, attr=None):
     import os
 
+    global _image_infos
+
     path_file = os.path.join(os.path.dirname(__file__), 'inventory', 'sense_image_info.json')
+    mtime = os.stat(path_file).st_mtime_ns
 
-    with open(path_file, 'r') as fp:
-        infos = json.load(fp)
+    with _image_infos_lock:
+        if _image_infos is None or _image_infos[0] != mtime:
+            with open(path_file, 'r') as fp:
+                _image_infos = (mtime, json.load(fp))
+
+        infos = _image_infos[1]
 
     if not attr:
         return infos.get(image_spec)
@@ -29,10 +42,15 @@ def get_image_info(image_spec, attr=None):
     return infos.get(image_spec, dict()).get(attr)
 
 
+def _cache_key(client, key: str):
+    config = getattr(client, 'config', None) or {}
+    return f"{config.get('API_ENDPOINT', '')}|{key}"
+
+
 def describe_profile(*, client=None, uuid: str):
     client = client or get_client()
     profile_api = ProfileApi(req_wrapper=client)
-    profile_details = profile_api.profile_describe(uuid)
+    profile_details = sense_cache.PROFILES.get(_cache_key(client, uuid), lambda: profile_api.profile_describe(uuid))
     profile_details = json.loads(profile_details, object_hook=lambda dct: SimpleNamespace(**dct))
 
     if hasattr(profile_details, "edit"):
@@ -86,6 +104,12 @@ def populate_options_using_interfaces(options, interfaces, edit_uri_entries):
 
 
 def get_profile_uuid(*, client=None, profile):
+    client = client or get_client()
+    return sense_cache.PROFILE_UUIDS.get(_cache_key(client, profile),
+                                         lambda: _get_profile_uuid(client=client, profile=profile))
+
+
+def _get_profile_uuid(*, client=None, profile):
     client = client or get_client()
     profile_api = ProfileApi(req_wrapper=client)
 
@@ -166,9 +190,6 @@ def create_instance(*, client=None, bandwidth, profile, alias, layer3, peering,
     logger.info(f'Intent: {json.dumps(intent, indent=2)}')
     intent = json.dumps(intent)
 
-    import time
-    from random import randint
-
     for attempt in range(SENSE_RETRY):
         try:
             logger.info(f"creating instance: {alias}:attempt={attempt + 1}")
@@ -179,51 +200,79 @@ def create_instance(*, client=None, bandwidth, profile, alias, layer3, peering,
         except Exception as e:
             logger.warning(f"exception while creating instance {e}")
 
-        time.sleep(randint(30, 35))
+        time.sleep(SENSE_POLL_MAX_INTERVAL)
 
     raise SenseException(f"could not create instance {alias}")
 
 
+def wait_for_status(*, client=None, si_uuid, until, fail=('FAILED',), confirmations=1, timeout=SENSE_WAIT_TIMEOUT):
+    """
+    Polls the status of a service instance until it contains one of until or fail. A status from until must be
+    seen on confirmations consecutive polls. The interval backs off while the status does not change.
+    Returns the last status seen.
+    """
+    client = client or get_client()
+    workflow_api = WorkflowCombinedApi(req_wrapper=client)
+    deadline = time.time() + timeout
+    interval = SENSE_POLL_MIN_INTERVAL
+    status = None
+    seen = 0
+
+    while True:
+        try:
+            temp = workflow_api.instance_get_status(si_uuid=si_uuid)
+        except Exception as e:
+            logger.warning(f"exception from  instance_get_status {e}")
+            temp = status
+
+        if temp != status:
+            logger.info(f"Waiting on {until}: {si_uuid} status={temp}")
+            status = temp
+            seen = 0
+            interval = SENSE_POLL_MIN_INTERVAL
+        else:
+            interval = min(interval * SENSE_POLL_BACKOFF, SENSE_POLL_MAX_INTERVAL)
+
+        if status and any(f in status for f in fail):
+            return status
+
+        if status and any(u in status for u in until):
+            seen += 1
+
+            if seen >= confirmations:
+                return status
+
+            interval = SENSE_POLL_MIN_INTERVAL
+
+        if time.time() + interval > deadline:
+            logger.warning(f"Timed out waiting on {until}: {si_uuid} status={status}")
+            return status
+
+        time.sleep(interval)
+
+
 def instance_operate(*, client=None, si_uuid):
     client = client or get_client()
     workflow_api = WorkflowCombinedApi(req_wrapper=client)
 
-    import time
-    from random import randint
+    # Provision is accepted once the instance has settled in a create state.
+    status = wait_for_status(client=client, si_uuid=si_uuid, until=SENSE_CREATE_SETTLED,
+                             confirmations=SENSE_CONFIRMATIONS)
 
-    status = workflow_api.instance_get_status(si_uuid=si_uuid)
+    if not status or not any(settled in status for settled in SENSE_CREATE_SETTLED):
+        raise SenseException(f"instance {si_uuid} did not settle in a create state: status={status}")
 
-    if "CREATE - COMMITTING" not in status:
+    if not any(s in status for s in ['CREATE - COMMITTING', 'CREATE - COMMITTED', 'CREATE - READY']):
         try:
-            time.sleep(randint(5, 30))
             workflow_api.instance_operate('provision', si_uuid=si_uuid, sync='false')  # AES TODO THIS GUY
         except Exception as e:
             logger.warning(f"exception from  instance_operate {e}")
             pass
 
-    for attempt in range(SENSE_RETRY):
-        try:
-            status = workflow_api.instance_get_status(si_uuid=si_uuid)
-            logger.info(f"Waiting on CREATED-READY: status={status}:attempt={attempt} out of {SENSE_RETRY}")
-
-            if 'CREATE - READY' in status:
-                break
-
-            if 'FAILED' in status:
-                break
-        except Exception as e:
-            logger.warning(f"exception from  instance_get_status {e}")
-            pass
-
-        logger.info(f"Waiting on CREATED-READY: going to sleep attempt={attempt}")
-        time.sleep(randint(30, 35))
-
-    return workflow_api.instance_get_status(si_uuid=si_uuid)
+    return wait_for_status(client=client, si_uuid=si_uuid, until=['CREATE - READY'])
 
 
 def delete_instance(*, client=None, si_uuid):
-    import time, random
-
     client = client or get_client()
     workflow_api = WorkflowCombinedApi(req_wrapper=client)
 
@@ -236,8 +285,13 @@ def delete_instance(*, client=None, si_uuid):
         raise SenseException(f'cannot delete instance - contact admin. {status}')
 
     if "CREATE - COMPILED" in status:
-        time.sleep(random.randint(5, 30))
+        status = wait_for_status(client=client, si_uuid=si_uuid, until=['CREATE - COMPILED'],
+                                 confirmations=SENSE_CONFIRMATIONS)
+
+        if not status:
+            raise SenseException(f"could not get the status of instance {si_uuid}")
 
+    if "CREATE - COMPILED" in status:
         workflow_api.instance_delete(si_uuid=si_uuid)
         return
 
@@ -245,29 +299,20 @@ def delete_instance(*, client=None, si_uuid):
         if 'CREATE' not in status and 'REINSTATE' not in status and 'MODIFY' not in status:
             raise ValueError(f"cannot cancel an instance in '{status}' status...")
 
-        time.sleep(random.randint(5, 30))
-
         if 'READY' not in status:
             workflow_api.instance_operate('cancel', si_uuid=si_uuid, sync='false', force='true')
         else:
             workflow_api.instance_operate('cancel', si_uuid=si_uuid, sync='false')
 
-    for attempt in range(SENSE_RETRY):
-        time.sleep(random.randint(30, 35))  # This sleep is here to workaround issue where CANCEL-READY shows up prematurely.
-
-        status = workflow_api.instance_get_status(si_uuid=si_uuid)
-        # print("LOOPING:DELETE:Status=", status, "attempt=", attempt)
-        logger.info(f"Waiting on CANCEL-READY: status={status}:attempt={attempt} out of {SENSE_RETRY}")
-
-        if 'CANCEL - READY' in status:  # This got triggered very quickly ...
-            break
+    # CANCEL - READY can show up before the cancel is processed, so it must be confirmed by consecutive polls.
+    status = wait_for_status(client=client, si_uuid=si_uuid, until=['CANCEL - READY'],
+                             confirmations=SENSE_CONFIRMATIONS)
 
-        if 'FAILED' in status:
-            break
+    if not status:
+        raise SenseException(f'could not get the status of instance {si_uuid} - instance not deleted')
 
     if 'CANCEL - READY' in status:
         logger.info(f"Deleting instance: {si_uuid}")
-        time.sleep(random.randint(5, 30))
         ret = workflow_api.instance_delete(si_uuid=si_uuid)
         logger.info(f"Deleted instance: {si_uuid}: ret={ret}")
     else:
@@ -348,7 +393,6 @@ def get_vms_specs_from_profile(*, client=None, profile_uuid):
 
 def manifest_create(*, client=None, template_file=None, alias=None, si_uuid=None):
     import os
-    import time
     from json.decoder import JSONDecodeError
 
     client = client or get_client()
@@ -374,3 +418,59 @@ def manifest_create(*, client=None, template_file=None, alias=None, si_uuid=None
         time.sleep(10)
 
     raise SenseException(f"Unable to retrieve manifest using {template_file}")
+
+
+def node_manifest(*, client=None, alias):
+    """
+    Returns the gateway type and the node manifest of the ready instance with this alias.
+    The nodes of an instance share this manifest, so it is looked up once for all of them.
+    """
+    client = client or get_client()
+    si_uuid = find_instance_by_alias(client=client, alias=alias)
+
+    if not si_uuid:
+        raise SenseException(f"Instance not found by alias={alias}")
+
+    status = instance_get_status(client=client, si_uuid=si_uuid)
+
+    if status != 'CREATE - READY':
+        raise SenseException(f"Instance is not ready:status={status}")
+
+    """ retrieve the gateway type from intents """
+    instance_dict = service_instance_details(client=client, si_uuid=si_uuid)
+    gateway_type = instance_dict.get("intents")[0]['json']['data']['gateways'][0]['type'].upper()
+
+    if "GCP" in gateway_type:
+        template_file = 'gcp-template.json'
+    elif "AWS" in gateway_type:
+        template_file = 'aws-template.json'
+    else:
+        raise SenseException(f"Was not able to get node template file for {alias}")
+
+    return gateway_type, manifest_create(client=client, si_uuid=si_uuid, template_file=template_file)
+
+
+def prefetch_metadata(*, client=None):
+    """
+    Loads the image info and refreshes the cached profiles of this orchestrator that have expired,
+    so that adding and creating resources does not wait on them.
+    """
+    from fabfed.util.utils import ContextThreadPoolExecutor
+
+    client = client or get_client()
+    get_image_info(None)
+    prefix = _cache_key(client, '')
+    profiles = [key[len(prefix):] for key in sense_cache.PROFILE_UUIDS.keys() if key.startswith(prefix)
+                and not sense_cache.PROFILE_UUIDS.is_fresh(key)]
+
+    def refresh(profile):
+        try:
+            describe_profile(client=client, uuid=get_profile_uuid(client=client, profile=profile))
+        except Exception as e:
+            logger.warning(f"Could not refresh sense profile {profile}: {e}")
+
+    if profiles:
+        logger.info(f"Refreshing {len(profiles)} cached sense profile(s)")
+
+        with ContextThreadPoolExecutor(max_workers=min(len(profiles), 8)) as executor:
+            list(executor.map(refresh, profiles))
@@ -1,5 +1,5 @@
 from .parser import Parser
-from .config_models import ResourceConfig, ProviderConfig
+from .config_models import Config, ResourceConfig, ProviderConfig, DependencyInfo
 from typing import List, Union, Dict
 
 
@@ -14,8 +14,83 @@ class WorkflowConfig:
     def get_resource_configs(self) -> List[ResourceConfig]:
         return self.resource_configs
 
+    def overlay(self):
+        return ConfigOverlay(self).build()
+
     @staticmethod
     def parse(*, dir_path: Union[str, None] = None, content: Union[str, None] = None,
               var_dict: Union[Dict, None] = None):
         provider_configs, resource_configs = Parser.parse(dir_path=dir_path, content=content, var_dict=var_dict)
         return WorkflowConfig(provider_configs=provider_configs, resource_configs=resource_configs)
+
+
+class ConfigOverlay:
+    """
+    Builds a per-run view of a parsed workflow config without deep copying it.
+
+    Providers, resources and the configs they reference (layer3, peering, policy) get their own
+    attribute dicts and resources get their own dependency sets. Dependencies, including the DependencyInfo
+    values nested in attributes, point at the overlay resources. Other attribute values are shared with the
+    parsed config, so per-run code must replace a value rather than mutate it in place.
+    """
+
+    def __init__(self, config: WorkflowConfig):
+        self.config = config
+        self._configs: Dict[int, Config] = {}
+        self._resources: Dict[str, ResourceConfig] = {}
+
+    def _overlay_config(self, config: Config) -> Config:
+        key = id(config)
+
+        if key not in self._configs:
+            self._configs[key] = Config(config.type, config.var_name, self._overlay_attributes(config.attributes))
+
+        return self._configs[key]
+
+    def _overlay_resource(self, resource):
+        # Parsed attributes refer to resources by their unresolved BaseConfig, so resources are matched by label.
+        if resource.label in self._resources:
+            return self._resources[resource.label]
+
+        return self._overlay_value(resource)
+
+    def _overlay_value(self, value):
+        if isinstance(value, Config):
+            return self._overlay_config(value)
+
+        if isinstance(value, DependencyInfo):
+            return value._replace(resource=self._overlay_resource(value.resource))
+
+        if isinstance(value, list):
+            return [self._overlay_value(v) for v in value]
+
+        if isinstance(value, dict):
+            return self._overlay_attributes(value)
+
+        return value
+
+    def _overlay_attributes(self, attributes: Dict) -> Dict:
+        return {k: self._overlay_value(v) for k, v in attributes.items()}
+
+    def build(self) -> WorkflowConfig:
+        provider_map: Dict[str, ProviderConfig] = {}
+
+        for provider in self.config.get_provider_configs():
+            provider_map[provider.label] = ProviderConfig(provider.type, provider.var_name, provider.attributes.copy())
+
+        for resource in self.config.get_resource_configs():
+            self._resources[resource.label] = ResourceConfig(resource.type,
+                                                             resource.var_name,
+                                                             {},
+                                                             provider_map[resource.provider.label])
+
+        # Attributes are filled in once every resource exists, so that nested dependencies can be remapped.
+        for resource in self.config.get_resource_configs():
+            temp = self._resources[resource.label]
+            temp.attributes = self._overlay_attributes(resource.attributes)
+
+            for dependency in resource.dependencies:
+                temp.add_dependency(dependency._replace(resource=self._overlay_resource(dependency.resource)))
+
+        return WorkflowConfig(provider_configs=list(provider_map.values()),
+                              resource_configs=list(self._resources.values()))
@@ -0,0 +1,213 @@
+from collections import namedtuple
+from typing import List, Union
+
+from fabfed.util.stats import FabfedStats
+
+Percentiles = namedtuple("Percentiles", "name count failures min p50 p90 p95 p99 max")
+
+TrendPoint = namedtuple("TrendPoint", "bucket name count failures median p90")
+
+LEVELS = ['workflow', 'provider', 'resource']
+
+BUCKETS = {'day': '%Y-%m-%d', 'week': '%Y-W%W'}
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session TEXT NOT NULL,
+    action TEXT NOT NULL,
+    finished REAL NOT NULL,
+    workflow_duration REAL,
+    config_duration REAL,
+    controller_duration REAL,
+    providers_duration REAL,
+    has_failures INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS provider_runs (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    provider TEXT NOT NULL,
+    duration REAL,
+    setup_duration REAL,
+    plan_duration REAL,
+    create_duration REAL,
+    delete_duration REAL,
+    has_failures INTEGER NOT NULL,
+    has_pending INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resource_runs (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    provider TEXT NOT NULL,
+    label TEXT NOT NULL,
+    duration REAL,
+    invocations INTEGER,
+    failure TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_finished ON runs(finished);
+CREATE INDEX IF NOT EXISTS provider_runs_run_id ON provider_runs(run_id);
+CREATE INDEX IF NOT EXISTS resource_runs_run_id ON resource_runs(run_id);
+'''
+
+_QUERIES = {
+    'workflow': '''SELECT r.finished, 'workflow', r.workflow_duration, r.has_failures
+                   FROM runs r WHERE 1 = 1''',
+    'provider': '''SELECT r.finished, p.provider, p.duration, p.has_failures
+                   FROM runs r JOIN provider_runs p ON p.run_id = r.id WHERE 1 = 1''',
+    'resource': '''SELECT r.finished, p.provider || '.' || p.label, p.duration, p.failure IS NOT NULL
+                   FROM runs r JOIN resource_runs p ON p.run_id = r.id WHERE 1 = 1'''
+}
+
+
+def get_history_file():
+    from pathlib import Path
+    import os
+
+    base_dir = os.path.join(str(Path.home()), '.fabfed', 'stats')
+    os.makedirs(base_dir, exist_ok=True)
+    return os.path.join(base_dir, 'history.db')
+
+
+def _connect(db_path: Union[str, None]):
+    import sqlite3
+
+    # Sessions of a batch run record their stats concurrently, so wait on the lock instead of failing.
+    conn = sqlite3.connect(db_path or get_history_file(), timeout=30)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def record_run(session: str, stats: FabfedStats, db_path: Union[str, None] = None, finished=None) -> int:
+    """
+    Appends the stats of a workflow run to the run history. Earlier runs are never updated or removed.
+    """
+    import time
+
+    conn = _connect(db_path)
+
+    try:
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO runs (session, action, finished, workflow_duration, config_duration, '
+                'controller_duration, providers_duration, has_failures) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (session, stats.action, finished or time.time(), stats.workflow_duration.duration,
+                 stats.workflow_config.duration, stats.controller.duration, stats.providers.duration,
+                 bool(stats.has_failures)))
+            run_id = cursor.lastrowid
+
+            for provider_stats in stats.provider_stats:
+                stages = provider_stats.stages
+                conn.execute(
+                    'INSERT INTO provider_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (run_id, provider_stats.provider, provider_stats.provider_duration.duration,
+                     stages.setup_duration, stages.plan_duration, stages.create_duration, stages.delete_duration,
+                     bool(provider_stats.has_failures), bool(provider_stats.has_pending)))
+                conn.executemany(
+                    'INSERT INTO resource_runs VALUES (?, ?, ?, ?, ?, ?)',
+                    [(run_id, provider_stats.provider, r.label, r.duration, r.invocations, r.failure)
+                     for r in provider_stats.resource_stats])
+
+        return run_id
+    finally:
+        conn.close()
+
+
+def _select(*, level, action, session, provider, days, db_path):
+    import time
+
+    if level not in _QUERIES:
+        from fabfed.exceptions import FabfedException
+
+        raise FabfedException(f"unknown history level {level}. Expected one of {LEVELS}")
+
+    query = _QUERIES[level]
+    params = []
+
+    if action:
+        query += ' AND r.action = ?'
+        params.append(action)
+
+    if session:
+        query += ' AND r.session = ?'
+        params.append(session)
+
+    if provider and level != 'workflow':
+        query += ' AND p.provider = ?'
+        params.append(provider)
+
+    if days:
+        query += ' AND r.finished >= ?'
+        params.append(time.time() - days * 24 * 3600)
+
+    conn = _connect(db_path)
+
+    try:
+        return conn.execute(query + ' ORDER BY r.finished', params).fetchall()
+    finally:
+        conn.close()
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Linear interpolation between the closest ranks. The values must be sorted.
+    """
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _group(rows, key):
+    groups = {}
+
+    for row in rows:
+        groups.setdefault(key(row), []).append(row)
+
+    return groups
+
+
+def query_percentiles(*, level='provider', action=None, session=None, provider=None, days=None,
+                      db_path=None) -> List[Percentiles]:
+    rows = _select(level=level, action=action, session=session, provider=provider, days=days, db_path=db_path)
+    results = []
+
+    for name, group in _group(rows, key=lambda row: row[1]).items():
+        durations = sorted(row[2] for row in group if row[2] is not None)
+
+        if not durations:
+            continue
+
+        results.append(Percentiles(name=name,
+                                   count=len(group),
+                                   failures=sum(1 for row in group if row[3]),
+                                   min=durations[0],
+                                   p50=percentile(durations, 50),
+                                   p90=percentile(durations, 90),
+                                   p95=percentile(durations, 95),
+                                   p99=percentile(durations, 99),
+                                   max=durations[-1]))
+
+    return results
+
+
+def query_trend(*, level='provider', bucket='day', action=None, session=None, provider=None, days=None,
+                db_path=None) -> List[TrendPoint]:
+    import time
+
+    fmt = BUCKETS[bucket]
+    rows = _select(level=level, action=action, session=session, provider=provider, days=days, db_path=db_path)
+    results = []
+
+    for (period, name), group in _group(rows, key=lambda row: (time.strftime(fmt, time.localtime(row[0])),
+                                                               row[1])).items():
+        durations = sorted(row[2] for row in group if row[2] is not None)
+
+        if not durations:
+            continue
+
+        results.append(TrendPoint(bucket=period,
+                                  name=name,
+                                  count=len(group),
+                                  failures=sum(1 for row in group if row[3]),
+                                  median=percentile(durations, 50),
+                                  p90=percentile(durations, 90)))
+
+    return results
@@ -1,62 +1,197 @@
 from fabfed.model.state import ProviderState
 from fabfed.util.utils import get_base_dir, get_stats_base_dir
-from typing import List, Dict
+from typing import List, Dict, Iterator
 
 import json
 
 
 class SetEncoder(json.JSONEncoder):
+    def iterencode(self, o, _one_shot=False):
+        from fabfed.model.state import json_ready
+
+        return super().iterencode(json_ready(o), _one_shot)
+
     def default(self, obj):
-        if isinstance(obj, set):
-            return list(obj)
+        from fabfed.model.state import json_default, json_ready
+
+        return json_ready(json_default(obj))
+
+
+def _orjson():
+    try:
+        import orjson
+
+        return orjson
+    except ImportError:
+        return None
+
+
+def dump_json(obj, indent=None) -> str:
+    """
+    Uses orjson when it is installed for compact output. orjson only indents by two spaces,
+    so indented output always goes through the stdlib encoder to keep the existing format.
+    """
+    if indent is None:
+        orjson = _orjson()
+
+        if orjson:
+            from fabfed.model.state import json_default
+
+            return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    return json.dumps(obj, cls=SetEncoder, indent=indent)
+
+
+class StreamEmitter:
+    """
+    Writes sections of objects one object at a time instead of dumping a fully built document.
+    The yaml and json output match what yaml.dump and json.dumps(indent=3) produce for the whole document.
+    With ndjson, every object is written on its own line along with the name of its section.
+    A section named None is written as a top level list and must be the only section.
+    """
+
+    def __init__(self, *, to_json: bool = False, ndjson: bool = False, stream=None, **yaml_kwargs):
+        import sys
+
+        self.to_json = to_json
+        self.ndjson = ndjson
+        self.stream = stream or sys.stdout
+        self.yaml_kwargs = dict(default_flow_style=False, sort_keys=False)
+        self.yaml_kwargs.update(yaml_kwargs)
+        self.section = None
+        self.section_count = 0
+        self.item_count = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start_section(self, name=None):
+        self._end_section()
+        self.section = name
+        self.section_count += 1
+        self.item_count = 0
+
+        if self.ndjson or name is None:
+            return
+
+        if self.to_json:
+            self.stream.write('{' if self.section_count == 1 else ',')
+            self.stream.write(f'\n   {json.dumps(name)}: ')
+        else:
+            self.stream.write(f'{name}:')
+
+    def emit(self, obj):
+        self.item_count += 1
+
+        if self.ndjson:
+            if hasattr(obj, '_asdict'):
+                record = obj._asdict()
+            elif isinstance(obj, dict):
+                record = obj
+            elif hasattr(obj, '__dict__'):
+                record = vars(obj)
+            else:
+                record = dict(value=obj)
+
+            if self.section is not None:
+                record = {'section': self.section, **record}
+
+            self.stream.write(dump_json(record))
+            self.stream.write('\n')
+            self.stream.flush()
+        elif self.to_json:
+            indent = ' ' * (6 if self.section is not None else 3)
+            self.stream.write('[\n' if self.item_count == 1 else ',\n')
+            self.stream.write(indent + dump_json(obj, indent=3).replace('\n', '\n' + indent))
         else:
-            return obj.__dict__
+            import yaml
+            from fabfed.model.state import get_dumper
 
+            if self.item_count == 1 and self.section is not None:
+                self.stream.write('\n')
 
-def dump_plan(*, resources, to_json: bool, summary: bool = False):
+            self.stream.write(yaml.dump([obj], Dumper=get_dumper(), **self.yaml_kwargs))
+
+    def _end_section(self):
+        if self.ndjson or not self.section_count:
+            return
+
+        if self.to_json:
+            if self.item_count:
+                self.stream.write('\n   ]' if self.section is not None else '\n]')
+            else:
+                self.stream.write('[]')
+        elif not self.item_count:
+            self.stream.write(' []\n' if self.section is not None else '[]\n')
+
+    def close(self):
+        if self.closed:
+            return
+
+        self.closed = True
+        self._end_section()
+
+        if self.to_json and not self.ndjson:
+            if self.section_count and self.section is not None:
+                self.stream.write('\n}')
+            elif not self.section_count:
+                self.stream.write('{}')
+
+        self.stream.flush()
+
+
+def _resource_details(resource):
+    from fabfed.util.constants import Constants
+
+    resource_dict = resource.attributes.copy()
+    del_attrs = [Constants.EXTERNAL_DEPENDENCIES,
+                 Constants.RESOLVED_EXTERNAL_DEPENDENCIES,
+                 Constants.INTERNAL_DEPENDENCIES,
+                 Constants.RESOLVED_INTERNAL_DEPENDENCIES,
+                 Constants.SAVED_STATES]
+
+    for attr in del_attrs:
+        del resource_dict[attr]
+
+    stringify_attrs = [Constants.PROVIDER,
+                       Constants.RES_INTERFACES,
+                       Constants.RES_NODES,
+                       Constants.RES_NETWORK,
+                       Constants.RES_STITCH_INTERFACE,
+                       Constants.NETWORK_STITCH_WITH,
+                       Constants.RES_LAYER3,
+                       Constants.RES_PEER_LAYER3,
+                       Constants.RES_PEERING
+                       ]
+
+    for attr in stringify_attrs:
+        if attr in resource_dict:
+            resource_dict[attr] = str(resource_dict[attr])
+
+    label = resource_dict.pop(Constants.LABEL)
+    return label, resource_dict
+
+
+def dump_plan(*, resources, to_json: bool, summary: bool = False, ndjson: bool = False):
     from collections import namedtuple
     from fabfed.util.constants import Constants
-    import sys
 
-    plan = {}
     ResourceSummary = namedtuple("ResourceSummary", "label attributes")
+    emitter = StreamEmitter(to_json=to_json, ndjson=ndjson)
 
     if not summary:
-        summaries = []
-
         ResourceDetails = namedtuple("ResourceDetails", "label attributes")
+        emitter.start_section('resource_details')
 
         for resource in resources:
-            resource_dict = resource.attributes.copy()
-            del_attrs = [Constants.EXTERNAL_DEPENDENCIES,
-                         Constants.RESOLVED_EXTERNAL_DEPENDENCIES,
-                         Constants.INTERNAL_DEPENDENCIES,
-                         Constants.RESOLVED_INTERNAL_DEPENDENCIES,
-                         Constants.SAVED_STATES]
-
-            for attr in del_attrs:
-                del resource_dict[attr]
-
-            stringify_attrs = [Constants.PROVIDER,
-                               Constants.RES_INTERFACES,
-                               Constants.RES_NODES,
-                               Constants.RES_NETWORK,
-                               Constants.RES_STITCH_INTERFACE,
-                               Constants.NETWORK_STITCH_WITH,
-                               Constants.RES_LAYER3,
-                               Constants.RES_PEER_LAYER3,
-                               Constants.RES_PEERING
-                               ]
-
-            for attr in stringify_attrs:
-                if attr in resource_dict:
-                    resource_dict[attr] = str(resource_dict[attr])
-
-            label = resource_dict.pop(Constants.LABEL)
-            summaries.append(ResourceDetails(label=label, attributes=resource_dict))
-            plan['resource_details'] = summaries
-
-        summaries = []
+            label, resource_dict = _resource_details(resource)
+            emitter.emit(ResourceDetails(label=label, attributes=resource_dict))
+
+        emitter.start_section('resource_creation_details')
 
         for resource in resources:
             resource_dict = {}
@@ -67,11 +202,8 @@ def dump_plan(*, resources, to_json: bool, summary: bool = False):
 
             details = copy.deepcopy(resource.attributes[Constants.RES_CREATION_DETAILS])
             resource_dict[Constants.RES_CREATION_DETAILS] = details
-            summaries.append(ResourceSummary(label=label, attributes=resource_dict))
-
-        plan['resource_creation_details'] = summaries
+            emitter.emit(ResourceSummary(label=label, attributes=resource_dict))
 
-    summaries = []
     to_be_created = 0
     to_be_deleted = 0
     provider_resource_map = {}
@@ -92,6 +224,8 @@ def dump_plan(*, resources, to_json: bool, summary: bool = False):
             changed = not in_config_file or details['total_count'] != details['created_count']
             provider_resource_map[resource.provider.label] = provider_resource_map[resource.provider.label] or changed
 
+    emitter.start_section('summaries')
+
     for resource in resources:
         resource_dict = {}
         label = resource.attributes[Constants.LABEL]
@@ -123,82 +257,33 @@ def dump_plan(*, resources, to_json: bool, summary: bool = False):
 
         to_be_created += resource_dict['to_be_created']
         to_be_deleted += resource_dict['to_be_deleted']
-        summaries.append(ResourceSummary(label=label, attributes=resource_dict))
-
-    plan['summaries'] = summaries
-
-    if to_json:
-        import json
-
-        sys.stdout.write(json.dumps(plan, cls=SetEncoder, indent=3))
-    else:
-        import yaml
-        from fabfed.model.state import get_dumper
-
-        sys.stdout.write(yaml.dump(plan, Dumper=get_dumper(), default_flow_style=False, sort_keys=False))
+        emitter.emit(ResourceSummary(label=label, attributes=resource_dict))
 
+    emitter.close()
     return to_be_created, to_be_deleted
 
 
-def dump_resources(*, resources, to_json: bool, summary: bool = False):
-    import sys
+def dump_resources(*, resources, to_json: bool, summary: bool = False, ndjson: bool = False):
+    from collections import namedtuple
 
-    if summary:
-        summaries = []
-        from collections import namedtuple
-        from fabfed.util.constants import Constants
+    ResourceSummary = namedtuple("ResourceSummary", "label attributes")
 
-        ResourceSummary = namedtuple("ResourceSummary", "label attributes")
+    with StreamEmitter(to_json=to_json, ndjson=ndjson) as emitter:
+        emitter.start_section()
 
         for resource in resources:
-            resource_dict = resource.attributes.copy()
-            del_attrs = [Constants.EXTERNAL_DEPENDENCIES,
-                         Constants.RESOLVED_EXTERNAL_DEPENDENCIES,
-                         Constants.INTERNAL_DEPENDENCIES,
-                         Constants.RESOLVED_INTERNAL_DEPENDENCIES,
-                         Constants.SAVED_STATES]
-
-            for attr in del_attrs:
-                del resource_dict[attr]
-
-            stringify_attrs = [Constants.PROVIDER,
-                               Constants.RES_INTERFACES,
-                               Constants.RES_NODES,
-                               Constants.RES_NETWORK,
-                               Constants.RES_STITCH_INTERFACE,
-                               Constants.NETWORK_STITCH_WITH,
-                               Constants.RES_LAYER3,
-                               Constants.RES_PEER_LAYER3,
-                               Constants.RES_PEERING
-                               ]
-
-            for attr in stringify_attrs:
-                if attr in resource_dict:
-                    resource_dict[attr] = str(resource_dict[attr])
-
-            label = resource_dict.pop(Constants.LABEL)
-            summaries.append(ResourceSummary(label=label, attributes=resource_dict))
-
-        resources = summaries
-
-    if to_json:
-        import json
+            if summary:
+                label, resource_dict = _resource_details(resource)
+                resource = ResourceSummary(label=label, attributes=resource_dict)
 
-        sys.stdout.write(json.dumps(resources, cls=SetEncoder, indent=3))
-    else:
-        import yaml
-        from fabfed.model.state import get_dumper
-
-        sys.stdout.write(yaml.dump(resources, Dumper=get_dumper(), default_flow_style=False, sort_keys=False))
+            emitter.emit(resource)
 
 
 def dump_objects(objects, to_json: bool):
     import sys
 
     if to_json:
-        import json
-
-        sys.stdout.write(json.dumps(objects, cls=SetEncoder, indent=3))
+        sys.stdout.write(dump_json(objects, indent=3))
     else:
         import yaml
         from fabfed.model.state import get_dumper
@@ -206,96 +291,79 @@ def dump_objects(objects, to_json: bool):
         sys.stdout.write(yaml.dump(objects, Dumper=get_dumper(), default_flow_style=False, sort_keys=False))
 
 
-def dump_states(states, to_json: bool, summary: bool = False):
-    import sys
-    from fabfed.model.state import get_dumper
-
-    temp = []
+def _summarize_state(state):
+    if state.is_node_state:
+        props = ['mgmt_ip', 'user', 'site', 'state', "name",
+                 "dataplane_ipv4", "dataplane_ipv6", 'keyfile', 'jump_keyfile']
+    elif state.is_network_state:
+        props = ['name', 'site', 'state', 'profile']
+    else:
+        props = ['name', 'image', 'controller_host', 'controller_web', 'controller_ssh_tunnel_cmd']
 
-    if not summary:
-        for provider_state in states:
-            for resource_state in provider_state.states():
-                temp.append(resource_state)
+    state.attributes = {prop: state.attributes[prop] for prop in props if prop in state.attributes}
+    return state
 
-    if summary:
-        for provider_state in states:
-            for node_state in provider_state.node_states:
-                attributes = {}
-                props = ['mgmt_ip', 'user', 'site', 'state', "name",
-                         "dataplane_ipv4", "dataplane_ipv6", 'keyfile', 'jump_keyfile']
 
-                for prop in props:
-                    if prop in node_state.attributes:
-                        attributes[prop] = node_state.attributes[prop]
+def dump_states(states, to_json: bool, summary: bool = False, ndjson: bool = False, stream=None):
+    """
+    Writes the resource states grouped as networks, nodes and services. The states can be a list, or a callable
+    such as lambda: iter_states(session) that yields them as they are read. With ndjson, every resource is written
+    as soon as it is read. Otherwise the callable is called once per section, so that yaml and json are streamed
+    too at the cost of reading the states once for each of networks, nodes and services.
+    """
+    if callable(states):
+        read_states = states
+    else:
+        states = states if isinstance(states, list) else list(states)
 
-                node_state.attributes = attributes
-                temp.append(node_state)
+        def read_states():
+            return states
 
-            for network_state in provider_state.network_states:
-                attributes = dict()
-                props = ['name', 'site', 'state', 'profile']
+    with StreamEmitter(to_json=to_json, ndjson=ndjson, stream=stream, width=float("inf")) as emitter:
+        if ndjson:
+            for provider_state in read_states():
+                for resource_state in provider_state.states():
+                    emitter.start_section(resource_state.type + 's')
+                    emitter.emit(_summarize_state(resource_state) if summary else resource_state)
 
-                for prop in props:
-                    if prop in network_state.attributes:
-                        attributes[prop] = network_state.attributes[prop]
+            return
 
-                network_state.attributes = attributes
-                temp.append(network_state)
+        for section, attr in [('networks', 'network_states'), ('nodes', 'node_states'), ('services', 'service_states')]:
+            emitter.start_section(section)
 
-            for service_state in provider_state.service_states:
-                attributes = dict()
-                props = ['name', 'image', 'controller_host', 'controller_web', 'controller_ssh_tunnel_cmd']
+            for provider_state in read_states():
+                for resource_state in getattr(provider_state, attr):
+                    emitter.emit(_summarize_state(resource_state) if summary else resource_state)
 
-                for prop in props:
-                    if prop in service_state.attributes:
-                        attributes[prop] = service_state.attributes[prop]
 
-                service_state.attributes = attributes
-                temp.append(service_state)
+def dump_stats(stats, to_json: bool, ndjson: bool = False, stream=None):
+    import sys
 
-    states = temp
+    stream = stream or sys.stdout
 
-    output = dict()
-    nodes = []
-    networks = []
-    services = []
+    if ndjson:
+        with StreamEmitter(ndjson=True, stream=stream) as emitter:
+            if not stats:
+                return
 
-    for state in states:
-        if state.is_node_state:
-            nodes.append(state)
-            pass
-        elif state.is_network_state:
-            networks.append(state)
-        else:
-            services.append(state)
+            workflow_stats = dict(stats['stats'])
+            provider_stats = workflow_stats.pop('provider_stats', [])
+            emitter.start_section('workflow')
+            emitter.emit(workflow_stats)
+            emitter.start_section('provider_stats')
 
-    output['networks'] = networks
-    output['nodes'] = nodes
-    output['services'] = services
-
-    if to_json:
-        import json
-
-        sys.stdout.write(json.dumps(output, cls=SetEncoder, indent=3))
-    else:
-        import yaml
+            for temp in provider_stats:
+                emitter.emit(temp)
 
-        sys.stdout.write(
-            yaml.dump(output, Dumper=get_dumper(), width=float("inf"), default_flow_style=False, sort_keys=False))
-
-
-def dump_stats(stats, to_json: bool):
-    import sys
+        return
 
     if to_json:
-        import json
-
-        sys.stdout.write(json.dumps(stats, cls=SetEncoder, indent=3))
+        stream.write(dump_json(stats, indent=3))
     else:
         import yaml
         from fabfed.model.state import get_dumper
 
-        sys.stdout.write(
+        stream.write(
             yaml.dump(stats,
                       Dumper=get_dumper(), width=float("inf"), default_flow_style=False, sort_keys=False))
 
@@ -344,6 +412,46 @@ def load_states(friendly_name) -> List[ProviderState]:
     return []
 
 
+def iter_states(friendly_name) -> Iterator[ProviderState]:
+    """
+    Yields the saved provider states one at a time as they are parsed from the state file.
+    """
+    import yaml
+    import os
+    from fabfed.model.state import StateLoader
+
+    file_path = os.path.join(get_base_dir(friendly_name), friendly_name + '.yml')
+
+    if not os.path.exists(file_path):
+        return
+
+    # The libyaml loader only hands out whole documents, so the pure python one is used to stream the states.
+    with open(file_path, 'r') as stream:
+        loader = StateLoader(stream)
+
+        try:
+            loader.get_event()
+
+            if loader.check_event(yaml.StreamEndEvent):
+                return
+
+            loader.get_event()
+
+            if not loader.check_event(yaml.SequenceStartEvent):
+                return
+
+            loader.get_event()
+
+            while not loader.check_event(yaml.SequenceEndEvent):
+                yield loader.construct_document(loader.compose_node(None, None))
+        except yaml.YAMLError as e:
+            from fabfed.exceptions import StateException
+
+            raise StateException(f'Exception while loading state at {file_path}:{e}')
+        finally:
+            loader.dispose()
+
+
 def load_states_as_dict(friendly_name) -> Dict[str, ProviderState]:
     states = load_states(friendly_name)
     state_map = {}
@@ -391,6 +499,8 @@ def save_meta_data(meta_data: dict, friendly_name: str):
 
             raise StateException(f'Exception while saving state at temp file {file_path}:{e}')
 
+    update_catalog(friendly_name, **meta_data)
+
 
 def save_states(states: List[ProviderState], friendly_name: str):
     import yaml
@@ -411,6 +521,7 @@ def save_states(states: List[ProviderState], friendly_name: str):
     import shutil
 
     shutil.move(temp_file_path, file_path)
+    update_catalog(friendly_name, **_states_summary(states))
 
 
 def reconcile_state(provider_state: ProviderState, saved_provider_state: ProviderState):
@@ -430,8 +541,11 @@ def reconcile_state(provider_state: ProviderState, saved_provider_state: Provide
         provider_state.add_if_not_found(resource_state)
 
 
-def reconcile_states(provider_states: List[ProviderState], friendly_name: str) -> List[ProviderState]:
-    saved_states_map = load_states_as_dict(friendly_name)
+def reconcile_states(provider_states: List[ProviderState], friendly_name: str,
+                     saved_states_map: Dict[str, ProviderState] = None) -> List[ProviderState]:
+    if saved_states_map is None:
+        saved_states_map = load_states_as_dict(friendly_name)
+
     if next(filter(lambda s: s.number_of_created_resources() > 0, saved_states_map.values()), None) is None:
         return provider_states
 
@@ -469,6 +583,7 @@ def save_stats(stats, friendly_name):
     import shutil
 
     shutil.move(temp_file_path, file_path)
+    update_catalog(friendly_name, create=False, **_stats_summary(stats))
 
 
 def load_sessions():
@@ -493,3 +608,174 @@ def destroy_session(friendly_name: str):
 
     dir_path = get_base_dir(friendly_name)
     shutil.rmtree(dir_path)
+    remove_from_catalog(friendly_name)
+
+
+def get_catalog_file():
+    from pathlib import Path
+    import os
+
+    base_dir = os.path.join(str(Path.home()), '.fabfed')
+    os.makedirs(base_dir, exist_ok=True)
+    return os.path.join(base_dir, 'sessions_catalog.json')
+
+
+def _states_summary(states: List[ProviderState]) -> Dict:
+    from fabfed.util.utils import get_counters
+
+    nodes, networks, services, pending, failed = get_counters(states=states)
+    return dict(nodes=nodes, networks=networks, services=services, pending=pending, failed=failed)
+
+
+def _stats_summary(stats) -> Dict:
+    def field(obj, name):
+        return obj.get(name) if isinstance(obj, dict) else getattr(obj, name)
+
+    stats = stats.get('stats') if isinstance(stats, dict) else None
+
+    if not stats:
+        return dict()
+
+    provider_durations = {field(ps, 'provider'): field(field(ps, 'provider_duration'), 'duration')
+                          for ps in field(stats, 'provider_stats')}
+    return dict(last_action=field(stats, 'action'),
+                has_failures=field(stats, 'has_failures'),
+                workflow_duration=field(field(stats, 'workflow_duration'), 'duration'),
+                provider_durations=provider_durations)
+
+
+class _CatalogLock:
+    def __init__(self):
+        self.lock_file = None
+
+    def __enter__(self):
+        import fcntl
+
+        self.lock_file = open(get_catalog_file() + '.lock', 'w')
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        import fcntl
+
+        fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        self.lock_file.close()
+
+
+def _read_catalog():
+    import os
+
+    file_path = get_catalog_file()
+
+    if not os.path.exists(file_path):
+        return None
+
+    with open(file_path, 'r') as stream:
+        try:
+            return json.load(stream)
+        except Exception as e:
+            from fabfed.exceptions import StateException
+
+            raise StateException(f'Exception while loading session catalog at {file_path}:{e}')
+
+
+def _write_catalog(catalog: Dict[str, Dict]):
+    import os
+
+    file_path = get_catalog_file()
+    temp_file_path = file_path + ".temp"
+
+    with open(temp_file_path, "w") as stream:
+        try:
+            json.dump(catalog, stream, indent=1)
+        except Exception as e:
+            from fabfed.exceptions import StateException
+
+            raise StateException(f'Exception while saving session catalog at temp file {temp_file_path}:{e}')
+
+    os.replace(temp_file_path, file_path)
+
+
+def _catalog_entry(session: str) -> Dict:
+    from pathlib import Path
+    import os
+
+    entry = dict(session=session, config_dir=load_meta_data(session, 'config_dir'))
+    entry.update(_states_summary(load_states(session)))
+    stats_file = os.path.join(str(Path.home()), '.fabfed', 'stats', session, session + '-stats.yml')
+
+    if os.path.exists(stats_file):
+        entry.update(_stats_summary(load_stats(session)))
+
+    return entry
+
+
+def _build_catalog() -> Dict[str, Dict]:
+    return {session: _catalog_entry(session) for session in load_sessions()}
+
+
+def load_catalog(rebuild=False) -> Dict[str, Dict]:
+    """
+    Returns the session catalog keyed by session name. Each entry has the session's config dir,
+    its resource, pending and failure counts and, once stats are saved, the last action and its durations.
+    The catalog is built from the sessions directory when it does not exist yet or when rebuild is set.
+    """
+    if not rebuild:
+        catalog = _read_catalog()
+
+        if catalog is not None:
+            return catalog
+
+    with _CatalogLock():
+        catalog = _build_catalog()
+        _write_catalog(catalog)
+
+    return catalog
+
+
+def update_catalog(friendly_name: str, create=True, **entries):
+    with _CatalogLock():
+        catalog = _read_catalog()
+
+        if catalog is None:
+            catalog = _build_catalog()
+
+        if friendly_name not in catalog:
+            if not create:
+                return
+
+            catalog[friendly_name] = dict(session=friendly_name, config_dir=None)
+
+        catalog[friendly_name].update(entries)
+        _write_catalog(catalog)
+
+
+def refresh_catalog_entries(sessions: List[str]) -> Dict[str, Dict]:
+    """
+    Re-reads the given sessions from disk and updates their catalog entries. Sessions whose directory
+    no longer exists are removed from the catalog. Returns the refreshed entries keyed by session name.
+    """
+    existing = load_sessions()
+    entries = {session: _catalog_entry(session) for session in sessions if session in existing}
+
+    with _CatalogLock():
+        catalog = _read_catalog()
+
+        if catalog is None:
+            catalog = _build_catalog()
+
+        for session in sessions:
+            catalog.pop(session, None)
+
+        catalog.update(entries)
+        _write_catalog(catalog)
+
+    return entries
+
+
+def remove_from_catalog(friendly_name: str):
+    with _CatalogLock():
+        catalog = _read_catalog()
+
+        if catalog is not None and catalog.pop(friendly_name, None) is not None:
+            _write_catalog(catalog)
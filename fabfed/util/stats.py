@@ -4,8 +4,12 @@ Duration = namedtuple("Duration", "duration comment")
 
 Stages = namedtuple("Stages", "setup_duration plan_duration create_duration delete_duration")
 
+# invocations counts how many times the provider created, waited on or deleted the resource, not sdk calls
+ResourceStats = namedtuple("ResourceStats", "label duration invocations failure")
+
 ProviderStats = namedtuple("ProviderStats",
-                           "provider provider_duration has_failures has_pending stages")
+                           "provider provider_duration has_failures has_pending stages resource_stats",
+                           defaults=((),))
 
 FabfedStats = namedtuple("FabfedStats",
                          "action has_failures workflow_duration workflow_config controller providers provider_stats")
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Callable, Dict, List
+
+from fabfed.util.utils import ContextThreadPoolExecutor
+
+
+class TaskGraph:
+    """
+    Runs named steps on a thread pool as soon as the steps they depend on are done. A step is called with the
+    results of its dependencies as keyword arguments. The first failure stops new steps from starting and is
+    raised once the running ones finish. Durations of the steps that ran are kept in durations.
+    """
+
+    def __init__(self, *, name: str, logger=None):
+        self.name = name
+        self.logger = logger
+        self.tasks: Dict[str, Callable] = {}
+        self.dependencies: Dict[str, List[str]] = {}
+        self.results = {}
+        self.durations: Dict[str, float] = {}
+
+    def add(self, name: str, func: Callable, depends_on: List[str] = None):
+        depends_on = depends_on or []
+
+        for dependency in depends_on:
+            if dependency not in self.tasks:
+                raise ValueError(f"{self.name}: step {name} depends on unknown step {dependency}")
+
+        self.tasks[name] = func
+        self.dependencies[name] = depends_on
+        return self
+
+    def _run_task(self, name: str):
+        start = time.time()
+
+        try:
+            return self.tasks[name](**{d: self.results[d] for d in self.dependencies[name]})
+        finally:
+            self.durations[name] = time.time() - start
+
+            if self.logger:
+                self.logger.info(f"{self.name}: step {name} took {self.durations[name]:.3f} seconds")
+
+    def run(self, max_workers: int = None):
+        pending = list(self.tasks)
+        running = {}
+        error = None
+
+        with ContextThreadPoolExecutor(max_workers=max_workers or len(self.tasks) or 1) as executor:
+            while pending or running:
+                if not error:
+                    for name in [n for n in pending if all(d in self.results for d in self.dependencies[n])]:
+                        pending.remove(name)
+                        running[executor.submit(self._run_task, name)] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = running.pop(future)
+
+                    try:
+                        self.results[name] = future.result()
+                    except Exception as e:
+                        error = error or e
+
+        if error:
+            raise error
+
+        return self.results
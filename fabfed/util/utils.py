@@ -1,5 +1,8 @@
+import contextvars
 import logging
+import threading
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
+from concurrent.futures import ThreadPoolExecutor
 
 from fabfed.util.constants import Constants
 
@@ -11,7 +14,7 @@ def create_parser(usage='%(prog)s [options]',
     return ArgumentParser(usage=usage, description=description, formatter_class=formatter_class)
 
 
-def build_parser(*, manage_workflow, manage_sessions, display_stitch_info):
+def build_parser(*, manage_workflow, manage_sessions, display_stitch_info, manage_batch, manage_history):
     description = (
         'Fabfed'
         '\n'
@@ -23,6 +26,10 @@ def build_parser(*, manage_workflow, manage_sessions, display_stitch_info):
         "      fabfed workflow --config-dir . --session test-chi -validate"
         '\n'
         '      fabfed stitch-policy -providers "fabric,sense"'
+        '\n'
+        "      fabfed batch -m manifest.yml -apply"
+        '\n'
+        "      fabfed history -percentiles --level provider --action apply --days 30"
     )
 
     parser = create_parser(description=description)
@@ -52,12 +59,21 @@ def build_parser(*, manage_workflow, manage_sessions, display_stitch_info):
     workflow_parser.add_argument('-stats', action='store_true', default=False, help='display stats')
     workflow_parser.add_argument('-json', action='store_true', default=False,
                                  help='use json output. relevant when used with -show or -plan')
+    workflow_parser.add_argument('-ndjson', action='store_true', default=False,
+                                 help='use newline delimited json output. relevant when used with -show, -plan or -stats')
     workflow_parser.add_argument('-destroy', action='store_true', default=False, help='delete resources')
     workflow_parser.set_defaults(dispatch_func=manage_workflow)
 
     sessions_parser = subparsers.add_parser('sessions', help='Manage fabfed sessions ')
     sessions_parser.add_argument('-show', action='store_true', default=False, help='display sessions')
     sessions_parser.add_argument('-json', action='store_true', default=False, help='use json format')
+    sessions_parser.add_argument('-c', '--config-dir', type=str, default='',
+                                 help='only display sessions using this config directory', required=False)
+    sessions_parser.add_argument('-failed', action='store_true', default=False,
+                                 help='only display sessions with failed or pending resources. Matching sessions '
+                                      'are re-read from disk so changes made outside fabfed are seen')
+    sessions_parser.add_argument('-refresh', action='store_true', default=False,
+                                 help='rebuild the session catalog from the sessions directory')
     sessions_parser.set_defaults(dispatch_func=manage_sessions)
     stitch_parser = subparsers.add_parser('stitch-policy', help='Display stitch policy between two poviders')
     stitch_parser.add_argument('-providers', type=str, required=True,
@@ -73,9 +89,52 @@ def build_parser(*, manage_workflow, manage_sessions, display_stitch_info):
                                required=False)
     stitch_parser.add_argument('-use-remote-policy', action='store_true', default=False, help='use remote policy')
     stitch_parser.set_defaults(dispatch_func=display_stitch_info)
+
+    batch_parser = subparsers.add_parser('batch', help='Run many fabfed sessions from a manifest in one process')
+    batch_parser.add_argument('-m', '--manifest', type=str, required=True,
+                              help='Yaml batch manifest listing the sessions and their config directories')
+    batch_parser.add_argument('--concurrency', type=int, default=0,
+                              help='maximum number of sessions running at once. Overrides the manifest',
+                              required=False)
+    batch_parser.add_argument('-apply', action='store_true', default=False, help='create resources for all sessions')
+    batch_parser.add_argument('-destroy', action='store_true', default=False,
+                              help='delete resources for all sessions')
+    batch_parser.set_defaults(dispatch_func=manage_batch)
+
+    history_parser = subparsers.add_parser('history', help='Query the durations and failures of past runs')
+    history_parser.add_argument('-percentiles', action='store_true', default=False,
+                                help='display duration percentiles')
+    history_parser.add_argument('-trend', action='store_true', default=False,
+                                help='display median and p90 durations per day or week')
+    history_parser.add_argument('--level', type=str, default='provider', choices=['workflow', 'provider', 'resource'],
+                                help='aggregate whole workflows, providers or resources. Defaults to provider. '
+                                     'Resource runs also record invocations, the number of create, wait and '
+                                     'delete steps run on a resource, not the number of API calls')
+    history_parser.add_argument('--bucket', type=str, default='day', choices=['day', 'week'],
+                                help='trend period. Defaults to day')
+    history_parser.add_argument('--action', type=str, default='', choices=['', 'apply', 'destroy'],
+                                help='only include apply or destroy runs', required=False)
+    history_parser.add_argument('-s', '--session', type=str, default='',
+                                help='only include runs of this session', required=False)
+    history_parser.add_argument('--provider', type=str, default='',
+                                help='only include this provider label', required=False)
+    history_parser.add_argument('--days', type=int, default=0,
+                                help='only include runs from the last number of days', required=False)
+    history_parser.add_argument('-json', action='store_true', default=False, help='use json format')
+    history_parser.set_defaults(dispatch_func=manage_history)
     return parser
 
 
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Runs each task in a copy of the context it was submitted from. Pool threads would otherwise start from an
+    empty context and lose e.g. the batch session that routes log records to the session's log file.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
 def get_log_level():
     import os
     return os.environ.get('FABFED_LOG_LEVEL', "INFO")
@@ -190,6 +249,25 @@ def load_yaml_from_file(file_name):
         return yaml.load(stream, Loader=yaml.FullLoader)
 
 
+_credentials_cache = {}
+_credentials_lock = threading.Lock()
+
+
+def load_credentials(credential_file):
+    import os
+    from pathlib import Path
+
+    path = str(Path(credential_file).expanduser().absolute())
+
+    with _credentials_lock:
+        key = (path, os.stat(path).st_mtime_ns)
+
+        if key not in _credentials_cache:
+            _credentials_cache[key] = load_yaml_from_file(path)
+
+        return _credentials_cache[key]
+
+
 def load_vars(var_file):
     import yaml
     import os
@@ -226,16 +304,27 @@ def get_inventory_dir(friendly_name):
     return inv_dir
 
 
-def dump_sessions(to_json: bool):
+def dump_sessions(to_json: bool, config_dir: str = None, failed: bool = False, refresh: bool = False):
     from fabfed.util import state as sutil
-    from pathlib import Path
-    import os
     import sys
 
-    base_dir = os.path.join(str(Path.home()), '.fabfed', 'sessions')
-    os.makedirs(base_dir, exist_ok=True)
-    sessions = os.listdir(base_dir)
-    sessions = [dict(session=s, config_dir=sutil.load_meta_data(s, 'config_dir')) for s in sessions]
+    catalog = sutil.load_catalog(rebuild=refresh)
+    sessions = list(catalog.values())
+
+    if config_dir:
+        config_dir = absolute_path(config_dir)
+        sessions = [s for s in sessions if s.get('config_dir') == config_dir]
+
+    def is_failed(s):
+        return s.get('failed') or s.get('pending') or s.get('has_failures')
+
+    if failed:
+        sessions = [s for s in sessions if is_failed(s)]
+
+        # Sessions changed or removed outside fabfed leave stale catalog entries, so the matches are re-read.
+        if not refresh:
+            entries = sutil.refresh_catalog_entries([s['session'] for s in sessions])
+            sessions = [entry for entry in entries.values() if is_failed(entry)]
 
     if to_json:
         import json
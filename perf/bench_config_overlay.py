@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+import copy
+import sys
+import timeit
+
+from fabfed.util.config import WorkflowConfig
+
+
+def build_config(count):
+    lines = ["provider:",
+             "  - dummy:",
+             "    - my_provider:",
+             "       - url: https://some_url:5000",
+             "config:",
+             "  - layer3:",
+             "      - my_layer:",
+             "          subnet: 192.168.1.0/24",
+             "  - peering:",
+             "      - my_peering:",
+             "          local_asn: 55038",
+             "          local_address: 192.168.10.1/30",
+             "          remote_asn: 64512",
+             "          remote_address: 192.168.10.2/30",
+             "resource:"]
+
+    for i in range(count):
+        lines.extend(["  - network:",
+                      f"      - net{i}:",
+                      "          provider: '{{ dummy.my_provider }}'",
+                      "          layer3: '{{ layer3.my_layer }}'",
+                      "          peering: '{{ peering.my_peering }}'",
+                      "  - node:",
+                      f"      - node{i}:",
+                      "          provider: '{{ dummy.my_provider }}'",
+                      f"          network: '{{{{ network.net{i} }}}}'",
+                      "          image: ubuntu",
+                      "          count: 2"])
+
+    return "\n".join(lines)
+
+
+def bench(count, number=5):
+    config = WorkflowConfig.parse(content=build_config(count))
+    deep_copy = min(timeit.repeat(lambda: copy.deepcopy(config), number=number, repeat=3)) / number
+    overlay = min(timeit.repeat(lambda: config.overlay(), number=number, repeat=3)) / number
+    return deep_copy, overlay
+
+
+if __name__ == "__main__":
+    counts = [int(c) for c in sys.argv[1:]] or [10, 100, 500]
+
+    print("RESOURCES, DEEPCOPY, OVERLAY IN SECONDS")
+
+    for count in counts:
+        deep_copy, overlay = bench(count)
+        print(f"{2 * count}, {deep_copy:.6f}, {overlay:.6f}, x{deep_copy / overlay:.1f}")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+import logging
+import sys
+import timeit
+
+from fabfed.model.state import NodeState, ProviderState
+from fabfed.provider.dummy.dummy_provider import DummyNode, DummyProvider
+from fabfed.util.state import reconcile_state
+
+
+def build_provider(count, groups=10):
+    provider = DummyProvider(type='dummy', label='dummy_provider', name='bench', config={})
+    per_group = count // groups
+
+    for g in range(groups):
+        label = f"node{g}"
+        provider.creation_details[label] = dict(resources=[], total_count=per_group, created_count=per_group,
+                                                failed_count=0)
+
+        for i in range(per_group):
+            node = DummyNode(label=label, name=f"bench-node{g}-{i}", image='ubuntu', site='site', flavor='small',
+                             logger=logging.getLogger())
+            provider.nodes.append(node)
+            provider.creation_details[label]['resources'].append(node.name)
+
+    return provider
+
+
+def empty_state(provider_state):
+    creation_details = {k: dict(v, created_count=0) for k, v in provider_state.creation_details.items()}
+    return ProviderState(provider_state.label, provider_state.attributes, [], [], [], [], [], {}, creation_details)
+
+
+def bench(count, number=3):
+    provider = build_provider(count)
+    saved = provider.get_state()
+    states = [NodeState(label=s.label, attributes=s.attributes) for s in saved.states()]
+
+    def add_all():
+        empty_state(saved).add_all(states)
+
+    def reconcile():
+        reconcile_state(empty_state(saved), saved)
+
+    get_state = min(timeit.repeat(provider.get_state, number=number, repeat=3)) / number
+    add = min(timeit.repeat(add_all, number=number, repeat=3)) / number
+    reconciled = min(timeit.repeat(reconcile, number=number, repeat=3)) / number
+    return get_state, add, reconciled
+
+
+if __name__ == "__main__":
+    counts = [int(c) for c in sys.argv[1:]] or [1000, 5000, 10000]
+
+    print("RESOURCES, GET_STATE, ADD_ALL, RECONCILE_STATE IN SECONDS, MICROSECONDS PER RESOURCE")
+
+    for count in counts:
+        get_state, add, reconciled = bench(count)
+        per_resource = [round(t / count * 1e6, 2) for t in (get_state, add, reconciled)]
+        print(f"{count}, {get_state:.6f}, {add:.6f}, {reconciled:.6f}, {per_resource}")
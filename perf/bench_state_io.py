@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+import logging
+import os
+import sys
+import tempfile
+import timeit
+
+import yaml
+
+from fabfed.model.state import StateLoader, StateDumper, get_loader, get_dumper
+from fabfed.provider.dummy.dummy_provider import DummyNode, DummyProvider
+
+
+def build_states(count, groups=10):
+    provider = DummyProvider(type='dummy', label='dummy_provider', name='bench', config={})
+    per_group = count // groups
+
+    for g in range(groups):
+        label = f"node{g}"
+        provider.creation_details[label] = dict(resources=[], total_count=per_group, created_count=per_group,
+                                                failed_count=0)
+
+        for i in range(per_group):
+            node = DummyNode(label=label, name=f"bench-node{g}-{i}", image='ubuntu', site='site', flavor='small',
+                             logger=logging.getLogger())
+            provider.nodes.append(node)
+            provider.creation_details[label]['resources'].append(node.name)
+
+    return [provider.get_state()]
+
+
+def bench(count, number=3):
+    from fabfed.util import state as sutil
+
+    states = build_states(count)
+    session = f"bench-state-io-{count}"
+    results = []
+
+    for loader, dumper in [(StateLoader, StateDumper), (get_loader(), get_dumper())]:
+        text = yaml.dump(states, Dumper=dumper, default_flow_style=False, sort_keys=False)
+        dump = min(timeit.repeat(lambda: yaml.dump(states, Dumper=dumper, default_flow_style=False, sort_keys=False),
+                                 number=number, repeat=3)) / number
+        load = min(timeit.repeat(lambda: yaml.load(text, Loader=loader), number=number, repeat=3)) / number
+        results.extend([dump, load])
+
+    save = min(timeit.repeat(lambda: sutil.save_states(states, session), number=number, repeat=3)) / number
+    load = min(timeit.repeat(lambda: sutil.load_states(session), number=number, repeat=3)) / number
+    results.extend([save, load])
+    return results
+
+
+if __name__ == "__main__":
+    counts = [int(c) for c in sys.argv[1:]] or [1000, 5000, 10000]
+
+    with tempfile.TemporaryDirectory() as home:
+        # Keeps the benchmark sessions and the catalog out of the real ~/.fabfed.
+        os.environ['HOME'] = home
+        print(f"libyaml={yaml.__with_libyaml__}")
+        print("RESOURCES, PY_DUMP, PY_LOAD, C_DUMP, C_LOAD, SAVE_STATES, LOAD_STATES IN SECONDS")
+
+        for count in counts:
+            print(f"{count}, " + ", ".join(f"{t:.4f}" for t in bench(count)))
@@ -29,6 +29,10 @@ def check_stats(results_dir, prefix):
             with open(file_path, 'r') as stream:
                 ret = yaml.load(stream, Loader=yaml.SafeLoader)
 
+                if not ret['stats']:
+                    print(f"Found no stats in {file_path}. Exiting ...")
+                    sys.exit(2)
+
                 if ret['stats']['has_failures']:
                     print(f"Found failures in {file_path}. Exiting ...")
                     sys.exit(2)
@@ -43,6 +47,11 @@ def print_stats_for_action(results_dir, prefix, action):
         file_path = os.path.join(dir_path, "stats-" + action + ".yml")
         with open(file_path, 'r') as stream:
             ret = yaml.load(stream, Loader=yaml.SafeLoader)
+
+            if not ret['stats']:
+                print(f"\tSkipping {file_path} with no stats")
+                continue
+
             provider_stats = ret["stats"]['provider_stats']
             workflow_durations.append(ret['stats']['workflow_duration']['duration'])
 
@@ -74,6 +83,9 @@ def write_stats_for_action_to_csv(results_dir, prefix, csv_dir):
             file_path = os.path.join(dir_path, "stats-" + action + ".yml")
             with open(file_path, 'r') as stream:
                 ret = yaml.load(stream, Loader=yaml.SafeLoader)
+                if not ret['stats']:
+                    print(f"Skipping {file_path} with no stats")
+                    continue
                 provider_stats = ret["stats"]['provider_stats']
                 if action == 'apply':
                     record['workflow_apply']=ret['stats']['workflow_duration']['duration']
@@ -106,7 +118,7 @@ def write_stats_for_action_to_csv(results_dir, prefix, csv_dir):
         csv_file.write(','.join(title))
         csv_file.write('\n')
         for record in record_table:
-            x=[record[k] if isinstance(record[k],str) else str(record[k]) for k in title]
+            x=[str(record.get(k, '')) for k in title]
             csv_file.write(','.join(x))
             csv_file.write("\n")
         
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fabfed.provider.aws import aws_poller
+from fabfed.provider.aws.aws_exceptions import AwsException
+
+
+class FakeEc2Client:
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.calls = 0
+
+    def describe_vpn_gateways(self, Filters):
+        self.calls += 1
+        state = 'available' if self.calls >= self.ticks else 'pending'
+        return dict(VpnGateways=[dict(VpnGatewayId=vpn_id, State=state, VpcAttachments=[])
+                                 for vpn_id in Filters[0]['Values']])
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(aws_poller, 'POLL_MIN_INTERVAL', 0.01)
+    monkeypatch.setattr(aws_poller, 'POLL_MAX_INTERVAL', 0.05)
+
+
+def test_poller_batches_waiters():
+    client = FakeEc2Client(ticks=3)
+    vpn_ids = [f"vgw-{i}" for i in range(5)]
+
+    with ThreadPoolExecutor(max_workers=len(vpn_ids)) as executor:
+        futures = [executor.submit(aws_poller.wait_for, client, aws_poller.VPN_GATEWAYS, vpn_id,
+                                   until=['available'], timeout=5) for vpn_id in vpn_ids]
+        gateways = [f.result() for f in futures]
+
+    assert [gw['VpnGatewayId'] for gw in gateways] == vpn_ids
+    assert client.calls < len(vpn_ids) * 3
+
+
+def test_poller_attachment_state_and_timeout():
+    client = FakeEc2Client(ticks=1000)
+    obj = aws_poller.wait_for(client, aws_poller.VPN_GATEWAYS, "vgw-1", context="vpc-1",
+                              until=['detached'], timeout=5)
+    assert obj['VpnGatewayId'] == "vgw-1"
+
+    with pytest.raises(AwsException):
+        aws_poller.wait_for(client, aws_poller.VPN_GATEWAYS, "vgw-2", until=['available'], timeout=0.1)
+
+
+def test_pollers_are_released_with_their_client():
+    import gc
+    import time
+    import weakref
+
+    client = FakeEc2Client(ticks=2)
+    aws_poller.wait_for(client, aws_poller.VPN_GATEWAYS, "vgw-1", until=['available'], timeout=5)
+    poller = weakref.ref(aws_poller.get_poller(client, aws_poller.VPN_GATEWAYS))
+    client_ref = weakref.ref(client)
+    del client
+
+    for _ in range(100):
+        gc.collect()
+
+        if client_ref() is None and poller() is None:
+            break
+
+        time.sleep(0.01)
+
+    assert client_ref() is None and poller() is None
@@ -0,0 +1,92 @@
+import sys
+import types
+
+import pytest
+
+
+class FakeSession:
+    created = []
+
+    def __init__(self, *, aws_access_key_id, aws_secret_access_key):
+        self.clients = []
+        FakeSession.created.append((aws_access_key_id, aws_secret_access_key))
+
+    def client(self, service, *, region_name, config):
+        self.clients.append((service, region_name))
+        return types.SimpleNamespace(service=service, region=region_name, config=config)
+
+
+class FakeEc2Client:
+    def __init__(self):
+        self.requests = []
+
+    def describe_subnets(self, *, Filters):
+        self.requests.append(('describe_subnets', Filters))
+        return dict(Subnets=[dict(SubnetId='subnet-1', State='available')])
+
+    def describe_vpn_gateways(self, *, Filters):
+        self.requests.append(('describe_vpn_gateways', Filters))
+        return dict(VpnGateways=[dict(VpnGatewayId='vgw-1', VpcAttachments=[])])
+
+    def get_paginator(self, name):
+        def paginate(*, Filters):
+            self.requests.append((name, Filters))
+            return [dict(RouteTables=[dict(RouteTableId='rtb-1')])]
+
+        return types.SimpleNamespace(paginate=paginate)
+
+
+@pytest.fixture
+def aws_utils(monkeypatch):
+    boto3 = types.ModuleType('boto3')
+    boto3.session = types.SimpleNamespace(Session=FakeSession)
+    botocore_config = types.ModuleType('botocore.config')
+    botocore_config.Config = lambda **kwargs: kwargs
+
+    for name, module in {'boto3': boto3, 'botocore': types.ModuleType('botocore'),
+                         'botocore.config': botocore_config}.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    monkeypatch.delitem(sys.modules, 'fabfed.provider.aws.aws_utils', raising=False)
+    FakeSession.created = []
+
+    from fabfed.provider.aws import aws_utils
+
+    yield aws_utils
+
+
+def test_provider_creates_each_client_once(aws_utils):
+    from fabfed.provider.aws.aws_provider import AwsProvider
+
+    provider = AwsProvider(type='aws', label='aws_provider@provider', name='aws_provider',
+                           config=dict(ACCESS_KEY='key', SECRET_KEY='secret'))
+    pool = provider.client_pool
+
+    assert provider.client_pool is pool
+    assert pool.ec2_client('us-east-1') is pool.ec2_client('us-east-1')
+    assert pool.ec2_client('us-west-2') is not pool.ec2_client('us-east-1')
+    assert pool.direct_connect_client('us-east-1') is pool.client('directconnect', 'us-east-1')
+    assert FakeSession.created == [('key', 'secret')]
+    assert pool._session.clients == [('ec2', 'us-east-1'), ('ec2', 'us-west-2'), ('directconnect', 'us-east-1')]
+
+    other = AwsProvider(type='aws', label='other_provider@provider', name='other_provider',
+                        config=dict(ACCESS_KEY='key', SECRET_KEY='secret'))
+    assert other.client_pool is pool
+    assert aws_utils.get_client_pool(access_key='key2', secret_key='secret') is not pool
+    assert FakeSession.created == [('key', 'secret'), ('key2', 'secret')]
+
+
+def test_describe_helpers_filter_on_the_server(aws_utils):
+    ec2_client = FakeEc2Client()
+
+    assert aws_utils.find_route_tables(ec2_client=ec2_client, vpc_id='vpc-1') == [dict(RouteTableId='rtb-1')]
+    assert aws_utils.create_subnet_if_needed(ec2_client=ec2_client, cidr='10.0.1.0/24', vpc_id='vpc-1') == 'subnet-1'
+    assert aws_utils.find_vpn_gateway(ec2_client=ec2_client, name='fabfed-vgw') == 'vgw-1'
+    aws_utils.detach_vpn_gateway_if_needed(ec2_client=ec2_client, vpn_id='vgw-1', vpc_id='vpc-1')
+
+    assert ec2_client.requests == [
+        ('describe_route_tables', [{'Name': 'vpc-id', 'Values': ['vpc-1']}]),
+        ('describe_subnets', [{'Name': 'vpc-id', 'Values': ['vpc-1']},
+                              {'Name': 'cidr-block', 'Values': ['10.0.1.0/24']}]),
+        ('describe_vpn_gateways', [{'Name': 'tag:Name', 'Values': ['fabfed-vgw']}]),
+        ('describe_vpn_gateways', [{'Name': 'vpn-gateway-id', 'Values': ['vgw-1']}])]
@@ -0,0 +1,230 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class FakeLeases:
+    def __init__(self):
+        self.leases = {}
+        self.polls = 0
+        self.fail_update = False
+
+    def list(self):
+        return [dict(id=lid, name=lease['name']) for lid, lease in self.leases.items()]
+
+    def get(self, lease_id):
+        self.polls += 1
+        lease = self.leases[lease_id]
+
+        if lease['status'] == 'STARTING' and self.polls > 2:
+            lease['status'] = 'ACTIVE'
+
+        return lease
+
+    def create(self, *, name, start, end, reservations, events):
+        lease_id = f"lease-{len(self.leases)}"
+        self.leases[lease_id] = dict(id=lease_id, name=name, status='STARTING',
+                                     reservations=[dict(r, id=f"{lease_id}-r{i}") for i, r in enumerate(reservations)])
+        return self.leases[lease_id]
+
+    def delete(self, lease_id):
+        del self.leases[lease_id]
+
+    def update(self, lease_id, *, reservations):
+        if self.fail_update:
+            raise RuntimeError("not enough hosts")
+
+        lease = self.leases[lease_id]
+        lease['status'] = 'UPDATING'
+        self.polls = 0
+
+        for update in reservations:
+            next(r for r in lease['reservations'] if r['id'] == update['id']).update(update)
+
+        lease['status'] = 'STARTING'
+
+
+@pytest.fixture
+def chi_util(monkeypatch):
+    created = []
+    blazar = types.SimpleNamespace(lease=FakeLeases())
+
+    def client(name):
+        def make(session=None):
+            created.append((name, session))
+            return blazar if name == 'blazar' else types.SimpleNamespace(name=name)
+
+        return make
+
+    chi = types.ModuleType('chi')
+    chi.clients = types.ModuleType('chi.clients')
+    chi.lease = types.ModuleType('chi.lease')
+
+    for name in ['nova', 'neutron', 'glance', 'blazar']:
+        setattr(chi.clients, name, client(name))
+
+    chi.lease.lease_duration = lambda days=1: ('start', 'end')
+    chi.lease.add_node_reservation = lambda reservations, count, node_type: reservations.append(
+        dict(resource_type='physical:host', min=count, max=count))
+
+    ks_connection = types.ModuleType('keystoneauth1.exceptions.connection')
+    ks_connection.ConnectFailure = type('ConnectFailure', (Exception,), {})
+
+    modules = {'chi': chi, 'chi.clients': chi.clients, 'chi.lease': chi.lease,
+               'keystoneauth1': types.ModuleType('keystoneauth1'),
+               'keystoneauth1.exceptions': types.ModuleType('keystoneauth1.exceptions'),
+               'keystoneauth1.exceptions.connection': ks_connection}
+
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    monkeypatch.delitem(sys.modules, 'fabfed.provider.chi.chi_util', raising=False)
+    module = importlib.import_module('fabfed.provider.chi.chi_util')
+    monkeypatch.setattr(module.time, 'sleep', lambda _: None)
+    yield module, created, blazar
+    sys.modules.pop('fabfed.provider.chi.chi_util', None)
+
+
+def make_site(chi_util):
+    site = chi_util.ChiSite(site='CHI@UC', auth_url='url', project_id='p', client_id='c', user='u', password='pw')
+    site._session = 'session'
+    return site
+
+
+def test_chi_site_creates_each_client_once_with_its_session(chi_util):
+    module, created, _ = chi_util
+    site = make_site(module)
+
+    assert site.nova() is site.nova()
+    assert site.neutron().name == 'neutron'
+    site.blazar()
+    assert created == [('nova', 'session'), ('neutron', 'session'), ('blazar', 'session')]
+
+
+def test_chi_site_lease_helpers(chi_util):
+    module, _, blazar = chi_util
+    site = make_site(module)
+
+    with pytest.raises(ValueError):
+        site.get_lease('group-lease')
+
+    site.create_lease('group-lease', [dict(resource_type='physical:host', min=2, max=2)])
+    assert site.wait_for_lease_active('group-lease', interval=0, timeout=5)['status'] == 'ACTIVE'
+
+    site.create_lease('slow-lease', [])
+    blazar.lease.leases['lease-1']['status'] = 'PENDING'
+
+    with pytest.raises(TimeoutError):
+        site.wait_for_lease_active('slow-lease', interval=0.01, timeout=0.05)
+
+    site.delete_lease('group-lease')
+    assert [lease['name'] for lease in blazar.lease.list()] == ['slow-lease']
+
+
+def test_group_lease_is_resized_when_the_count_changes(chi_util):
+    import logging
+
+    module, _, blazar = chi_util
+    site = make_site(module)
+    helper = module.LeaseHelper(lease_name='group-lease', chi_site=site, logger=logging.getLogger())
+
+    def reservations(count):
+        temp = []
+        module.chi.lease.add_node_reservation(temp, count=count, node_type='compute')
+        return temp
+
+    helper.create_lease_if_needed(reservations=reservations(2), retry=1)
+    helper.create_lease_if_needed(reservations=reservations(4), retry=1)
+    assert helper.lease['status'] == 'ACTIVE'
+    assert (helper.lease['reservations'][0]['min'], helper.lease['reservations'][0]['max']) == (4, 4)
+    assert len(blazar.lease.leases) == 1
+
+    blazar.lease.fail_update = True
+
+    with pytest.raises(Exception, match='reserves 4 host'):
+        helper.create_lease_if_needed(reservations=reservations(6), retry=1)
+
+
+class FakeServers:
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.calls = 0
+
+    def list(self):
+        statuses = self.ticks[min(self.calls, len(self.ticks) - 1)]
+        self.calls += 1
+        return [types.SimpleNamespace(name=name, status=status) for name, status in statuses.items()]
+
+
+class FakeChiNode:
+    def __init__(self, name):
+        self.name = name
+        self.mgmt_ip = None
+
+    def handle_active(self, server):
+        self.mgmt_ip = f"10.0.0.{self.name[-1]}"
+
+
+def make_waiter(module, ticks, names, **kwargs):
+    import logging
+
+    servers = FakeServers(ticks)
+    site = types.SimpleNamespace(nova=lambda: types.SimpleNamespace(servers=servers))
+    nodes = [FakeChiNode(name) for name in names]
+    waiter = module.ChiNodeGroupWaiter(chi_site=site, nodes=nodes, logger=logging.getLogger(), interval=1, **kwargs)
+    return waiter, servers
+
+
+def test_group_waiter_lists_servers_once_per_tick(chi_util, monkeypatch):
+    module, _, _ = chi_util
+    probes = []
+    monkeypatch.setattr(module, 'is_port_open', lambda host, port: probes.append(host) or True)
+    ticks = [dict(node1='BUILD', node2='BUILD', node3='BUILD'),
+             dict(node1='ACTIVE', node2='BUILD', node3='BUILD'),
+             dict(node1='ACTIVE', node2='ACTIVE', node3='BUILD'),
+             dict(node1='ACTIVE', node2='ACTIVE', node3='ACTIVE')]
+    waiter, servers = make_waiter(module, ticks, ['node1', 'node2', 'node3'])
+    ready = []
+    waiter.wait(lambda node: ready.append((node.name, servers.calls)))
+
+    assert servers.calls == waiter.list_calls == 4
+    assert ready == [('node1', 2), ('node2', 3), ('node3', 4)]
+    assert probes == ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+
+
+def test_group_waiter_fails_on_error_and_timeout(chi_util, monkeypatch):
+    module, _, _ = chi_util
+    monkeypatch.setattr(module, 'is_port_open', lambda host, port: True)
+    ticks = [dict(node1='ERROR', node2='BUILD'), dict(node1='ERROR', node2='ACTIVE')]
+    waiter, _ = make_waiter(module, ticks, ['node1', 'node2'])
+    ready = []
+
+    with pytest.raises(RuntimeError, match='node1 went into ERROR'):
+        waiter.wait(lambda node: ready.append(node.name))
+
+    assert ready == ['node2']
+
+    waiter, servers = make_waiter(module, [dict(node1='BUILD')], ['node1'], timeout=0)
+
+    with pytest.raises(TimeoutError, match='node1'):
+        waiter.wait(lambda node: ready.append(node.name))
+
+    assert ready == ['node2']
+
+
+def test_group_waiter_skips_the_ssh_check(chi_util, monkeypatch):
+    module, _, _ = chi_util
+
+    def is_port_open(host, port):
+        raise AssertionError("ssh should not be checked")
+
+    monkeypatch.setattr(module, 'is_port_open', is_port_open)
+    waiter, servers = make_waiter(module, [dict(node1='ACTIVE', node2='ACTIVE')], ['node1', 'node2'],
+                                  check_ssh=False)
+    ready = []
+    waiter.wait(lambda node: ready.append(node.name))
+
+    assert ready == ['node1', 'node2']
+    assert servers.calls == 1
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fabfed.provider.cloudlab.cloudlab_exceptions import CloudlabException
+from fabfed.provider.cloudlab.cloudlab_tracker import ExperimentTracker
+
+
+class FakeExperiment:
+    def __init__(self, *, nodes, fail=False):
+        self.nodes = nodes
+        self.fail = fail
+        self.status_calls = 0
+        self.manifest_calls = 0
+
+    def status(self):
+        self.status_calls += 1
+
+        if self.fail:
+            return dict(status='failed')
+
+        up = min(self.status_calls - 1, self.nodes)
+        nodes = {f"node{i}": dict(ipv4=f"10.0.0.{i}") for i in range(up)}
+        return dict(status='ready' if up == self.nodes else 'provisioning',
+                    aggregate_status={'urn:cluster': dict(nodes=nodes), 'urn:stitch': dict(nodes={})})
+
+    def manifest(self):
+        self.manifest_calls += 1
+        return dict(node=[{'@component_manager_id': 'urn:cluster'}], link={'@vlantag': '100'})
+
+
+def test_tracker_polls_experiments_together():
+    tracker = ExperimentTracker(interval=0.01)
+    experiments = {f"exp-{i}": FakeExperiment(nodes=3) for i in range(3)}
+
+    with ThreadPoolExecutor(max_workers=len(experiments)) as executor:
+        futures = [executor.submit(tracker.wait, key, status_of=exp.status, manifest_of=exp.manifest, timeout=5)
+                   for key, exp in experiments.items()]
+        states = [f.result() for f in futures]
+
+    for state, exp in zip(states, experiments.values()):
+        assert state.ready
+        assert sorted(state.node_infos) == ['node0', 'node1', 'node2']
+        assert state.rspec['link']['@vlantag'] == '100'
+        assert exp.manifest_calls == 3
+
+    assert tracker.get('exp-0') is states[0]
+
+
+def test_tracker_failure_and_timeout():
+    tracker = ExperimentTracker(interval=0.01)
+    exp = FakeExperiment(nodes=1, fail=True)
+
+    with pytest.raises(CloudlabException):
+        tracker.wait('failed', status_of=exp.status, manifest_of=exp.manifest, timeout=5)
+
+    exp = FakeExperiment(nodes=1000)
+
+    with pytest.raises(CloudlabException):
+        tracker.wait('slow', status_of=exp.status, manifest_of=exp.manifest, timeout=0.1)
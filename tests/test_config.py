@@ -1,5 +1,5 @@
 from fabfed.util.parser import Parser
-from fabfed.util.config_models import DependencyInfo
+from fabfed.util.config_models import Config, DependencyInfo, ResourceConfig
 from fabfed.exceptions import ParseConfigException
 from fabfed.exceptions import ResourceTypeNotSupported
 import pytest
@@ -362,3 +362,68 @@ provider:
             assert len(resource.dependencies) == len(temp)
             temp = [d for d in temp if not isinstance(d, DependencyInfo)]
             assert not temp
+
+
+def test_config_overlay():
+    yaml_str = '''
+resource:
+  - node:
+      - my_node:
+          - provider: '{{ fabric.my_provider }}'
+            network: '{{ network.my_network }}'
+            ip: [ { interface: '{{ network.my_network.interface }}' } ]
+  - network:
+      - my_network:
+          - provider: '{{ fabric.my_provider }}'
+            layer3: '{{ layer3.my_layer }}'
+config:
+  - layer3:
+      - my_layer:
+          subnet: 192.168.1.0/24
+provider:
+  - fabric:
+    - my_provider:
+       - user: user1
+    '''
+    from fabfed.util.config import WorkflowConfig
+
+    config = WorkflowConfig.parse(content=yaml_str)
+    overlay = config.overlay()
+    network, node = sorted(overlay.get_resource_configs(), key=lambda r: r.type)
+    parsed_network = next(r for r in config.get_resource_configs() if r.is_network)
+
+    assert overlay.get_resource_configs() == config.get_resource_configs()
+    assert all(dependency.resource is network for dependency in node.dependencies)
+    assert node.provider is network.provider
+    assert node.attributes['network'].resource is network
+    assert node.attributes['ip'][0]['interface'].resource is network
+
+    originals = {id(c) for c in config.get_resource_configs() + config.get_provider_configs()}
+    originals.add(id(parsed_network.attributes['layer3']))
+
+    def referenced(value):
+        if isinstance(value, (Config, ResourceConfig)):
+            yield value
+            yield from referenced(value.attributes)
+        elif isinstance(value, DependencyInfo):
+            yield value.resource
+        elif isinstance(value, list):
+            for v in value:
+                yield from referenced(v)
+        elif isinstance(value, dict):
+            for v in value.values():
+                yield from referenced(v)
+
+    for resource in overlay.get_resource_configs():
+        values = list(referenced(resource.attributes)) + [d.resource for d in resource.dependencies]
+        assert values and not [v for v in values if id(v) in originals]
+
+    network.attributes['count'] = 1
+    network.attributes['layer3'].attributes['gateway'] = '192.168.1.1'
+    overlay.get_provider_configs()[0].attributes['user'] = 'user2'
+    node.dependencies.clear()
+
+    assert 'count' not in parsed_network.attributes
+    assert 'gateway' not in parsed_network.attributes['layer3'].attributes
+    assert config.get_provider_configs()[0].attributes['user'] == 'user1'
+    assert len(next(r for r in config.get_resource_configs() if r.is_node).dependencies) == 2
@@ -0,0 +1,120 @@
+import sys
+import types
+
+import pytest
+
+from fabfed.model.state import NetworkState, NodeState, ProviderState
+from fabfed.util.constants import Constants
+
+
+@pytest.fixture
+def provider(monkeypatch, tmp_path):
+    fablib_constants = types.ModuleType('fabrictestbed_extensions.fablib.constants')
+    fablib_constants.Constants = type('Constants', (), {})
+    modules = {'fabrictestbed_extensions': types.ModuleType('fabrictestbed_extensions'),
+               'fabrictestbed_extensions.fablib': types.ModuleType('fabrictestbed_extensions.fablib'),
+               'fabrictestbed_extensions.fablib.constants': fablib_constants}
+
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    monkeypatch.setenv('HOME', str(tmp_path))
+
+    from fabfed.provider.fabric import fabric_slice_helper
+    from fabfed.provider.fabric.fabric_provider import FabricProvider
+
+    deleted = []
+
+    def delete_slice(*, slice_id=None, slice_name=None):
+        deleted.append(slice_id)
+        return True
+
+    monkeypatch.setattr(fabric_slice_helper, 'delete_slice', delete_slice)
+    monkeypatch.setattr(FabricProvider, '_init_slice', lambda self, destroy_phase=False: pytest.fail("loaded slice"))
+    yield FabricProvider(type='fabric', label='fabric_provider', name='session', config={}), deleted
+
+
+def saved(provider, *states):
+    provider.set_saved_state(ProviderState('fabric_provider', dict(name='session'),
+                                           [s for s in states if s.is_network_state],
+                                           [s for s in states if s.is_node_state], [], [], [], {}, {}))
+
+
+def delete(provider, state):
+    provider.delete_resource(resource={Constants.LABEL: state.label, Constants.RES_TYPE: state.type,
+                                       Constants.SAVED_STATES: [state]})
+
+
+def test_nodes_wait_for_the_network_to_delete_the_slice(provider):
+    provider, deleted = provider
+    node = NodeState(label='node', attributes=dict(name='node-0', slice_id='slice-1'))
+    net = NetworkState(label='net', attributes=dict(name='net-0', slice_id='slice-1'))
+    saved(provider, node, net)
+
+    delete(provider, node)
+    assert deleted == []
+
+    delete(provider, net)
+    assert deleted == ['slice-1']
+
+
+def test_slice_is_deleted_with_the_last_remaining_node(provider):
+    provider, deleted = provider
+    first = NodeState(label='first', attributes=dict(name='first-0', slice_id='slice-1'))
+    second = NodeState(label='second', attributes=dict(name='second-0', slice_id='slice-1'))
+    saved(provider, first, second)
+
+    delete(provider, second)
+    assert deleted == []
+
+    delete(provider, first)
+    assert deleted == ['slice-1']
+
+
+def test_node_states_survive_a_failed_network_delete(provider, monkeypatch):
+    from fabfed.controller.controller import Controller
+    from fabfed.controller.provider_factory import ProviderFactory
+    from fabfed.exceptions import ControllerException
+    from fabfed.provider.fabric import fabric_slice_helper
+    from fabfed.provider.fabric.fabric_provider import FabricProvider
+    from fabfed.util.config import WorkflowConfig
+
+    def delete_slice(*, slice_id=None, slice_name=None):
+        raise Exception("orchestrator is down")
+
+    def init_slice(self, destroy_phase=False):
+        raise Exception("orchestrator is down")
+
+    monkeypatch.setattr(fabric_slice_helper, 'delete_slice', delete_slice)
+    monkeypatch.setattr(FabricProvider, '_init_slice', init_slice)
+    monkeypatch.setattr(FabricProvider, 'setup_environment', lambda self: None)
+
+    config = WorkflowConfig.parse(content='''
+provider:
+  - fabric:
+    - fabric_provider:
+         name: fabric
+resource:
+  - node:
+      - fabric_node:
+          provider: '{{ fabric.fabric_provider }}'
+  - network:
+      - fabric_net:
+          provider: '{{ fabric.fabric_provider }}'
+          interface: '{{ node.fabric_node }}'
+''')
+    node = NodeState(label='fabric_node@node', attributes=dict(name='fabric_node0', slice_id='slice-1'))
+    net = NetworkState(label='fabric_net@network', attributes=dict(name='fabric_net', slice_id='slice-1'))
+    states = [ProviderState('fabric_provider@fabric', dict(name='session-fabric'), [net], [node], [], [], [], {}, {})]
+    controller = Controller(config=config)
+    controller.init(session='session', provider_factory=ProviderFactory(), provider_states=states)
+
+    # Resources are destroyed in reverse order. Put the network first so that the node is visited first and deferred.
+    controller.resources.sort(key=lambda r: r.is_node)
+
+    with pytest.raises(ControllerException):
+        controller.destroy(provider_states=states)
+
+    assert len(states) == 1
+    assert states[0].node_states == [node]
+    assert states[0].network_states == [net]
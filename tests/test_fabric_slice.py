@@ -0,0 +1,457 @@
+import logging
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+from fabfed.model.state import NetworkState, NodeState
+from fabfed.util.constants import Constants
+
+
+class FakeInterface:
+    def __init__(self, name, device):
+        self.name = name
+        self.device = device
+
+    def get_name(self):
+        return self.name
+
+    def get_device_name(self):
+        return self.device
+
+    def get_fim_interface(self):
+        return SimpleNamespace(labels=None)
+
+
+class FakeComponent:
+    def __init__(self, node, name, model):
+        self.name = name
+        self.model = model
+        self.interface = FakeInterface(f"{node.name}-{name}-p1", f"eth{len(node.components) + 1}")
+
+    def get_name(self):
+        return self.name
+
+    def get_model(self):
+        return self.model
+
+    def get_interfaces(self):
+        return [self.interface]
+
+
+class FakeNode:
+    default_image = 'default_rocky_8'
+    default_cores = 2
+    default_ram = 8
+    default_disk = 10
+
+    def __init__(self, slice_object, name, site='STAR', image=default_image, cores=2, ram=8, disk=10, active=True):
+        self.slice_object = slice_object
+        self.name = name
+        self.site = site
+        self.image = image
+        self.capacities = SimpleNamespace(core=cores, ram=ram, disk=disk)
+        self.components = {}
+        self.state = 'Active' if active else 'Ticketed'
+        self.mgmt_ip = f"10.0.0.{len(slice_object.nodes)}" if active else None
+
+    def calls(self, call):
+        self.slice_object.calls.append((call, self.name))
+
+    def get_name(self):
+        return self.name
+
+    def get_slice(self):
+        return self.slice_object
+
+    def get_username(self):
+        return 'ubuntu'
+
+    def get_private_key_file(self):
+        return '~/.ssh/slice_key'
+
+    def get_fablib_manager(self):
+        return SimpleNamespace(get_bastion_username=lambda: 'bastion_user',
+                               get_bastion_host=lambda: 'bastion.fabric-testbed.net',
+                               get_bastion_key_location=lambda: '~/.ssh/bastion_key')
+
+    def get_fim_node(self):
+        properties = dict(capacity_allocations=self.capacities,
+                          reservation_info=SimpleNamespace(reservation_state=self.state,
+                                                           reservation_id=f"id-{self.name}"),
+                          management_ip=self.mgmt_ip)
+        return SimpleNamespace(name=self.name, site=self.site, image_ref=self.image, components=dict(self.components),
+                               get_property=lambda pname: properties[pname])
+
+    def get_components(self):
+        self.calls('get_components')
+        return list(self.components.values())
+
+    def add_component(self, model=None, name=None):
+        component = self.components[name] = FakeComponent(self, name, model)
+        return component
+
+    def get_component(self, name):
+        return self.components[name]
+
+    def get_interfaces(self):
+        return [c.interface for c in self.components.values()]
+
+    def add_fabnet(self, net_type, nic_type):
+        pass
+
+    def get_management_ip(self):
+        self.calls('get_management_ip')
+        return self.mgmt_ip
+
+    def get_reservation_state(self):
+        return self.state
+
+    def get_reservation_id(self):
+        return f"id-{self.name}"
+
+    def get_error_message(self):
+        return ''
+
+    def ip_addr_list(self, output='json', update=False):
+        self.calls('ip_addr_list')
+        return [dict(ifname=itf.device, addr_info=[dict(local=f"192.168.1.{itf.device[3:]}", family='inet')])
+                for itf in self.get_interfaces()]
+
+
+class FakeNetwork:
+    def __init__(self, slice_object, name, active=True):
+        self.slice_object = slice_object
+        self.name = name
+        self.interfaces = []
+        self.state = 'Active' if active else 'Ticketed'
+
+    def get_name(self):
+        return self.name
+
+    def get_site(self):
+        return None
+
+    def get_slice(self):
+        return self.slice_object
+
+    def get_type(self):
+        return 'L2STS'
+
+    def get_fim_network_service(self):
+        return SimpleNamespace(interfaces={})
+
+    def get_reservation_id(self):
+        return f"id-{self.name}"
+
+    def get_reservation_state(self):
+        return self.state
+
+    def get_error_message(self):
+        return ''
+
+    def add_interface(self, itf):
+        self.interfaces.append(itf)
+
+    def remove_interface(self, itf):
+        self.interfaces.remove(itf)
+
+    def get_interfaces(self):
+        return self.interfaces
+
+
+class FakeSlice:
+    def __init__(self, name='session'):
+        self.name = name
+        self.nodes = {}
+        self.networks = {}
+        self.state = 'StableOK'
+        self.calls = []
+        self.updates = 0
+
+    def get_name(self):
+        return self.name
+
+    def get_slice_id(self):
+        return 'slice-1'
+
+    def get_state(self):
+        return self.state
+
+    def get_nodes(self):
+        return list(self.nodes.values())
+
+    def get_networks(self):
+        return list(self.networks.values())
+
+    def get_node(self, name):
+        return self.nodes.get(name)
+
+    def get_network(self, name):
+        return self.networks.get(name)
+
+    def add_node(self, *, name, image, site, cores, ram, disk, active=False):
+        node = self.nodes[name] = FakeNode(self, name, site, image, cores, ram, disk, active)
+        return node
+
+    def add_network(self, name, active=True):
+        network = self.networks[name] = FakeNetwork(self, name, active)
+        return network
+
+    def get_interfaces(self):
+        return [itf for node in self.nodes.values() for itf in node.get_interfaces()]
+
+    def get_fim_topology(self):
+        return SimpleNamespace(nodes={name: node.get_fim_node() for name, node in self.nodes.items()},
+                               remove_node=lambda name: self.nodes.pop(name),
+                               remove_network_service=lambda name: self.networks.pop(name, None))
+
+    def submit(self, wait=False):
+        self.state = 'Configuring'
+        return 'slice-1'
+
+    def update(self):
+        # Networks become active on the first poll and the nodes on the second one
+        self.updates += 1
+
+        for network in self.networks.values():
+            network.state = 'Active'
+
+        if self.updates > 1:
+            self.wait()
+
+    def wait(self, timeout=None, progress=False):
+        for i, node in enumerate(self.nodes.values()):
+            node.state = 'Active'
+            node.mgmt_ip = node.mgmt_ip or f"10.0.1.{i}"
+
+        for network in self.networks.values():
+            network.state = 'Active'
+
+        self.state = 'StableOK'
+
+    def wait_ssh(self):
+        pass
+
+    def post_boot_config(self):
+        pass
+
+
+class RecordingListener:
+    def __init__(self):
+        self.added = []
+        self.created = []
+
+    def on_added(self, *, source, provider, resource):
+        self.added.append([resource.name])
+
+    def on_added_all(self, *, source, provider, resources):
+        self.added.append([r.name for r in resources])
+
+    def on_created(self, *, source, provider, resource):
+        self.created.append(resource.name)
+
+
+@pytest.fixture
+def fabric(monkeypatch, tmp_path):
+    slice_object = FakeSlice()
+    fablib = SimpleNamespace(get_slice=lambda name: slice_object, get_random_site=lambda: 'STAR')
+    modules = dict(constants=dict(Constants=type('Constants', (), {})),
+                   fablib=dict(fablib=fablib),
+                   node=dict(Node=FakeNode),
+                   slice=dict(Slice=FakeSlice),
+                   network_service=dict(NetworkService=FakeNetwork))
+
+    monkeypatch.setitem(sys.modules, 'fabrictestbed_extensions', types.ModuleType('fabrictestbed_extensions'))
+    monkeypatch.setitem(sys.modules, 'fabrictestbed_extensions.fablib',
+                        types.ModuleType('fabrictestbed_extensions.fablib'))
+
+    for name, attrs in modules.items():
+        module = types.ModuleType(f'fabrictestbed_extensions.fablib.{name}')
+        module.__dict__.update(attrs)
+        monkeypatch.setitem(sys.modules, module.__name__, module)
+
+    monkeypatch.setenv('HOME', str(tmp_path))
+
+    from fabfed.provider.fabric.fabric_provider import FabricProvider
+    from fabfed.provider.fabric.fabric_slice import FabricSlice
+
+    provider = FabricProvider(type='fabric', label='fabric_provider@fabric', name='session', config={})
+    listener = RecordingListener()
+    provider.set_resource_listener(listener)
+    fabric_slice = FabricSlice(provider=provider, logger=logging.getLogger(__name__))
+    fabric_slice.slice_object = slice_object
+    yield fabric_slice, slice_object, listener
+
+
+def network_resource(saved_states=()):
+    return {Constants.LABEL: 'fabric_net@network', Constants.RES_TYPE: Constants.RES_TYPE_NETWORK,
+            Constants.RES_NAME_PREFIX: 'fabric_net', Constants.RES_COUNT: 1,
+            Constants.SAVED_STATES: list(saved_states), Constants.RES_CREATION_DETAILS: dict(in_config_file=True)}
+
+
+def node_resource(count, network=None, saved_states=(), label='fabric_node@node', prefix='fabric_node'):
+    resource = {Constants.LABEL: label, Constants.RES_TYPE: Constants.RES_TYPE_NODE,
+                Constants.RES_NAME_PREFIX: prefix, Constants.RES_COUNT: count, Constants.RES_SITE: 'STAR',
+                Constants.SAVED_STATES: list(saved_states), Constants.RES_CREATION_DETAILS: dict(in_config_file=True),
+                Constants.RESOLVED_INTERNAL_DEPENDENCIES: [], Constants.RESOLVED_EXTERNAL_DEPENDENCIES: []}
+
+    if network:
+        resource[Constants.RESOLVED_INTERNAL_DEPENDENCIES].append(SimpleNamespace(attr='network'))
+        resource['network'] = [[network]]
+
+    return resource
+
+
+def live_slice(fabric_slice, slice_object, count):
+    """Populates the slice with count nodes attached to one network, as left by an earlier apply."""
+    net = slice_object.add_network('session-fabric_net-0')
+    node_states = []
+
+    for i in range(count):
+        name = f'session-fabric_node-{i}'
+        node = slice_object.add_node(name=name, image='default_rocky_8', site='STAR', cores=2, ram=8, disk=10,
+                                     active=True)
+        net.add_interface(node.add_component(model='NIC_Basic', name='stitch_net_iface').get_interfaces()[0])
+        node_states.append(NodeState(label='fabric_node@node',
+                                     attributes=dict(name=name, network_label='fabric_net@network',
+                                                     dataplane_ipv4=f'192.168.1.{i}')))
+
+    fabric_slice.slice_created = True
+    fabric_slice.existing_nodes = list(slice_object.nodes)
+    fabric_slice.existing_networks = [net.name]
+    net_state = NetworkState(label='fabric_net@network', attributes=dict(name=net.name))
+    return net_state, node_states
+
+
+def test_scaling_node_group_only_configures_new_nodes(fabric):
+    fabric_slice, slice_object, listener = fabric
+    net_state, node_states = live_slice(fabric_slice, slice_object, 10)
+
+    fabric_slice.add_resource(resource=network_resource([net_state]))
+    node_resource_12 = node_resource(12, fabric_slice.networks[0], node_states)
+    fabric_slice.add_resource(resource=node_resource_12)
+    assert len(slice_object.nodes) == 12
+    assert len(slice_object.networks['session-fabric_net-0'].interfaces) == 12
+
+    slice_object.calls.clear()
+    fabric_slice.create_resource(resource=node_resource_12)
+    assert fabric_slice.submitted
+    assert fabric_slice._affected_nodes == {'session-fabric_node-10', 'session-fabric_node-11'}
+
+    fabric_slice.wait_for_create_resource(resource=node_resource_12)
+    new_nodes = {'session-fabric_node-10', 'session-fabric_node-11'}
+
+    for call in ['get_management_ip', 'get_components', 'ip_addr_list']:
+        assert {name for c, name in slice_object.calls if c == call} == new_nodes
+
+    assert fabric_slice._affected_nodes is None
+    assert [n.dataplane_ipv4 for n in fabric_slice.nodes] == [f'192.168.1.{i}' for i in range(10)] + ['192.168.1.1'] * 2
+    assert len(listener.created) == 13
+
+
+def test_stream_create_reports_networks_before_nodes(fabric, monkeypatch):
+    from fabfed.provider.fabric import fabric_slice as fabric_slice_module
+    from fabfed.provider.fabric.fabric_network import FabricNetwork
+
+    monkeypatch.setattr(fabric_slice_module, 'FABRIC_POLL_INTERVAL', 0)
+    fabric_slice, slice_object, listener = fabric
+    fabric_slice.stream_create = True
+    delegate = slice_object.add_network('session-fabric_net-0', active=False)
+    net = FabricNetwork(label='fabric_net@network', delegate=delegate, layer3=None, peering=None, peer_layer3=None)
+    fabric_slice.networks.append(net)
+    nodes = node_resource(2, net)
+    fabric_slice.add_resource(resource=nodes)
+    fabric_slice.create_resource(resource=nodes)
+
+    fabric_slice.wait_for_create_resource(resource=network_resource())
+    assert listener.created == ['session-fabric_net-0']
+    assert slice_object.updates == 1 and slice_object.state == 'Configuring'
+    assert fabric_slice.provider.resources_with_label('fabric_net@network')[0] is fabric_slice.networks[0]
+    assert fabric_slice.networks[0] is not net and fabric_slice.networks[0].state == 'Active'
+
+    fabric_slice.wait_for_create_resource(resource=nodes)
+    assert listener.created == ['session-fabric_net-0', 'session-fabric_node-0', 'session-fabric_node-1']
+    assert all(n.mgmt_ip and n.dataplane_ipv4 for n in fabric_slice.nodes)
+
+
+def test_interface_index_resolves_devices(fabric, monkeypatch):
+    from fabfed.provider.fabric.fabric_node import InterfaceIndex
+
+    fabric_slice, slice_object, listener = fabric
+    net = slice_object.add_network('FABNET_IPv4_STAR')
+
+    for name in ['node-1', 'node-10']:
+        node = slice_object.add_node(name=name, image='default_rocky_8', site='STAR', cores=2, ram=8, disk=10)
+        node.add_component(model='NIC_Basic', name='stitch_net_iface')
+        net.add_interface(node.add_component(model='NIC_Basic', name='FABNET_IPv4_STAR').get_interfaces()[0])
+
+    lookups = []
+    get_network = slice_object.get_network
+    monkeypatch.setattr(slice_object, 'get_network', lambda name: lookups.append(name) or get_network(name))
+    index = InterfaceIndex(slice_object, ['node-1'])
+
+    # node-10 shares the node-1 prefix but its interfaces are not indexed under node-1
+    assert [itf.get_name() for itf in index._node_interfaces['node-1']] == ['node-1-stitch_net_iface-p1',
+                                                                             'node-1-FABNET_IPv4_STAR-p1']
+    assert index.get_device('node-10-stitch_net_iface-p1') == 'eth1'
+    assert index.find_device('node-1', 'FABNET_IPv4_STAR') == 'eth2'
+    assert index.find_device('node-10', 'FABNET_IPv4_STAR') == 'eth2'
+    assert index.find_device('node-1', 'FABNET_IPv6_STAR') is None
+
+    with pytest.raises(Exception):
+        index.get_device('node-2-stitch_net_iface-p1')
+
+    assert index.get_network_device('FABNET_IPv4_STAR') == 'eth2'
+    assert index.get_network_device('FABNET_IPv4_STAR') == 'eth2'
+    assert index.get_network_device('FABNET_IPv6_STAR') is None
+    assert lookups == ['FABNET_IPv4_STAR', 'FABNET_IPv6_STAR']
+
+
+def test_refresh_only_updates_changed_fields(fabric):
+    from fabfed.provider.fabric.fabric_node import FabricNode, take_node_snapshot
+
+    fabric_slice, slice_object, listener = fabric
+    delegate = slice_object.add_node(name='node-0', image='default_rocky_8', site='STAR', cores=2, ram=8, disk=10,
+                                     active=True)
+    delegate.add_component(model='NIC_Basic', name='stitch_net_iface')
+    node = FabricNode(label='fabric_node@node', delegate=delegate, nic_model='NIC_Basic', network_label='')
+    assert node.components == [dict(name='stitch_net_iface', model='NIC_Basic')]
+    assert node.state == 'active' and node.mgmt_ip == '10.0.0.0' and node.flavor == str(dict(cores=2, ram=8, disk=10))
+
+    reloaded = FakeSlice()
+    reloaded.nodes['node-0'] = delegate
+    delegate.slice_object = reloaded
+    node.refresh(delegate=delegate, snapshot=take_node_snapshot(delegate.get_fim_node()))
+    assert node.delegate is delegate and node.slice_name == 'session'
+    assert reloaded.calls == []
+
+    delegate.mgmt_ip = '10.0.0.9'
+    node.refresh(delegate=delegate, snapshot=take_node_snapshot(delegate.get_fim_node()))
+    assert node.mgmt_ip == node.host == '10.0.0.9'
+    assert reloaded.calls == []
+
+    delegate.add_component(model='NIC_Basic', name='v4_net_iface')
+    node.refresh(delegate=delegate, snapshot=take_node_snapshot(delegate.get_fim_node()))
+    assert [c['name'] for c in node.components] == ['stitch_net_iface', 'v4_net_iface']
+    assert reloaded.calls == [('get_components', 'node-0')]
+
+
+def test_node_group_is_added_with_one_event(fabric, monkeypatch):
+    from fabfed.provider.fabric.fabric_network import FabricNetwork
+
+    fabric_slice, slice_object, listener = fabric
+    delegate = slice_object.add_network('session-fabric_net-0', active=False)
+    net = FabricNetwork(label='fabric_net@network', delegate=delegate, layer3=None, peering=None, peer_layer3=None)
+    attachments = []
+    network_attachment = fabric_slice._network_attachment
+    monkeypatch.setattr(fabric_slice, '_network_attachment', lambda n: attachments.append(n) or network_attachment(n))
+
+    fabric_slice.add_resource(resource=node_resource(3, net))
+    fabric_slice.add_resource(resource=node_resource(2, label='other@node', prefix='other'))
+
+    assert listener.added == [[f'session-fabric_node-{i}' for i in range(3)], ['session-other-0', 'session-other-1']]
+    assert attachments == [net]
+    assert len(delegate.interfaces) == 3
+    assert [n.network_label for n in fabric_slice.nodes] == ['fabric_net@network'] * 3 + [''] * 2
@@ -0,0 +1,28 @@
+from fabfed.provider.fabric.fabric_slice_helper import compute_topology_diff
+
+
+def test_scaling_node_group_only_touches_new_nodes():
+    live_nodes = {f"node-{i}" for i in range(10)}
+    nodes = {f"node-{i}": "net" for i in range(12)}
+
+    diff = compute_topology_diff(live_nodes=live_nodes, live_networks={"slice-net-0"},
+                                 nodes=nodes, networks={"slice-net-0": "net"},
+                                 live_node_network_labels={n: "net" for n in live_nodes},
+                                 attached_nodes={"node-10"})
+
+    assert diff.add_nodes == {"node-10", "node-11"}
+    assert diff.add_interfaces == {"node-11": "slice-net-0"}
+    assert not diff.remove_nodes
+    assert not diff.remove_networks
+
+
+def test_removals():
+    diff = compute_topology_diff(live_nodes={"node-0", "node-1"}, live_networks={"slice-net-0", "slice-other-0"},
+                                 nodes={"node-0": "net"}, networks={"slice-net-0": "net"},
+                                 live_node_network_labels={"node-0": "net", "node-1": "net"},
+                                 attached_nodes=set())
+
+    assert not diff.add_nodes
+    assert diff.remove_nodes == {"node-1": ["slice-net-0"]}
+    assert diff.remove_networks == ["slice-other-0"]
+    assert not diff.add_interfaces
@@ -0,0 +1,149 @@
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeClient:
+    created = []
+
+    def __init__(self, *, credentials):
+        self.credentials = credentials
+        FakeClient.created.append(type(self).__name__)
+
+
+class NetworksClient(FakeClient):
+    pass
+
+
+class RoutersClient(FakeClient):
+    pass
+
+
+class InterconnectAttachmentsClient(FakeClient):
+    pass
+
+
+class RegionOperationsClient(FakeClient):
+    pass
+
+
+class Operation:
+    class Status:
+        RUNNING = 'RUNNING'
+        DONE = 'DONE'
+
+
+@pytest.fixture
+def gcp_utils(monkeypatch):
+    compute_v1 = types.ModuleType('google.cloud.compute_v1')
+    compute_v1.NetworksClient = NetworksClient
+    compute_v1.RoutersClient = RoutersClient
+    compute_v1.InterconnectAttachmentsClient = InterconnectAttachmentsClient
+    compute_v1.RegionOperationsClient = RegionOperationsClient
+    compute_v1.WaitRegionOperationRequest = lambda **kwargs: SimpleNamespace(**kwargs)
+    compute_types = types.ModuleType('google.cloud.compute_v1.types')
+
+    for name in ['Router', 'RouterBgp', 'RouterMd5AuthenticationKey', 'InsertRouterRequest', 'PatchRouterRequest',
+                 'InterconnectAttachment']:
+        setattr(compute_types, name, SimpleNamespace)
+
+    compute_types.Operation = Operation
+    loads = []
+    oauth2 = types.ModuleType('google.oauth2')
+    oauth2.service_account = SimpleNamespace(
+        Credentials=SimpleNamespace(from_service_account_file=lambda path: loads.append(path) or f'credentials:{path}'))
+    modules = {'google': types.ModuleType('google'),
+               'google.cloud': types.ModuleType('google.cloud'),
+               'google.cloud.compute_v1': compute_v1,
+               'google.cloud.compute_v1.types': compute_types,
+               'google.oauth2': oauth2}
+
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    monkeypatch.delitem(sys.modules, 'fabfed.provider.gcp.gcp_utils', raising=False)
+    monkeypatch.delitem(sys.modules, 'fabfed.provider.gcp.gcp_network', raising=False)
+    FakeClient.created = []
+
+    from fabfed.provider.gcp import gcp_utils
+
+    yield gcp_utils, loads
+
+
+def operations(*responses):
+    responses = list(responses)
+    requests = []
+
+    def wait(*, request):
+        requests.append(request)
+        return responses.pop(0) if len(responses) > 1 else responses[0]
+
+    return SimpleNamespace(wait=wait), requests
+
+
+def test_gcp_clients_load_credentials_once(gcp_utils):
+    gcp_utils, loads = gcp_utils
+    clients = gcp_utils.GcpClients(service_key_path='key.json')
+
+    assert clients.routers is clients.routers
+    assert clients.networks is clients.networks
+    assert clients.routers.credentials == 'credentials:key.json'
+    assert loads == ['key.json']
+    assert FakeClient.created == ['RoutersClient', 'NetworksClient']
+
+    shared = gcp_utils.get_clients(service_key_path='key.json')
+    assert gcp_utils.get_clients(service_key_path='key.json') is shared
+    assert gcp_utils.get_clients(service_key_path='other.json') is not shared
+
+
+def test_wait_for_operation(gcp_utils, monkeypatch):
+    from fabfed.provider.gcp.gcp_exceptions import GcpException
+
+    gcp_utils, _ = gcp_utils
+    region_operations, requests = operations(SimpleNamespace(status=Operation.Status.RUNNING),
+                                             SimpleNamespace(status=Operation.Status.DONE, error=None))
+    clients = SimpleNamespace(region_operations=region_operations)
+    operation = SimpleNamespace(name='op-1')
+    gcp_utils.wait_for_operation(clients=clients, project='p', region='r', operation=operation, description='router')
+    assert [(r.project, r.region, r.operation) for r in requests] == [('p', 'r', 'op-1')] * 2
+
+    error = SimpleNamespace(errors=[SimpleNamespace(message='quota exceeded')])
+    region_operations, _ = operations(SimpleNamespace(status=Operation.Status.DONE, error=error))
+    clients = SimpleNamespace(region_operations=region_operations)
+
+    with pytest.raises(GcpException, match='quota exceeded'):
+        gcp_utils.wait_for_operation(clients=clients, project='p', region='r', operation=operation,
+                                     description='router')
+
+    monkeypatch.setattr(gcp_utils, 'GCP_OPERATION_TIMEOUT', 0.05)
+    region_operations, _ = operations(SimpleNamespace(status=Operation.Status.RUNNING))
+    clients = SimpleNamespace(region_operations=region_operations)
+
+    with pytest.raises(GcpException, match='timed out'):
+        gcp_utils.wait_for_operation(clients=clients, project='p', region='r', operation=operation,
+                                     description='router')
+
+
+def test_missing_vpc_fails_before_the_router_is_created(gcp_utils, monkeypatch):
+    from fabfed.provider.gcp.gcp_exceptions import GcpException
+    from fabfed.util.constants import Constants
+
+    gcp_utils, _ = gcp_utils
+    from fabfed.provider.gcp.gcp_network import GcpNetwork
+
+    routers = []
+    monkeypatch.setattr(gcp_utils, 'find_vpc', lambda **kwargs: None)
+    monkeypatch.setattr(gcp_utils, 'find_interconnect_attachment', lambda **kwargs: None)
+    monkeypatch.setattr(gcp_utils, 'find_router', lambda **kwargs: routers.append(kwargs))
+
+    provider = SimpleNamespace(project='p', clients=None, type='gcp')
+    peering = SimpleNamespace(attributes={Constants.RES_CLOUD_VPC: 'vpc-1', Constants.RES_CLOUD_REGION: 'r'})
+    network = GcpNetwork(label='gcp_net@network', name='gcp-net', provider=provider, layer3=None, peering=peering,
+                         stitch_port=None)
+
+    with pytest.raises(GcpException, match='Vpc vpc-1 not found'):
+        network.create()
+
+    assert routers == []
@@ -0,0 +1,168 @@
+import pytest
+
+from fabfed.model.state import NetworkState, NodeState, ProviderState
+
+
+def test_provider_state_index_follows_list_changes():
+    state = ProviderState('dummy', dict(name='dummy'), [], [], [], [], [], {}, {})
+    node = NodeState(label='node', attributes=dict(name='node-0'))
+    state.add(node)
+    state.add_if_not_found(NodeState(label='node', attributes=dict(name='node-0')))
+    assert len(state.states()) == 1
+
+    with pytest.raises(AssertionError):
+        state.add(node)
+
+    state.node_states.clear()
+    state.add_all([node, NetworkState(label='net', attributes=dict(name='net-0'))])
+    assert [s.name for s in state.states()] == ['net-0', 'node-0']
+
+    state.node_states = [NodeState(label='node', attributes=dict(name='node-1'))]
+    state.add_if_not_found(NodeState(label='node', attributes=dict(name='node-0')))
+    assert [s.name for s in state.node_states] == ['node-1', 'node-0']
+
+
+def test_state_index_is_shared_by_controller_phases():
+    from fabfed.model.state import StateIndex
+
+    fabric = ProviderState('fabric', dict(name='fabric'), [], [], [], [], [], {}, {})
+    chi = ProviderState('chi', dict(name='chi'), [], [], [], [], [], {}, {})
+    fabric.add_all([NodeState(label='node', attributes=dict(name='node-0')),
+                    NodeState(label='node', attributes=dict(name='node-1'))])
+    chi.add(NetworkState(label='net', attributes=dict(name='net-0')))
+
+    index = StateIndex([fabric, chi])
+    assert [s.name for s in index['node']] == ['node-0', 'node-1']
+    assert index.provider_state_of(index['net'][0]) is chi
+    assert 'provider_state' not in index['net'][0].attributes
+
+    index.remove('node')
+    assert 'node' not in index and 'net' in index
+    assert index.saved_states_map() == dict(fabric=fabric, chi=chi)
+
+
+def test_json_serializers_skip_private_fields():
+    import json
+    from collections import namedtuple
+    from fabfed.util.state import dump_json, SetEncoder
+
+    state = ProviderState('dummy', dict(name='dummy'), [], [], [], [], [], {}, {})
+    state.add(NodeState(label='node', attributes=dict(name='node-0', ips={'10.0.0.1'}, pair=namedtuple('P', 'a b')(1, 2))))
+    expected = json.loads(json.dumps(state, cls=SetEncoder))
+
+    assert '_index' not in expected
+    assert expected['node_states'][0]['attributes'] == dict(name='node-0', ips=['10.0.0.1'], pair=[1, 2])
+    assert json.loads(dump_json(state)) == expected
+    assert json.loads(dump_json(state, indent=3)) == expected
+
+
+def test_state_yaml_classes_leave_safe_loader_alone():
+    import yaml
+    from fabfed.model.state import StateLoader, StateDumper, get_loader, get_dumper
+
+    state = ProviderState('dummy', dict(name='dummy'), [], [], [], [], [], {}, {})
+    state.add(NodeState(label='node', attributes=dict(name='node-0')))
+
+    for dumper in [StateDumper, get_dumper()]:
+        text = yaml.dump([state], Dumper=dumper, width=float("inf"), default_flow_style=False, sort_keys=False)
+
+        for loader in [StateLoader, get_loader()]:
+            loaded = yaml.load(text, Loader=loader)
+            assert loaded[0].node_states[0].name == 'node-0'
+
+    assert '!NodeState' not in yaml.SafeLoader.yaml_constructors
+    assert ProviderState not in yaml.SafeDumper.yaml_representers
+
+
+def test_json_keeps_namedtuples_as_arrays():
+    import json
+    from fabfed.model import ResolvedDependency
+    from fabfed.policy.policy_helper import StitchInfo
+    from fabfed.util.config_models import Dependency, DependencyInfo
+    from fabfed.util.state import dump_json, SetEncoder
+    from fabfed.util.stats import Duration, Stages
+
+    objects = dict(dependency=Dependency(key='vlan', resource='net1', attribute='vlans', is_external=True),
+                   dependency_info=DependencyInfo(resource='net1', attribute='vlans'),
+                   resolved=[ResolvedDependency(resource_label='net1', attr='vlans', value=[100])],
+                   stitch_info=StitchInfo(stitch_port=dict(name='port'), producer='fabric', consumer='chi'),
+                   stages=(Stages(setup_duration=1, plan_duration=2, create_duration=3, delete_duration=4),),
+                   duration=Duration(duration=1.5, comment='total'))
+    expected = dict(dependency=['vlan', 'net1', 'vlans', True],
+                    dependency_info=['net1', 'vlans'],
+                    resolved=[['net1', 'vlans', [100]]],
+                    stitch_info=[dict(name='port'), 'fabric', 'chi'],
+                    stages=[[1, 2, 3, 4]],
+                    duration=[1.5, 'total'])
+
+    assert json.loads(json.dumps(objects, cls=SetEncoder)) == expected
+    assert json.loads(dump_json(objects)) == expected
+    assert json.loads(dump_json(objects, indent=3)) == expected
+
+
+def test_provider_resource_index_sees_replaced_entries():
+    import logging
+    from types import SimpleNamespace
+    from fabfed.provider.api.provider import Provider
+
+    class TestProvider(Provider):
+        def setup_environment(self):
+            pass
+
+        def do_add_resource(self, *, resource: dict):
+            pass
+
+        def do_create_resource(self, *, resource: dict):
+            pass
+
+        def do_delete_resource(self, *, resource: dict):
+            pass
+
+    provider = TestProvider(type='test', label='test', name='test', logger=logging.getLogger(__name__), config={})
+    stale, fresh = SimpleNamespace(label='net'), SimpleNamespace(label='net')
+    provider.networks.append(stale)
+    assert provider.resources_with_label('net') == [stale]
+
+    provider.resources.clear()
+    provider.resources_with_label('net').clear()
+    assert provider.resources == [stale]
+
+    provider.replace_resource(stale, fresh)
+    assert provider.resources == [fresh]
+    assert provider.resources_with_label('net') == [fresh]
+
+    with pytest.raises(ValueError):
+        provider.replace_resource(stale, fresh)
+
+    other = SimpleNamespace(label='other')
+    provider.networks.remove(fresh)
+    provider.networks.append(other)
+    provider.invalidate_resource_index()
+    assert provider.resources == [other]
+    assert provider.resources_with_label('net') == []
+
+
+def test_dump_states_reads_states_once_per_section():
+    import io
+    import json
+    from fabfed.util.state import dump_states
+
+    state = ProviderState('dummy', dict(name='dummy'), [], [], [], [], [], {}, {})
+    state.add_all([NodeState(label='node', attributes=dict(name='node-0')),
+                   NetworkState(label='net', attributes=dict(name='net-0'))])
+    reads = []
+
+    def read_states():
+        reads.append(1)
+        yield state
+
+    for to_json in [True, False]:
+        expected, streamed = io.StringIO(), io.StringIO()
+        dump_states([state], to_json, stream=expected)
+        dump_states(read_states, to_json, stream=streamed)
+        assert streamed.getvalue() == expected.getvalue()
+
+        if to_json:
+            assert [n['label'] for n in json.loads(streamed.getvalue())['nodes']] == ['node']
+
+    assert len(reads) == 6
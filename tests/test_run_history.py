@@ -0,0 +1,57 @@
+from fabfed.util import history
+from fabfed.util.stats import Duration, FabfedStats, ProviderStats, ResourceStats, Stages
+
+
+def make_stats(action, duration, failure=None):
+    resource_stats = [ResourceStats(label='vm', duration=duration - 1, invocations=3, failure=failure)]
+    provider_stats = ProviderStats(provider='fabric_provider',
+                                   provider_duration=Duration(duration=duration, comment=''),
+                                   has_failures=failure is not None,
+                                   has_pending=False,
+                                   stages=Stages(setup_duration=1, plan_duration=0, create_duration=duration - 1,
+                                                 delete_duration=0),
+                                   resource_stats=resource_stats)
+    return FabfedStats(action=action,
+                       has_failures=failure is not None,
+                       workflow_duration=Duration(duration=duration + 2, comment=''),
+                       workflow_config=Duration(duration=1, comment=''),
+                       controller=Duration(duration=1, comment=''),
+                       providers=Duration(duration=duration, comment=''),
+                       provider_stats=[provider_stats])
+
+
+def test_run_history_percentiles_and_trend(tmp_path):
+    db_path = str(tmp_path / 'history.db')
+    day = 24 * 3600
+
+    for i, duration in enumerate([10, 20, 30, 40, 50]):
+        history.record_run('session', make_stats('apply', duration, failure='CREATE' if i == 4 else None),
+                           db_path=db_path, finished=1700000000 + i * day)
+
+    history.record_run('session', make_stats('destroy', 5), db_path=db_path, finished=1700000000)
+
+    percentiles = history.query_percentiles(action='apply', db_path=db_path)
+    assert len(percentiles) == 1
+    assert percentiles[0].name == 'fabric_provider' and percentiles[0].count == 5 and percentiles[0].failures == 1
+    assert (percentiles[0].min, percentiles[0].p50, percentiles[0].p90, percentiles[0].max) == (10, 30, 46, 50)
+
+    resources = history.query_percentiles(level='resource', db_path=db_path)
+    assert [(p.name, p.count, p.min) for p in resources] == [('fabric_provider.vm', 6, 4)]
+
+    trend = history.query_trend(level='workflow', bucket='day', action='apply', db_path=db_path)
+    assert [t.median for t in trend] == [12, 22, 32, 42, 52]
+    assert history.query_trend(action='apply', provider='chi', db_path=db_path) == []
+
+
+def test_run_history_records_invocations_and_stats_default(tmp_path):
+    import sqlite3
+
+    db_path = str(tmp_path / 'history.db')
+    history.record_run('session', make_stats('apply', 10), db_path=db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT invocations FROM resource_runs').fetchall() == [(3,)]
+    conn.close()
+
+    provider_stats = make_stats('apply', 10).provider_stats[0]
+    assert ProviderStats(*provider_stats[:5]).resource_stats == ()
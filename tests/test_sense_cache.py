@@ -0,0 +1,37 @@
+from fabfed.provider.sense.sense_cache import MetadataCache
+
+
+def test_sense_cache_is_shared_through_disk(tmp_path):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return '{"uuid": "1234"}'
+
+    cache = MetadataCache(name='profiles', cache_dir=str(tmp_path))
+    assert cache.get('endpoint|profile', fetch) == '{"uuid": "1234"}'
+    assert cache.get('endpoint|profile', fetch) == '{"uuid": "1234"}'
+    assert len(calls) == 1
+
+    other = MetadataCache(name='profiles', cache_dir=str(tmp_path))
+    assert other.get('endpoint|profile', fetch) == '{"uuid": "1234"}'
+    assert other.is_fresh('endpoint|profile')
+    assert len(calls) == 1
+
+
+def test_sense_cache_ttl(tmp_path):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return len(calls)
+
+    cache = MetadataCache(name='profile_uuids', ttl=0, cache_dir=str(tmp_path))
+    assert cache.get('key', fetch) == 1
+    assert not cache.is_fresh('key')
+    assert cache.get('key', fetch) == 2
+
+    cache = MetadataCache(name='profile_uuids', ttl=60, cache_dir=str(tmp_path))
+    assert cache.get('key', fetch) == 2
+    cache.invalidate('key')
+    assert cache.get('key', fetch) == 3
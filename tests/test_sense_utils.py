@@ -0,0 +1,137 @@
+import sys
+import types
+
+import pytest
+
+
+class FakeWorkflowApi:
+    statuses = []
+    polls = 0
+    deleted = []
+
+    def __init__(self, *, req_wrapper):
+        self.client = req_wrapper
+
+    def instance_get_status(self, *, si_uuid=None):
+        FakeWorkflowApi.polls += 1
+        status = FakeWorkflowApi.statuses.pop(0) if len(FakeWorkflowApi.statuses) > 1 else FakeWorkflowApi.statuses[0]
+
+        if isinstance(status, Exception):
+            raise status
+
+        return status
+
+    def instance_operate(self, operation, *, si_uuid, sync, force=None):
+        pass
+
+    def instance_delete(self, *, si_uuid):
+        FakeWorkflowApi.deleted.append(si_uuid)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, interval):
+        self.sleeps.append(interval)
+        self.now += interval
+
+
+@pytest.fixture
+def sense_utils(monkeypatch):
+    modules = {'sense': types.ModuleType('sense'), 'sense.client': types.ModuleType('sense.client')}
+
+    for name, attr, value in [('discover_api', 'DiscoverApi', object),
+                              ('profile_api', 'ProfileApi', object),
+                              ('workflow_combined_api', 'WorkflowCombinedApi', FakeWorkflowApi),
+                              ('requestwrapper', 'RequestWrapper', object)]:
+        module = modules[f'sense.client.{name}'] = types.ModuleType(f'sense.client.{name}')
+        setattr(module, attr, value)
+
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    for name in ['fabfed.provider.sense.sense_utils', 'fabfed.provider.sense.sense_client']:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    from fabfed.provider.sense import sense_utils
+
+    clock = FakeClock()
+    monkeypatch.setattr(sense_utils, 'time', clock)
+    FakeWorkflowApi.statuses = []
+    FakeWorkflowApi.polls = 0
+    FakeWorkflowApi.deleted = []
+    yield sense_utils, clock
+
+
+def wait(sense_utils, statuses, **kwargs):
+    FakeWorkflowApi.statuses = list(statuses)
+    return sense_utils.wait_for_status(client=object(), si_uuid='si-1', **kwargs)
+
+
+def test_wait_for_status_needs_consecutive_confirmations(sense_utils):
+    sense_utils, clock = sense_utils
+    statuses = ['CREATE - PENDING', 'CREATE - READY', 'CREATE - COMMITTING', 'CREATE - READY', 'CREATE - READY']
+    status = wait(sense_utils, statuses, until=['CREATE - READY'], confirmations=2)
+
+    assert status == 'CREATE - READY'
+    assert FakeWorkflowApi.polls == 5
+
+    status = wait(sense_utils, ['CREATE - READY'], until=['CREATE - READY'])
+    assert status == 'CREATE - READY'
+    assert FakeWorkflowApi.polls == 6
+
+
+def test_wait_for_status_backs_off_while_unchanged(sense_utils):
+    sense_utils, clock = sense_utils
+    statuses = ['CREATE - PENDING'] * 4 + ['CREATE - COMMITTING', 'CREATE - READY']
+    wait(sense_utils, statuses, until=['CREATE - READY'])
+
+    minimum = sense_utils.SENSE_POLL_MIN_INTERVAL
+    backoff = sense_utils.SENSE_POLL_BACKOFF
+    assert clock.sleeps == [minimum, minimum * backoff, minimum * backoff ** 2, minimum * backoff ** 3, minimum]
+
+
+def test_wait_for_status_returns_on_failure(sense_utils):
+    sense_utils, clock = sense_utils
+    status = wait(sense_utils, ['CREATE - FAILED', 'CREATE - READY'], until=['CREATE - READY'], confirmations=2)
+
+    assert status == 'CREATE - FAILED'
+    assert FakeWorkflowApi.polls == 1
+    assert clock.sleeps == []
+
+
+def test_wait_for_status_times_out_with_the_last_status(sense_utils):
+    sense_utils, clock = sense_utils
+    status = wait(sense_utils, ['CREATE - PENDING'], until=['CREATE - READY'], timeout=100)
+
+    assert status == 'CREATE - PENDING'
+    assert clock.now <= 100
+    assert max(clock.sleeps) == sense_utils.SENSE_POLL_MAX_INTERVAL
+
+
+def test_wait_for_status_returns_none_when_every_poll_fails(sense_utils):
+    sense_utils, clock = sense_utils
+    status = wait(sense_utils, [Exception('unavailable')], until=['CREATE - READY'], timeout=100)
+
+    assert status is None
+    assert FakeWorkflowApi.polls > 1
+
+
+def test_delete_instance_fails_when_the_status_is_lost(sense_utils):
+    sense_utils, clock = sense_utils
+    FakeWorkflowApi.statuses = ['CREATE - READY'] + [Exception('unavailable')]
+
+    with pytest.raises(sense_utils.SenseException, match='instance not deleted'):
+        sense_utils.delete_instance(client=object(), si_uuid='si-1')
+
+    FakeWorkflowApi.statuses = ['CREATE - COMPILED'] + [Exception('unavailable')]
+
+    with pytest.raises(sense_utils.SenseException, match='could not get the status'):
+        sense_utils.delete_instance(client=object(), si_uuid='si-1')
+
+    assert FakeWorkflowApi.deleted == []
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from fabfed.util.task_graph import TaskGraph
+
+
+def test_task_graph_runs_independent_steps_together():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def step(value):
+        def run(**kwargs):
+            barrier.wait()
+            return value
+
+        return run
+
+    graph = TaskGraph(name="test")
+    graph.add('a', step(1))
+    graph.add('b', step(2))
+    graph.add('c', lambda a, b: a + b, depends_on=['a', 'b'])
+
+    assert graph.run()['c'] == 3
+    assert set(graph.durations) == {'a', 'b', 'c'}
+
+
+def test_task_graph_stops_on_failure():
+    def fail():
+        raise RuntimeError("failed")
+
+    graph = TaskGraph(name="test")
+    graph.add('a', fail)
+    graph.add('b', lambda a: a, depends_on=['a'])
+
+    with pytest.raises(RuntimeError):
+        graph.run()
+
+    assert 'b' not in graph.durations
+
+    with pytest.raises(ValueError):
+        graph.add('c', fail, depends_on=['d'])
+
+
+def test_task_graph_steps_see_the_callers_context():
+    import contextvars
+
+    session = contextvars.ContextVar('session', default=None)
+    session.set('session-1')
+
+    graph = TaskGraph(name="test")
+    graph.add('a', session.get)
+    graph.add('b', lambda a: (a, session.get()), depends_on=['a'])
+
+    assert graph.run()['b'] == ('session-1', 'session-1')
@@ -320,3 +320,192 @@ resource:
     assert get_stats(states=states) == (0, 0, 15, 0, 0)
     states = run_destroy_workflow(session=session, config_str=config_str)
     assert len(states) == 0
+
+
+def test_show_workflow_ndjson(capsys):
+    config_str = '''
+provider:
+  - dummy:
+    - my_provider:
+       - url: https://some_url:5000
+resource:
+  - service:
+      - dtn:
+         - provider: '{{ dummy.my_provider }}'
+           image: ubuntu
+           count: 3
+    '''
+    import json
+
+    session = "test_show_workflow_ndjson"
+    run_apply_workflow(session=session, config_str=config_str)
+    capsys.readouterr()
+
+    sutil.dump_states(sutil.iter_states(session), to_json=False, summary=True, ndjson=True)
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(records) == 3
+    assert {r['section'] for r in records} == {'services'}
+
+    sutil.dump_states(lambda: sutil.iter_states(session), to_json=True, summary=True)
+    output = json.loads(capsys.readouterr().out)
+    assert len(output['services']) == 3 and output['nodes'] == [] and output['networks'] == []
+    sutil.destroy_session(session)
+
+
+def test_session_catalog_workflow():
+    config_str = '''
+provider:
+  - dummy:
+    - my_provider:
+       - url: https://some_url:5000
+resource:
+  - service:
+      - dtn:
+         - provider: '{{ dummy.my_provider }}'
+           image: ubuntu
+           count: 2
+    '''
+    session = "test_session_catalog"
+    run_apply_workflow(session=session, config_str=config_str)
+    sutil.save_meta_data(dict(config_dir="some_dir"), session)
+
+    entry = sutil.load_catalog()[session]
+    assert entry['config_dir'] == "some_dir"
+    assert (entry['services'], entry['pending'], entry['failed']) == (2, 0, 0)
+    assert sutil.load_catalog(rebuild=True)[session] == entry
+
+    sutil.destroy_session(session)
+    assert session not in sutil.load_catalog()
+
+
+def test_failed_sessions_are_checked_on_disk(capsys):
+    import shutil
+    from fabfed.util.utils import dump_sessions, get_base_dir
+
+    config_str = '''
+provider:
+  - dummy:
+    - my_provider:
+       - url: https://some_url:5000
+resource:
+  - service:
+      - dtn:
+         - provider: '{{ dummy.my_provider }}'
+           image: ubuntu
+    '''
+    session = "test_failed_sessions_are_checked_on_disk"
+    removed = session + "_removed"
+    run_apply_workflow(session=session, config_str=config_str)
+    sutil.update_catalog(session, has_failures=True)
+    sutil.update_catalog(removed, failed=1)
+    shutil.rmtree(get_base_dir(removed))
+
+    assert [s['session'] for s in dump_sessions(True, failed=True)] == []
+    assert not sutil.load_catalog()[session].get('has_failures')
+    assert removed not in sutil.load_catalog()
+    capsys.readouterr()
+
+    sutil.update_catalog(session, failed=1)
+    sutil.save_states([], session)
+    assert dump_sessions(True, failed=True, refresh=True) == []
+    sutil.destroy_session(session)
+
+
+def test_batch_workflow(tmp_path):
+    import yaml
+    from fabfed.controller.batch import BatchRunner, load_manifest
+
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    (config_dir / "config.fab").write_text('''
+variable:
+  - vlan:
+      default: 0
+provider:
+  - dummy:
+    - my_provider:
+       - url: https://some_url:5000
+resource:
+  - service:
+      - dtn:
+         - provider: '{{ dummy.my_provider }}'
+           image: ubuntu
+           vlan: '{{ var.vlan }}'
+    ''')
+    manifest = dict(results_dir="results",
+                    concurrency=2,
+                    sessions=[dict(session="test_batch", config_dir="config", count=3,
+                                   vars=dict(vlan=3100), index_vars=["vlan"])])
+    (tmp_path / "manifest.yml").write_text(yaml.dump(manifest))
+
+    manifest = load_manifest(str(tmp_path / "manifest.yml"))
+    assert [s.var_dict['vlan'] for s in manifest['sessions']] == [3101, 3102, 3103]
+
+    runner = BatchRunner(manifest=manifest, logger=logging.getLogger(__name__))
+    assert all(r.rc == 0 for r in runner.run('apply'))
+
+    for i in range(1, 4):
+        session = f"test_batch-{i}"
+        states = sutil.load_states(session)
+        assert states[0].creation_details['dtn@service']['config']['vlan'] == 3100 + i
+
+        with open(tmp_path / "results" / session / "stats-apply.yml") as stream:
+            stats = yaml.safe_load(stream)
+            assert not stats['stats']['has_failures']
+
+    assert all(r.rc == 0 for r in runner.run('destroy'))
+    assert not [s for s in sutil.load_sessions() if s.startswith("test_batch-")]
+
+    with open(tmp_path / "results" / "batch-destroy.yml") as stream:
+        summary = yaml.safe_load(stream)
+        assert summary['failed'] == 0 and len(summary['sessions']) == 3
+
+
+def test_batch_runs_sessions_with_different_fabric_settings_one_at_a_time(tmp_path, monkeypatch):
+    import threading
+    import time
+    import yaml
+    from fabfed.controller import batch
+
+    for project in ["project-a", "project-b"]:
+        config_dir = tmp_path / project
+        config_dir.mkdir()
+        (config_dir / "config.fab").write_text(f'''
+provider:
+  - fabric:
+    - fabric_provider:
+       - project_id: {project}
+resource:
+  - node:
+      - fabric_node:
+         - provider: '{{{{ fabric.fabric_provider }}}}'
+           count: 0
+    ''')
+
+    manifest = dict(results_dir="results",
+                    sessions=[dict(session="test_fabric_a", config_dir="project-a", count=2),
+                              dict(session="test_fabric_b", config_dir="project-b")])
+    (tmp_path / "manifest.yml").write_text(yaml.dump(manifest))
+    lock = threading.Lock()
+    running = []
+    overlaps = []
+
+    def workflow(*, session, config_dir, **kwargs):
+        with lock:
+            running.append(config_dir)
+            overlaps.append(list(running))
+
+        time.sleep(0.1)
+
+        with lock:
+            running.remove(config_dir)
+
+        return 0
+
+    monkeypatch.setattr(batch, 'apply_workflow', workflow)
+    runner = batch.BatchRunner(manifest=batch.load_manifest(str(tmp_path / "manifest.yml")),
+                               logger=logging.getLogger(__name__))
+    monkeypatch.setattr(runner, 'load_policy', lambda: None)
+    assert all(r.rc == 0 for r in runner.run('apply'))
+    assert all(len(set(projects)) == 1 for projects in overlaps)
+    assert max(len(projects) for projects in overlaps) == 2
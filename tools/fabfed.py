@@ -2,11 +2,10 @@ import sys
 
 from fabfed.controller.controller import Controller
 from fabfed.controller.provider_factory import default_provider_factory
-from fabfed.exceptions import ControllerException
+from fabfed.controller.workflow import apply_workflow, destroy_workflow
 from fabfed.util import utils
 from fabfed.util import state as sutil
 from fabfed.util.config import WorkflowConfig
-from fabfed.util.stats import FabfedStats, Duration
 from fabfed.util.constants import Constants
 
 
@@ -44,102 +43,9 @@ def manage_workflow(args):
             sys.exit(1)
 
     if args.apply:
-        sutil.save_meta_data(dict(config_dir=config_dir), args.session)
-        sutil.delete_stats(args.session)
-        import time
-
-        start = time.time()
-        config = WorkflowConfig.parse(dir_path=config_dir, var_dict=var_dict)
-        parse_and_validate_config_duration = time.time() - start
-        controller_duration_start = time.time()
-
-        try:
-            controller = Controller(config=config,
-                                    policy=policy,
-                                    use_local_policy=not args.use_remote_policy)
-        except Exception as e:
-            logger.error(f"Exceptions while initializing controller .... {e}", exc_info=True)
-            sys.exit(1)
-
-        states = sutil.load_states(args.session)
-        # have_created_resources = next(filter(lambda s: s.number_of_created_resources() > 0, states), None)
-
-        try:
-            controller.init(session=args.session, provider_factory=default_provider_factory, provider_states=states)
-        except Exception as e:
-            logger.error(f"Exceptions while initializing providers  .... {e}", exc_info=True)
-            sys.exit(1)
-
-        try:
-            controller.plan(provider_states=states)
-        except Exception as e:
-            logger.error(f"Exception while planning ... {e}")
-            sys.exit(1)
-        except KeyboardInterrupt as kie:
-            logger.error(f"Keyboard Interrupt while planning ... {kie}")
-            sys.exit(1)
-
-        try:
-            controller.add(provider_states=states)
-        except Exception as e:
-            logger.error(f"Exception while adding ... {e}")
-            sys.exit(1)
-        except KeyboardInterrupt as kie:
-            logger.error(f"Keyboard Interrupt while adding  resources ... {kie}")
-            sys.exit(1)
-
-        workflow_failed = False
-
-        try:
-            controller.apply(provider_states=states)
-        except KeyboardInterrupt as kie:
-            logger.error(f"Keyboard Interrupt while creating resources ... {kie}")
-            workflow_failed = True
-        except ControllerException as ce:
-            logger.error(f"Exceptions while creating resources ... {ce}")
-            workflow_failed = True
-        except Exception as e:
-            logger.error(f"Unknown error while creating resources ... {e}")
-            workflow_failed = True
-
-        controller_duration = time.time() - controller_duration_start
-        providers_duration = 0
-
-        for stats in controller.get_stats():
-            logger.debug(f"STATS:provider={stats.provider}, provider_duration={stats.provider_duration}")
-            controller_duration -= stats.provider_duration.duration
-            providers_duration += stats.provider_duration.duration
-
-        states = controller.get_states()
-        nodes, networks, services, pending, failed = utils.get_counters(states=states)
-        workflow_failed = workflow_failed or pending or failed
-
-        if Constants.RECONCILE_STATES:
-            states = sutil.reconcile_states(states, args.session)
-
-        sutil.save_states(states, args.session)
-        provider_stats = controller.get_stats()
-        workflow_duration = time.time() - start
-        workflow_duration = Duration(duration=workflow_duration,
-                                     comment="total time spent in creating workflow")
-        controller_duration = Duration(duration=controller_duration,
-                                       comment="time spent in controller. It does not include time spent in providers")
-        providers_duration = Duration(duration=providers_duration,
-                                      comment="time spent in all providers")
-        validate_config_duration = Duration(duration=parse_and_validate_config_duration,
-                                            comment="time spent in parsing and validating config")
-
-        fabfed_stats = FabfedStats(action="apply",
-                                   has_failures=workflow_failed,
-                                   workflow_duration=workflow_duration,
-                                   workflow_config=validate_config_duration,
-                                   controller=controller_duration,
-                                   providers=providers_duration,
-                                   provider_stats=provider_stats)
-        logger.info(f"STATS:duration_in_seconds={workflow_duration}")
-        logger.info(f"nodes={nodes}, networks={networks}, services={services}, pending={pending}, failed={failed}")
-        sutil.save_stats(dict(comment="all durations are in seconds", stats=fabfed_stats), args.session)
-        sys.exit(1 if workflow_failed else 0)
+        rc = apply_workflow(session=args.session, config_dir=config_dir, var_dict=var_dict, policy=policy,
+                            use_remote_policy=args.use_remote_policy, logger=logger)
+        sys.exit(rc)
 
     if args.init:
         config = WorkflowConfig.parse(dir_path=config_dir, var_dict=var_dict)
@@ -148,7 +54,8 @@ def manage_workflow(args):
                                 use_local_policy=not args.use_remote_policy)
         states = sutil.load_states(args.session)
         controller.init(session=args.session, provider_factory=default_provider_factory, provider_states=states)
-        sutil.dump_resources(resources=controller.resources, to_json=args.json, summary=args.summary)
+        sutil.dump_resources(resources=controller.resources, to_json=args.json, summary=args.summary,
+                             ndjson=args.ndjson)
         delete_session_if_empty(session=args.session)
         return
 
@@ -218,103 +125,65 @@ def manage_workflow(args):
         states = sutil.load_states(args.session)
         controller.init(session=args.session, provider_factory=default_provider_factory, provider_states=states)
         controller.plan(provider_states=states)
-        cr, dl = sutil.dump_plan(resources=controller.resources, to_json=args.json, summary=args.summary)
+        cr, dl = sutil.dump_plan(resources=controller.resources, to_json=args.json, summary=args.summary,
+                                 ndjson=args.ndjson)
 
         logger.warning(f"Applying this plan would create {cr} resource(s) and destroy {dl} resource(s)")
         delete_session_if_empty(session=args.session)
         return
 
     if args.show:
-        states = sutil.load_states(args.session) if args.session in sessions else []
-        sutil.dump_states(states, args.json, args.summary)
+        states = (lambda: sutil.iter_states(args.session)) if args.session in sessions else []
+        sutil.dump_states(states, args.json, args.summary, ndjson=args.ndjson)
         return
 
     if args.stats:
         stats = sutil.load_stats(args.session)
-        sutil.dump_stats(stats, args.json)
+        sutil.dump_stats(stats, args.json, ndjson=args.ndjson)
         delete_session_if_empty(session=args.session)
         return
 
     if args.destroy:
-        sutil.delete_stats(args.session)
+        rc = destroy_workflow(session=args.session, config_dir=config_dir, var_dict=var_dict, policy=policy,
+                              use_remote_policy=args.use_remote_policy, logger=logger)
+        sys.exit(rc)
 
-        if args.session not in sessions:
-            return
 
-        states = sutil.load_states(args.session)
+def manage_sessions(args):
+    if args.show:
+        utils.dump_sessions(args.json, config_dir=args.config_dir, failed=args.failed, refresh=args.refresh)
+        return
 
-        if not states:
-            sutil.destroy_session(args.session)
-            return
 
-        import time
+def manage_batch(args):
+    from fabfed.controller.batch import BatchRunner, load_manifest
 
-        start = time.time()
-        config = WorkflowConfig.parse(dir_path=config_dir, var_dict=var_dict)
-        parse_and_validate_config_duration = time.time() - start
-        controller_duration_start = time.time()
+    logger = utils.init_logger()
+    manifest = load_manifest(args.manifest)
+    runner = BatchRunner(manifest=manifest, concurrency=args.concurrency, logger=logger)
+    failed = False
 
-        try:
-            controller = Controller(config=config,
-                                    policy=policy,
-                                    use_local_policy=not args.use_remote_policy)
-            controller.init(session=args.session, provider_factory=default_provider_factory, provider_states=states)
-        except Exception as e:
-            logger.error(f"Exceptions while initializing controller .... {e}")
-            sys.exit(1)
+    for action, selected in [('apply', args.apply), ('destroy', args.destroy)]:
+        if selected:
+            results = runner.run(action)
+            failed = failed or any(result.rc != 0 for result in results)
 
-        destroy_failed = False
+    sys.exit(1 if failed else 0)
 
-        try:
-            controller.destroy(provider_states=states)
-        except ControllerException as e:
-            logger.error(f"Exceptions while deleting resources ...{e}")
-            destroy_failed = True
-        except KeyboardInterrupt as kie:
-            logger.error(f"Keyboard Interrupt while deleting resources ... {kie}")
-            sys.exit(1)
 
-        controller_duration = time.time() - controller_duration_start
-        providers_duration = 0
-
-        for stats in controller.get_stats():
-            logger.info(f"STATS:provider={stats.provider}, provider_duration={stats.provider_duration}")
-            controller_duration -= stats.provider_duration.duration
-            providers_duration += stats.provider_duration.duration
-
-        if not states:
-            logger.info(f"Destroying session {args.session} ...")
-            sutil.destroy_session(args.session)
-        else:
-            sutil.save_states(states, args.session)
-
-        end = time.time()
-        workflow_duration = end - start
-        workflow_duration = Duration(duration=workflow_duration,
-                                     comment="total time spent in destroying workflow")
-        controller_duration = Duration(duration=controller_duration,
-                                       comment="time spent in controller. It does not include time spent in providers")
-        providers_duration = Duration(duration=providers_duration, comment="time spent in all providers")
-        validate_config_duration = Duration(duration=parse_and_validate_config_duration,
-                                            comment="time spent in parsing and validating config")
-
-        provider_stats = controller.get_stats()
-        fabfed_stats = FabfedStats(action="destroy",
-                                   has_failures=len(states) > 0,
-                                   workflow_duration=workflow_duration,
-                                   workflow_config=validate_config_duration,
-                                   controller=controller_duration,
-                                   providers=providers_duration,
-                                   provider_stats=provider_stats)
-        logger.info(f"STATS:duration_in_seconds={workflow_duration}")
-        sutil.save_stats(dict(comment="all durations are in seconds", stats=fabfed_stats), args.session)
-        sys.exit(1 if destroy_failed else 0)
+def manage_history(args):
+    from fabfed.util import history
 
+    filters = dict(level=args.level, action=args.action, session=args.session, provider=args.provider,
+                   days=args.days)
 
-def manage_sessions(args):
-    if args.show:
-        utils.dump_sessions(args.json)
-        return
+    if args.percentiles:
+        percentiles = history.query_percentiles(**filters)
+        sutil.dump_objects(objects=dict(percentiles=[p._asdict() for p in percentiles]), to_json=args.json)
+
+    if args.trend:
+        trend = history.query_trend(bucket=args.bucket, **filters)
+        sutil.dump_objects(objects=dict(trend=[t._asdict() for t in trend]), to_json=args.json)
 
 
 def display_stitch_info(args):
@@ -385,7 +254,9 @@ def main(argv=None):
     argv = argv or sys.argv[1:]
     parser = utils.build_parser(manage_workflow=manage_workflow,
                                 manage_sessions=manage_sessions,
-                                display_stitch_info=display_stitch_info)
+                                display_stitch_info=display_stitch_info,
+                                manage_batch=manage_batch,
+                                manage_history=manage_history)
     args = parser.parse_args(argv)
 
     if len(args.__dict__) == 0: